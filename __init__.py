@@ -0,0 +1,88 @@
+'''SuiteSparse sparse matrix orderings and factorizations.
+
+Extension modules
+-----------------
+All of them live in one shared object, ``_core``, linked once against
+the SuiteSparse libraries, so they share its global configuration.
+
+amd, camd
+    Approximate minimum degree orderings of symmetric patterns.
+colamd
+    Column and symmetric approximate minimum degree orderings.
+ccolamd
+    Constrained column and symmetric approximate minimum degree orderings,
+    and elimination trees with a constraint-preserving postorder.
+cholmod
+    Sparse Cholesky factorization with reusable symbolic analysis, Schur
+    complements (schur), sparse matrix operations (sdmult, ssmult, aat,
+    submatrix, horzcat, vertcat, scale, norm), and Matrix Market I/O
+    (mmread, mmwrite).
+umfpack
+    Sparse unsymmetric LU factorization with reusable symbolic analysis.
+spqr
+    Rank-revealing sparse QR factorization and least-squares solves.
+memory
+    Allocator used by all of SuiteSparse, and its memory statistics.
+
+Batch interface
+---------------
+order_batch
+    Order many matrices concurrently on a thread pool.
+set_num_threads
+    Resize the thread pool used by order_batch.
+
+File formats
+------------
+save_csc, load_csc
+    Binary CSC files that are memory-mapped and used without copying.
+SharedFactor
+    A cholmod.Factor in shared memory, solved with in place by a pool of
+    processes; it pickles as the name of its segment.
+
+Caching
+-------
+SymbolicCache
+    LRU cache of symbolic Cholesky factorizations keyed by sparsity pattern.
+
+Ordering selection
+------------------
+order_auto
+    Try several orderings in parallel and keep the cheapest one.
+OrderingSelector
+    The same with a choice of candidates and score, remembering the winner
+    for each sparsity pattern.
+constrained_order
+    Order groups of unknowns one after the other, e.g. the interface of a
+    domain decomposition last, with the elimination tree and postorder.
+
+Profiling
+---------
+The orderings return their statistics with ``info=True``, and the
+factorization objects (cholmod.Factor, umfpack.LU, spqr.QR) hold those of
+their last call in ``stats``.
+
+set_stats_hook, get_stats_hook
+    Stream the statistics of every call to a callback or a logger.
+'''
+
+import sys as _sys
+
+from . import _core
+
+for _name in _core.__all__:
+    _sys.modules[f'{__name__}.{_name}'] = getattr(_core, _name)
+    globals()[_name] = getattr(_core, _name)
+del _name
+
+from ._auto import OrderingSelector, order_auto
+from ._batch import order_batch, set_num_threads
+from ._cache import SymbolicCache
+from ._constrained import ConstrainedOrdering, constrained_order
+from ._io import load_csc, save_csc
+from ._shared import SharedFactor
+from ._stats import get_stats_hook, set_stats_hook
+
+__all__ = ['order_batch', 'set_num_threads', 'SymbolicCache', 'load_csc',
+           'save_csc', 'set_stats_hook', 'get_stats_hook', 'order_auto',
+           'OrderingSelector', 'constrained_order', 'ConstrainedOrdering',
+           'SharedFactor']
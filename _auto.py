@@ -0,0 +1,262 @@
+'''Automatic choice of a fill-reducing ordering.'''
+
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from . import _core, amd, camd, cholmod, colamd
+from ._cache import _pattern_key
+
+_executor = None
+_executor_lock = threading.Lock()
+_default = None
+
+Selection = namedtuple('Selection', ['method', 'perm', 'scores'])
+Selection.__doc__ = '''Ordering chosen by :meth:`OrderingSelector.select`.
+
+method : str
+    Name of the winning method.
+perm : ndarray
+    Its permutation.
+scores : dict
+    Predicted ``{'lnz': ..., 'flops': ...}`` of a Cholesky factorization
+    with the ordering of each method that was tried.
+'''
+
+
+def _natural(A):
+    return np.arange(A.shape[0])
+
+
+def _given(order):
+    '''Candidate computing a permutation with ``order``, scored by a
+    symbolic analysis with that permutation unless ``analyze`` is false.'''
+    def candidate(A, lower, analyze=True):
+        perm = order(A)
+        if not analyze:
+            return perm, None
+        return perm, cholmod.Factor(A, lower=lower, supernodal='simplicial',
+                                    ordering='given', perm=perm)
+    return candidate
+
+
+def _cholmod(ordering):
+    '''Candidate computing a permutation with a CHOLMOD ordering, scored by
+    the same analysis, which is needed for the permutation either way.'''
+    def candidate(A, lower, analyze=True):
+        F = cholmod.Factor(A, lower=lower, supernodal='simplicial',
+                           ordering=ordering)
+        return F.perm, F
+    return candidate
+
+
+_METHODS = {
+    'natural': _given(_natural),
+    'amd': _given(amd.order),
+    'camd': _given(camd.order),
+    'symamd': _given(colamd.symamd),
+    'metis': _cholmod('metis'),
+    'nesdis': _cholmod('nesdis'),
+}
+
+#: Methods tried by default: the symmetric orderings of CHOLMOD's own
+#: selection.
+DEFAULT_METHODS = ('natural', 'amd') + (
+    ('metis', 'nesdis') if cholmod.HAS_PARTITION else ())
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=os.cpu_count(),
+                thread_name_prefix='suitesparse-auto')
+        return _executor
+
+
+class OrderingSelector:
+    '''Chooses the fill-reducing ordering of least predicted cost.
+
+    Each candidate ordering of a symmetric matrix is computed on its own
+    worker thread, with the GIL released, and scored by a symbolic
+    Cholesky analysis with it.  The candidate with the fewest flops (or
+    entries in L) wins; ties go to the method listed first.  The winner is
+    remembered for each sparsity pattern, so a matrix with a pattern seen
+    before only computes the winning ordering, without analyzing it again
+    unless the ordering is CHOLMOD's own 'metis' or 'nesdis'.
+
+    Parameters
+    ----------
+    methods : sequence of str, optional
+        Symmetric orderings among 'natural', 'amd', 'camd', 'symamd',
+        'metis' and 'nesdis'.  Default is :data:`DEFAULT_METHODS`.
+    score : {'flops', 'lnz'}, optional
+        Predicted cost to minimize.  Default is 'flops'.
+    max_entries : int, optional
+        Patterns whose winner is remembered, least recently used first
+        out.  0 turns the memory off.  Default is 1024.
+    executor : concurrent.futures.Executor, optional
+        Thread pool the candidates run on.  By default a pool private to
+        this module, so that selecting from within ``order_batch`` cannot
+        deadlock.
+
+    Examples
+    --------
+    >>> selector = OrderingSelector(score='lnz')
+    >>> method, perm, scores = selector.select(A)
+    '''
+
+    def __init__(self, methods=None, *, score='flops', max_entries=1024,
+                 executor=None):
+        methods = tuple(DEFAULT_METHODS if methods is None else methods)
+        unknown = [m for m in methods if m not in _METHODS]
+        if unknown or not methods:
+            raise ValueError(f'unknown ordering methods {unknown!r}'
+                             if unknown else 'no ordering methods given')
+        if score not in ('flops', 'lnz'):
+            raise ValueError(f"score must be 'flops' or 'lnz', not {score!r}")
+        self.methods = methods
+        self.score = score
+        self.max_entries = max_entries
+        self.executor = executor
+        self._winners = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._winners)
+
+    @property
+    def stats(self):
+        '''Dictionary of hit and miss counters and remembered patterns.'''
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._winners),
+                'max_entries': self.max_entries,
+            }
+
+    def select(self, A, *, lower=False):
+        '''Choose an ordering of the symmetric matrix A.
+
+        Parameters
+        ----------
+        A : scipy.sparse CSC or CSR matrix
+            Square matrix to order.  As for :class:`cholmod.Factor`, only
+            its upper triangle is used, or the lower one if ``lower`` is
+            true.
+        lower : bool, optional
+            Use the lower instead of the upper triangle of A.
+
+        Returns
+        -------
+        selection : Selection
+            The winning method, its permutation, and the scores of the
+            methods tried when the pattern was first seen.  The
+            selection is also reported to the hook set by
+            ``set_stats_hook``, as the call 'order_auto'.
+        '''
+        start = time.perf_counter()
+        key = _pattern_key(A, lower=lower) if self.max_entries else None
+        with self._lock:
+            winner = self._winners.get(key)
+            if winner is not None:
+                self._winners.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        remembered = winner is not None
+
+        if remembered:
+            method = winner[0]
+            scores = {m: dict(s) for m, s in winner[1].items()}
+            perm, _ = _METHODS[method](A, lower, analyze=False)
+        else:
+            method, perm, scores = self._try_all(A, lower)
+            if key is not None:
+                self._remember(key, (method, scores))
+
+        _core._report_stats('order_auto', {
+            'method': method,
+            'scores': scores,
+            'remembered': remembered,
+            'time': time.perf_counter() - start,
+        })
+        return Selection(method, perm, scores)
+
+    def order(self, A, *, lower=False):
+        '''Permutation of the ordering chosen by :meth:`select`.'''
+        return self.select(A, lower=lower).perm
+
+    def clear(self):
+        '''Forget the remembered winners.  The counters are kept.'''
+        with self._lock:
+            self._winners.clear()
+
+    @staticmethod
+    def _scores(F):
+        stats = F.stats
+        return {'lnz': stats['lnz'], 'flops': stats['flops']}
+
+    def _try_all(self, A, lower):
+        executor = self.executor or _get_executor()
+        futures = {m: executor.submit(_METHODS[m], A, lower)
+                   for m in self.methods}
+        results, error = {}, None
+        for m, future in futures.items():
+            try:
+                results[m] = future.result()
+            except Exception as exc:
+                # a method may fail where others succeed, e.g. METIS
+                # running out of memory; raise only if all of them do
+                error = error or exc
+        if not results:
+            raise error
+        scores = {m: self._scores(F) for m, (_, F) in results.items()}
+        method = min(scores, key=lambda m: (scores[m][self.score],
+                                            scores[m]['lnz']))
+        return method, results[method][0], scores
+
+    def _remember(self, key, winner):
+        with self._lock:
+            self._winners[key] = winner
+            self._winners.move_to_end(key)
+            while len(self._winners) > self.max_entries:
+                self._winners.popitem(last=False)
+
+
+def _default_selector():
+    global _default
+    with _executor_lock:
+        if _default is None:
+            _default = OrderingSelector()
+        return _default
+
+
+def order_auto(A, *, lower=False):
+    '''Ordering of least predicted cost among the default methods.
+
+    Uses a module-level :class:`OrderingSelector`, shared with
+    ``cholmod.Factor(A, ordering='auto')``, which remembers the winner for
+    each sparsity pattern.
+
+    Parameters
+    ----------
+    A : scipy.sparse CSC or CSR matrix
+        Square matrix to order.
+    lower : bool, optional
+        Use the lower instead of the upper triangle of A.
+
+    Returns
+    -------
+    perm : ndarray
+        The permutation.
+    '''
+    return _default_selector().order(A, lower=lower)
@@ -0,0 +1,112 @@
+'''Concurrent ordering of many sparse matrices.'''
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from . import amd, camd, colamd
+from ._auto import order_auto
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class _Workspace(threading.local):
+    '''Per-thread COLAMD workspaces, grown on demand and never shrunk.'''
+
+    def __init__(self):
+        self.buffers = {}
+
+    def get(self, size, dtype):
+        buf = self.buffers.get(dtype)
+        if buf is None or buf.size < size:
+            buf = np.empty(size, dtype=dtype)
+            self.buffers[dtype] = buf
+        return buf
+
+
+_workspace = _Workspace()
+
+
+def _index_dtype(A):
+    return np.dtype(np.int32 if A.indptr.dtype == np.int32 else np.int64)
+
+
+def _colamd(A, **kwargs):
+    dtype = _index_dtype(A)
+    n_row, n_col = A.shape
+    size = colamd.recommended(A.indptr[-1], n_row, n_col, dtype)
+    return colamd.colamd(A, workspace=_workspace.get(size, dtype), **kwargs)
+
+
+_METHODS = {
+    'amd': amd.order,
+    'camd': camd.order,
+    'colamd': _colamd,
+    'symamd': colamd.symamd,
+    'auto': order_auto,
+}
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=os.cpu_count(),
+                thread_name_prefix='suitesparse')
+        return _executor
+
+
+def set_num_threads(n):
+    '''Set the number of worker threads used by :func:`order_batch`.
+
+    Parameters
+    ----------
+    n : int or None
+        Number of threads.  None uses ``os.cpu_count()``.
+    '''
+    global _executor
+    with _executor_lock:
+        old, _executor = _executor, ThreadPoolExecutor(
+            max_workers=n or os.cpu_count(),
+            thread_name_prefix='suitesparse')
+    if old is not None:
+        old.shutdown(wait=False)
+
+
+def order_batch(matrices, method='amd', *, executor=None, **kwargs):
+    '''Compute fill-reducing orderings of many matrices concurrently.
+
+    Each ordering runs with the GIL released, so the orderings proceed in
+    parallel on the worker threads.  COLAMD workspaces are kept per worker
+    thread and reused for every matrix that thread orders.
+
+    Parameters
+    ----------
+    matrices : iterable of scipy.sparse CSC or CSR matrices
+        Matrices to order.
+    method : {'amd', 'camd', 'colamd', 'symamd', 'auto'}, optional
+        Ordering to compute.  Default is 'amd'.  'auto' chooses for each
+        matrix the ordering of least predicted cost, see
+        :func:`order_auto`.
+    executor : concurrent.futures.Executor, optional
+        Thread pool to run on.  By default a module-level pool is used,
+        whose size is set by :func:`set_num_threads`.
+    **kwargs
+        Passed on to the ordering function.
+
+    Returns
+    -------
+    perms : list of ndarray
+        The permutation of each matrix, in input order.
+    '''
+    try:
+        func = _METHODS[method]
+    except KeyError:
+        raise ValueError(f'unknown ordering method {method!r}') from None
+    if executor is None:
+        executor = _get_executor()
+    return list(executor.map(lambda A: func(A, **kwargs), matrices))
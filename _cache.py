@@ -0,0 +1,140 @@
+'''Cache of CHOLMOD symbolic factorizations keyed by sparsity pattern.'''
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .cholmod import Factor
+
+
+def _pattern_key(A, **options):
+    '''Hash of the sparsity structure of a CSC/CSR matrix.
+
+    The digest covers the format, shape, index dtype, ``indptr`` and the
+    used part of ``indices``, plus any ``options``.  The index buffers are
+    hashed in place without copying.
+    '''
+    h = hashlib.blake2b(digest_size=16)
+    indptr = np.ascontiguousarray(A.indptr)
+    indices = np.ascontiguousarray(A.indices[:indptr[-1]])
+    arrays = [indptr, indices]
+    scalars = []
+    for name, value in sorted(options.items()):
+        if isinstance(value, np.ndarray):
+            arrays.append(np.ascontiguousarray(value))
+            value = value.dtype.str
+        scalars.append((name, value))
+    h.update(repr((A.format, A.shape, indptr.dtype.str, indices.dtype.str,
+                   scalars)).encode())
+    for arr in arrays:
+        h.update(memoryview(arr).cast('B'))
+    return h.digest()
+
+
+class SymbolicCache:
+    '''LRU cache of symbolic CHOLMOD factorizations, bounded in bytes.
+
+    Matrices are looked up by a hash of their ``indptr``/``indices``
+    structure and the analysis options.  A hit returns a copy of the cached
+    symbolic factor and skips ``cholmod_analyze`` together with the
+    ordering it would run; a miss analyzes the matrix and stores the
+    result.  Least recently used entries are evicted once the cached
+    factors exceed ``max_bytes``.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        Upper bound on the memory held by cached factors, as reported by
+        ``Factor.nbytes``.  Default is 256 MiB.
+
+    Examples
+    --------
+    >>> cache = SymbolicCache(max_bytes=2**30)
+    >>> F = cache.analyze(A)
+    >>> F.factorize(A)
+    >>> x = F.solve(b)
+    '''
+
+    def __init__(self, max_bytes=256 * 2**20):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def nbytes(self):
+        '''Bytes held by the cached factors.'''
+        return self._nbytes
+
+    @property
+    def stats(self):
+        '''Dictionary of hit, miss and eviction counters and current size.'''
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'nbytes': self._nbytes,
+                'max_bytes': self.max_bytes,
+            }
+
+    def analyze(self, A, **kwargs):
+        '''Return a symbolic :class:`Factor` for A, from the cache if possible.
+
+        Parameters
+        ----------
+        A : scipy.sparse CSC or CSR matrix
+            Matrix to analyze.
+        **kwargs
+            Options passed to :class:`Factor`; they are part of the key.
+
+        Returns
+        -------
+        factor : Factor
+            A factor owned by the caller, ready for ``factorize``.
+        '''
+        key = _pattern_key(A, **kwargs)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if cached is not None:
+            return cached.copy()
+
+        factor = Factor(A, **kwargs)
+        cached = factor.copy()
+        self._insert(key, cached)
+        return factor
+
+    def _insert(self, key, factor):
+        nbytes = factor.nbytes
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._nbytes -= old.nbytes
+            self._entries[key] = factor
+            self._nbytes += nbytes
+            while self._nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._nbytes -= evicted.nbytes
+                self.evictions += 1
+
+    def clear(self):
+        '''Remove all entries.  The counters are kept.'''
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
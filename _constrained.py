@@ -0,0 +1,96 @@
+'''Constrained fill-reducing orderings and their elimination trees.'''
+
+from collections import namedtuple
+
+import numpy as np
+
+from . import camd, ccolamd
+
+ConstrainedOrdering = namedtuple('ConstrainedOrdering',
+                                 ['perm', 'parent', 'post'])
+ConstrainedOrdering.__doc__ = '''Result of :func:`constrained_order`.
+
+perm : ndarray
+    The fill-reducing permutation, with the groups in increasing order.
+parent : ndarray
+    Elimination tree of the matrix ordered by perm: parent[k] is the
+    parent of node k (the k-th unknown of perm), or -1 for a root.
+post : ndarray
+    Postorder of the tree that keeps each group contiguous.  ``perm[post]``
+    is an equivalent ordering, with the same fill, that still honours the
+    groups.
+'''
+
+
+def _csymamd(A, cmember, **kwargs):
+    return ccolamd.csymamd(A, cmember=cmember, **kwargs)
+
+
+def _camd(A, cmember, **kwargs):
+    return camd.order(A, C=cmember, **kwargs)
+
+
+def _ccolamd(A, cmember, **kwargs):
+    return ccolamd.ccolamd(A, cmember=cmember, **kwargs)
+
+
+_METHODS = {
+    'csymamd': (_csymamd, False),
+    'camd': (_camd, False),
+    'ccolamd': (_ccolamd, True),
+}
+
+
+def constrained_order(A, groups, *, method='csymamd', **kwargs):
+    '''Fill-reducing ordering that keeps groups of unknowns in order.
+
+    All unknowns of the smallest group are ordered first, then those of
+    the next one, and so on, each group ordered to reduce fill.  This
+    orders, for example, the interface unknowns of a domain decomposition
+    last, so that their Schur complement is the trailing block of the
+    factorization.
+
+    Parameters
+    ----------
+    A : scipy.sparse CSC or CSR matrix
+        Matrix to order: square for 'csymamd' and 'camd', which order the
+        pattern of A+A', and of any shape for 'ccolamd', which orders the
+        columns for a factorization of A'A or an LU factorization of A.
+    groups : array_like of int
+        Group of each row/column (each column for 'ccolamd').  Only the
+        order of the values matters: ``groups == is_interface`` orders the
+        interface last.
+    method : {'csymamd', 'camd', 'ccolamd'}, optional
+        Ordering to compute.  Default is 'csymamd'.
+    **kwargs
+        Passed on to the ordering function, ``ccolamd.csymamd``,
+        ``camd.order`` or ``ccolamd.ccolamd``, except ``info``: the
+        statistics reach the hook set by ``set_stats_hook``.
+
+    Returns
+    -------
+    ordering : ConstrainedOrdering
+        The permutation, its elimination tree (of A'A for 'ccolamd') and a
+        postorder of the tree that keeps the groups contiguous.
+
+    Examples
+    --------
+    >>> perm, parent, post = constrained_order(K, is_interface)
+    >>> p = perm[post]
+    >>> n_interior = np.count_nonzero(~is_interface)
+    >>> K_ordered = K[p][:, p]  # interface block is K_ordered[n_interior:]
+    '''
+    try:
+        order, column = _METHODS[method]
+    except KeyError:
+        raise ValueError(f'unknown ordering method {method!r}') from None
+    groups = np.asarray(groups)
+    if groups.ndim != 1:
+        raise ValueError('groups must be one-dimensional')
+    # the libraries take sets numbered from 0 to n-1
+    cmember = np.unique(groups, return_inverse=True)[1].astype(
+        A.indices.dtype)
+    perm = order(A, cmember, **kwargs)
+    parent, post = ccolamd.etree(A, perm=perm, cmember=cmember,
+                                 column=column)
+    return ConstrainedOrdering(perm, parent, post)
@@ -0,0 +1,132 @@
+'''Compact binary CSC files that can be memory-mapped.
+
+A file holds a 64-byte header followed by ``indptr``, ``indices`` and
+``data``, each starting on a 64-byte boundary and stored little-endian.
+The header is, in order: the magic bytes ``b'SSCSC\\x00'`` and a 16-bit
+format version, then the number of rows, columns and stored entries (int64),
+the index itemsize in bytes (int32, 4 or 8), the value type (int32, 0 for
+float64 and 1 for complex128) and flags (int32, bit 0 set if the row
+indices are sorted within each column).
+
+``load_csc`` maps the arrays instead of reading them, so a matrix larger
+than memory opens instantly and pages are read on demand.  The arrays are
+handed to ``cholmod.Factor`` and ``umfpack`` as they are: with indices of
+the flavour's type and sorted, no copy is made.
+'''
+
+import struct
+
+import numpy as np
+import scipy.sparse as sp
+
+_MAGIC = b'SSCSC\x00'
+_VERSION = 1
+_HEADER = struct.Struct('<6sHqqqiii')
+_HEADER_SIZE = 64
+_ALIGN = 64
+_VALUE_TYPES = (np.dtype('<f8'), np.dtype('<c16'))
+_SORTED = 1
+
+
+def _aligned(offset):
+    return -(-offset // _ALIGN) * _ALIGN
+
+
+def _layout(ncol, nnz, index_dtype, value_dtype):
+    '''Offsets of indptr, indices and data, and the total file size.'''
+    indptr = _HEADER_SIZE
+    indices = _aligned(indptr + (ncol + 1) * index_dtype.itemsize)
+    data = _aligned(indices + nnz * index_dtype.itemsize)
+    return indptr, indices, data, data + nnz * value_dtype.itemsize
+
+
+def save_csc(path, A):
+    '''Write a sparse matrix in the binary CSC format.
+
+    Parameters
+    ----------
+    path : str or path-like
+        Output file.
+    A : scipy.sparse matrix
+        Converted to CSC if needed.  Real values are stored as float64 and
+        complex values as complex128.  Index arrays keep their type, so
+        int64 indices give a file for the SuiteSparse_long flavours.
+        Explicit zeros and duplicates are stored as they are.
+    '''
+    A = sp.csc_matrix(A)
+    nrow, ncol = A.shape
+    nnz = int(A.indptr[-1])
+    index_dtype = np.dtype(A.indptr.dtype).newbyteorder('<')
+    if index_dtype.itemsize not in (4, 8):
+        raise ValueError(f'unsupported index dtype {A.indptr.dtype}')
+    kind = int(np.iscomplexobj(A.data))
+    value_dtype = _VALUE_TYPES[kind]
+    flags = _SORTED if A.has_sorted_indices else 0
+    offsets = _layout(ncol, nnz, index_dtype, value_dtype)
+    arrays = (A.indptr.astype(index_dtype, copy=False),
+              A.indices[:nnz].astype(index_dtype, copy=False),
+              A.data[:nnz].astype(value_dtype, copy=False))
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, nrow, ncol, nnz,
+                             index_dtype.itemsize, kind, flags))
+        for offset, arr in zip(offsets, arrays):
+            f.seek(offset)
+            arr.tofile(f)
+        f.truncate(offsets[-1])
+
+
+def load_csc(path, *, mmap=True):
+    '''Open a matrix written by ``save_csc``.
+
+    Parameters
+    ----------
+    path : str or path-like
+        File written by ``save_csc``.
+    mmap : bool or {'r', 'c'}
+        Map the arrays read-only (True or 'r'), copy-on-write ('c'), so
+        that they can be modified without touching the file, or read them
+        into memory (False).
+
+    Returns
+    -------
+    A : scipy.sparse.csc_matrix
+        Its ``indptr``, ``indices`` and ``data`` are views of the file when
+        mapped.  They are set directly, since the csc_matrix constructor
+        may copy the indices to downcast them.
+    '''
+    with open(path, 'rb') as f:
+        header = f.read(_HEADER_SIZE)
+    if len(header) < _HEADER_SIZE or not header.startswith(_MAGIC):
+        raise ValueError(f'{path!r} is not a binary CSC file')
+    (_, version, nrow, ncol, nnz, itemsize, kind,
+     flags) = _HEADER.unpack_from(header)
+    if version != _VERSION or itemsize not in (4, 8) or kind not in (0, 1):
+        raise ValueError(f'unsupported binary CSC file {path!r}')
+    index_dtype = np.dtype(f'<i{itemsize}')
+    value_dtype = _VALUE_TYPES[kind]
+    offsets = _layout(ncol, nnz, index_dtype, value_dtype)
+
+    if mmap:
+        mode = 'r' if mmap is True else mmap
+        if mode not in ('r', 'c'):
+            raise ValueError("mmap must be a bool, 'r' or 'c'")
+
+        def read(offset, count, dtype):
+            if count == 0:
+                # np.memmap cannot map an empty range.
+                return np.empty(0, dtype)
+            return np.memmap(path, dtype, mode, offset, (count,))
+    else:
+        def read(offset, count, dtype):
+            return np.fromfile(path, dtype, count, offset=offset)
+
+    indptr = read(offsets[0], ncol + 1, index_dtype)
+    indices = read(offsets[1], nnz, index_dtype)
+    data = read(offsets[2], nnz, value_dtype)
+    if len(indptr) != ncol + 1 or len(data) != nnz:
+        raise ValueError(f'truncated binary CSC file {path!r}')
+
+    A = sp.csc_matrix((nrow, ncol), dtype=value_dtype)
+    A.indptr, A.indices, A.data = indptr, indices, data
+    A.has_sorted_indices = bool(flags & _SORTED)
+    return A
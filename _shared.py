@@ -0,0 +1,173 @@
+'''Cholesky factors shared by processes through shared memory.'''
+
+import os
+import threading
+from multiprocessing import shared_memory
+
+from . import cholmod
+
+# SharedFactors of this process by name, so that each process attaches to a
+# segment once however many tasks pass it the factor.
+_attached = {}
+_attached_lock = threading.Lock()
+
+
+def _after_fork():
+    # a thread of the parent may have held the lock when it forked
+    global _attached_lock
+    _attached_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+def _open(name):
+    try:
+        # the creator alone tracks the segment, to unlink it if it dies
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:  # Python < 3.13 tracks every attachment
+        return shared_memory.SharedMemory(name)
+
+
+class SharedFactor:
+    '''A ``cholmod.Factor`` in shared memory, solved with by many processes.
+
+    The factor is copied once into a ``multiprocessing.shared_memory``
+    segment, in the format of ``Factor.save``.  Every process then uses the
+    segment in place through ``Factor.from_buffer``: its pages are shared,
+    not replicated, and nothing is unpickled.  A SharedFactor pickles as
+    the name of its segment, so it can be passed to the tasks of a
+    ``multiprocessing`` or ``concurrent.futures`` process pool, and each
+    process attaches once, on the first task that receives it.
+
+    The shared factor is read-only: solve(), spsolve() and copy() work,
+    while factorize(), update(), rowadd() and rowdel() raise ValueError.
+    For a factor on disk, ``Factor.load(path, mmap=True)`` shares the pages
+    of the file in the same way.
+
+    Parameters
+    ----------
+    factor : cholmod.Factor
+        Factor to copy into a new segment.
+    name : str, optional
+        Name of the segment.  Default is a random name.
+
+    Examples
+    --------
+    >>> F = cholmod.Factor(A)
+    >>> F.factorize(A)
+    >>> with SharedFactor(F) as shared:
+    ...     with ProcessPoolExecutor() as pool:
+    ...         x = list(pool.map(solve, itertools.repeat(shared), rhs))
+
+    where ``solve(shared, b)`` returns ``shared.factor.solve(b)``.
+
+    Notes
+    -----
+    The process that created the segment unlinks it when leaving the
+    ``with`` block, or with :meth:`unlink`; processes forked from it
+    inherit the SharedFactor but not its ownership.  Before Python 3.13
+    every attaching process registers the segment with its resource
+    tracker, which unlinks it when the process exits; processes that are
+    neither the creator nor forked from it, like independently started
+    servers, should attach only from Python 3.13.
+    '''
+
+    def __init__(self, factor, *, name=None):
+        size = factor.saved_nbytes
+        self._shm = shared_memory.SharedMemory(name, create=True, size=size)
+        try:
+            factor.to_buffer(self._shm.buf)
+        except BaseException:
+            self._shm.close()
+            self._shm.unlink()
+            raise
+        self._creator = os.getpid()
+        self._factor = None
+        with _attached_lock:
+            _attached[self.name] = self
+
+    @classmethod
+    def attach(cls, name):
+        '''The SharedFactor of the segment ``name`` in this process.
+
+        The segment is opened on the first call for a name, and the same
+        object returned by the next ones until it is closed.
+        '''
+        with _attached_lock:
+            self = _attached.get(name)
+            if self is None:
+                self = cls.__new__(cls)
+                self._shm = _open(name)
+                self._creator = None
+                self._factor = None
+                _attached[name] = self
+        return self
+
+    def __del__(self):
+        # release the factor before the segment it points into, which
+        # cannot be closed while it is exported
+        self._factor = None
+
+    def __reduce__(self):
+        return type(self).attach, (self.name,)
+
+    def __repr__(self):
+        return f'<SharedFactor {self.name!r}, {self.size} bytes>'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        if self._owner:
+            self.unlink()
+
+    @property
+    def _owner(self):
+        # compared with the pid, as forked children inherit the object
+        return self._creator == os.getpid()
+
+    @property
+    def name(self):
+        '''Name of the shared memory segment.'''
+        return self._shm.name
+
+    @property
+    def size(self):
+        '''Size of the segment in bytes.'''
+        return self._shm.size
+
+    @property
+    def factor(self):
+        '''The read-only ``cholmod.Factor`` using the segment in place.'''
+        if self._factor is None:
+            self._factor = cholmod.Factor.from_buffer(self._shm.buf)
+        return self._factor
+
+    def close(self):
+        '''Detach this process from the segment.
+
+        Raises BufferError while a reference to :attr:`factor` is held
+        elsewhere, since the factor points into the segment.
+        '''
+        self._factor = None
+        try:
+            self._shm.close()
+        except BufferError:
+            raise BufferError('the factor of this SharedFactor is still '
+                              'in use') from None
+        with _attached_lock:
+            if _attached.get(self.name) is self:
+                del _attached[self.name]
+
+    def unlink(self):
+        '''Remove the segment, once every process has closed it.
+
+        Only the process that created the segment can remove it.
+        '''
+        if not self._owner:
+            raise ValueError('only the process that created the segment '
+                             'can unlink it')
+        self._shm.unlink()
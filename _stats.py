@@ -0,0 +1,65 @@
+'''Hook receiving the statistics of every ordering and factorization.'''
+
+import logging
+
+from . import _core
+
+
+class _LogStats:
+    '''Stats hook writing one record per call to a logger.'''
+
+    def __init__(self, logger, level):
+        self.logger = logger
+        self.level = level
+
+    def __repr__(self):
+        return f'<stats hook logging to {self.logger!r}>'
+
+    def __call__(self, name, stats):
+        self.logger.log(self.level, '%s %r', name, stats,
+                        extra={'suitesparse_call': name,
+                               'suitesparse_stats': stats})
+
+
+def set_stats_hook(hook, *, level=logging.DEBUG):
+    '''Install a hook called with the statistics of every call.
+
+    After each ordering (``amd.order``, ``camd.order``, ``colamd.colamd``,
+    ``colamd.symamd``, ``ccolamd.ccolamd``, ``ccolamd.csymamd``), each
+    analysis or factorization (``cholmod.Factor`` and its ``factorize``,
+    ``umfpack.LU`` and its ``factorize``, ``spqr.QR`` and its
+    ``factorize``) and each ``spqr.lstsq``, the hook is called as
+    ``hook(name, stats)`` with the name of the call, as just listed, and a
+    dict of its statistics: the dict returned with ``info=True`` by the
+    orderings and ``lstsq``, and the ``stats`` of the object for the
+    factorizations.
+
+    The hook runs in the calling thread, with the GIL held, after
+    SuiteSparse has returned.  Exceptions it raises are reported with
+    ``sys.unraisablehook`` and do not fail the call.  Statistics are only
+    gathered while a hook is installed or ``info=True`` is passed.
+
+    Parameters
+    ----------
+    hook : callable, logging.Logger or None
+        Function of ``(name, stats)``, or a logger that receives one
+        record per call at ``level``, with ``name`` and ``stats`` also in
+        the ``suitesparse_call`` and ``suitesparse_stats`` attributes of
+        the record.  None removes the hook.
+    level : int, optional
+        Logging level of the records, when hook is a logger.
+
+    Returns
+    -------
+    previous : callable or None
+        The hook installed before, which can be passed back to restore it.
+        A logger is returned wrapped in the callable that logs to it.
+    '''
+    if isinstance(hook, logging.Logger):
+        hook = _LogStats(hook, level)
+    return _core._set_stats_hook(hook)
+
+
+def get_stats_hook():
+    '''The hook installed by :func:`set_stats_hook`, or None.'''
+    return _core._get_stats_hook()
@@ -1 +1,155 @@
-void PyInit_amd(void) {}
+/* Python bindings for AMD: approximate minimum degree ordering. */
+
+#include "ss_common.h"
+#include "amd.h"
+
+static int
+check_status(int status)
+{
+    switch (status) {
+    case AMD_OK:
+    case AMD_OK_BUT_JUMBLED:
+        return 0;
+    case AMD_OUT_OF_MEMORY:
+        PyErr_NoMemory();
+        return -1;
+    case AMD_INVALID:
+        PyErr_SetString(PyExc_ValueError, "invalid matrix for amd_order");
+        return -1;
+    default:
+        PyErr_Format(PyExc_RuntimeError, "amd_order failed with status %d",
+                     status);
+        return -1;
+    }
+}
+
+/* Statistics of an ordering, from the Info array of amd_order. */
+static PyObject *
+order_stats(const double Info[AMD_INFO], double time)
+{
+    return Py_BuildValue(
+        "{s:n,s:n,s:d,s:n,s:n,s:n,s:n,s:n,s:n,s:d,s:d,s:d,s:n,s:d}",
+        "n", (Py_ssize_t)Info[AMD_N],
+        "nz", (Py_ssize_t)Info[AMD_NZ],
+        "symmetry", Info[AMD_SYMMETRY],
+        "nzdiag", (Py_ssize_t)Info[AMD_NZDIAG],
+        "nz_a_plus_at", (Py_ssize_t)Info[AMD_NZ_A_PLUS_AT],
+        "ndense", (Py_ssize_t)Info[AMD_NDENSE],
+        "memory", (Py_ssize_t)Info[AMD_MEMORY],
+        "ncmpa", (Py_ssize_t)Info[AMD_NCMPA],
+        "lnz", (Py_ssize_t)Info[AMD_LNZ],
+        "ndiv", Info[AMD_NDIV],
+        "nmultsubs_ldl", Info[AMD_NMULTSUBS_LDL],
+        "nmultsubs_lu", Info[AMD_NMULTSUBS_LU],
+        "dmax", (Py_ssize_t)Info[AMD_DMAX],
+        "time", time);
+}
+
+PyDoc_STRVAR(order_doc,
+"order(A, indices=None, *, dense=10.0, aggressive=True, info=False)\n"
+"--\n\n"
+"Approximate minimum degree ordering of the pattern of A+A'.\n\n"
+"A is a square scipy.sparse CSC or CSR matrix, or the indptr array of\n"
+"one when indices is also given.  The index arrays are used in place:\n"
+"int32 indices call amd_order and int64 indices call amd_l_order.  Only\n"
+"the sparsity pattern is read, and the GIL is released while the ordering\n"
+"runs.\n\n"
+"Returns the permutation P, of the same dtype as the indices, such that\n"
+"A[P][:, P] has less fill-in when factorized.  With info=True, returns\n"
+"(P, info) where info is a dict of the Info array of amd_order:\n\n"
+"n, nz\n"
+"    Order of A and entries in A.\n"
+"symmetry, nzdiag, nz_a_plus_at\n"
+"    Symmetry of the pattern (1 is symmetric), entries on the diagonal\n"
+"    and off-diagonal entries in A+A'.\n"
+"ndense\n"
+"    Dense rows/columns, removed before ordering and placed last.\n"
+"memory, ncmpa\n"
+"    Bytes of workspace used and number of garbage collections.\n"
+"lnz, dmax\n"
+"    Entries in L below the diagonal, and most entries in a column of L\n"
+"    (diagonal included), for a Cholesky factorization of A[P][:, P].\n"
+"ndiv, nmultsubs_ldl, nmultsubs_lu\n"
+"    Divisions and multiply-subtract pairs of that factorization: an\n"
+"    LDL' factorization takes ndiv + 2*nmultsubs_ldl flops.\n"
+"time\n"
+"    Wall-clock seconds of the ordering.\n\n"
+"The same dict is passed to the hook set by suitesparse.set_stats_hook.");
+
+static PyObject *
+order(PyObject *self, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"A", "indices", "dense", "aggressive", "info",
+                             NULL};
+    PyObject *A, *indices = NULL, *stats = NULL;
+    double dense = AMD_DEFAULT_DENSE;
+    int aggressive = AMD_DEFAULT_AGGRESSIVE, info = 0;
+    double Control[AMD_CONTROL], Info[AMD_INFO], time;
+    ss_compressed c;
+    PyArrayObject *perm;
+    npy_intp n;
+    int status;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|O$dpp:order", kwlist,
+                                     &A, &indices, &dense, &aggressive,
+                                     &info)) {
+        return NULL;
+    }
+    if (ss_parse_square(A, indices, &c) < 0) {
+        return NULL;
+    }
+    n = c.ncol;
+    perm = (PyArrayObject *)PyArray_SimpleNew(
+        1, &n, c.is_long ? SS_NPY_LONG : NPY_INT);
+    if (perm == NULL) {
+        ss_compressed_clear(&c);
+        return NULL;
+    }
+
+    amd_defaults(Control);
+    Control[AMD_DENSE] = dense;
+    Control[AMD_AGGRESSIVE] = aggressive;
+    Py_BEGIN_ALLOW_THREADS
+    time = SuiteSparse_time();
+    if (c.is_long) {
+        status = (int)amd_l_order(
+            (SuiteSparse_long)n, PyArray_DATA(c.indptr),
+            PyArray_DATA(c.indices), PyArray_DATA(perm), Control, Info);
+    }
+    else {
+        status = amd_order(
+            (int)n, PyArray_DATA(c.indptr), PyArray_DATA(c.indices),
+            PyArray_DATA(perm), Control, Info);
+    }
+    time = SuiteSparse_time() - time;
+    Py_END_ALLOW_THREADS
+    ss_compressed_clear(&c);
+    if (check_status(status) < 0
+        || (ss_want_stats(info)
+            && (stats = order_stats(Info, time)) == NULL)) {
+        Py_DECREF(perm);
+        return NULL;
+    }
+    return ss_return_stats("amd.order", (PyObject *)perm, stats, info);
+}
+
+static PyMethodDef amd_methods[] = {
+    {"order", (PyCFunction)(void (*)(void))order,
+     METH_VARARGS | METH_KEYWORDS, order_doc},
+    {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef amd_module = {
+    PyModuleDef_HEAD_INIT,
+    "suitesparse.amd",
+    "AMD: approximate minimum degree ordering.",
+    -1,
+    amd_methods,
+};
+
+PyMODINIT_FUNC
+PyInit_amd(void)
+{
+    import_array();
+    return PyModule_Create(&amd_module);
+}
@@ -0,0 +1,63 @@
+'''CHOLMOD analyze, factorize and solve, simplicial and supernodal.
+
+Supernodal times depend on the BLAS the extension is linked against and
+on its thread count, both reported by ``cholmod.blas_info()``.
+'''
+
+import numpy as np
+
+from suitesparse import cholmod
+
+from . import matrices
+
+INDEX = ['int32', 'int64']
+MODE = ['simplicial', 'supernodal']
+
+
+class Cholesky:
+    params = (list(matrices.SPD), INDEX, MODE)
+    param_names = ['matrix', 'index', 'mode']
+    timeout = 300
+
+    def setup(self, matrix, index, mode):
+        self.A = matrices.get(matrix, index)
+        n = self.A.shape[0]
+        rng = np.random.default_rng(0)
+        self.b = rng.standard_normal(n)
+        self.B = np.asfortranarray(rng.standard_normal((n, 16)))
+        self.F = cholmod.Factor(self.A, supernodal=mode)
+        self.F.factorize(self.A)
+
+    def time_analyze(self, matrix, index, mode):
+        cholmod.Factor(self.A, supernodal=mode)
+
+    def time_factorize(self, matrix, index, mode):
+        self.F.factorize(self.A)
+
+    def time_solve(self, matrix, index, mode):
+        self.F.solve(self.b)
+
+    def time_solve_16(self, matrix, index, mode):
+        self.F.solve(self.B)
+
+    def peakmem_factorize(self, matrix, index, mode):
+        F = cholmod.Factor(self.A, supernodal=mode)
+        F.factorize(self.A)
+
+    def track_lnz(self, matrix, index, mode):
+        return self.F.stats['lnz']
+    track_lnz.unit = 'nonzeros'
+
+    def track_flops(self, matrix, index, mode):
+        return self.F.stats['flops']
+    track_flops.unit = 'flops'
+
+    def track_factor_bytes(self, matrix, index, mode):
+        return self.F.nbytes
+    track_factor_bytes.unit = 'bytes'
+
+    def track_peak_bytes(self, matrix, index, mode):
+        F = cholmod.Factor(self.A, supernodal=mode)
+        F.factorize(self.A)
+        return F.memory['peak']
+    track_peak_bytes.unit = 'bytes'
@@ -0,0 +1,77 @@
+'''Fill-reducing orderings: time, and the fill and flops they lead to.
+
+The fill of every ordering is measured the same way: CHOLMOD analyzes the
+matrix with the ordering as a given permutation and reports the entries
+of L and the flops of the factorization.
+'''
+
+from suitesparse import amd, camd, ccolamd, cholmod, colamd
+
+from . import matrices
+
+INDEX = ['int32', 'int64']
+
+SYMMETRIC_METHODS = {
+    'amd': amd.order,
+    'camd': camd.order,
+    'symamd': colamd.symamd,
+    'csymamd': ccolamd.csymamd,
+    'colamd': colamd.colamd,
+    'ccolamd': ccolamd.ccolamd,
+}
+
+COLUMN_METHODS = {
+    'colamd': colamd.colamd,
+    'ccolamd': ccolamd.ccolamd,
+}
+
+
+def _analyze(A, perm):
+    return cholmod.Factor(A, ordering='given', perm=perm).stats
+
+
+class SymmetricOrdering:
+    '''Orderings of symmetric matrices for a Cholesky factorization.
+
+    COLAMD and CCOLAMD order the columns of A for A'A; they are included
+    to compare against the symmetric methods on the same matrices.
+    '''
+    params = (list(matrices.SYMMETRIC), INDEX, list(SYMMETRIC_METHODS))
+    param_names = ['matrix', 'index', 'method']
+    timeout = 300
+
+    def setup(self, matrix, index, method):
+        self.A = matrices.get(matrix, index)
+        self.order = SYMMETRIC_METHODS[method]
+        self.perm = self.order(self.A)
+
+    def time_order(self, matrix, index, method):
+        self.order(self.A)
+
+    def track_lnz(self, matrix, index, method):
+        return _analyze(self.A, self.perm)['lnz']
+    track_lnz.unit = 'nonzeros'
+
+    def track_flops(self, matrix, index, method):
+        return _analyze(self.A, self.perm)['flops']
+    track_flops.unit = 'flops'
+
+
+class ColumnOrdering:
+    '''Column orderings of rectangular matrices, for a Cholesky
+    factorization of A'A or an LU factorization of A.'''
+    params = (list(matrices.RECTANGULAR), INDEX, list(COLUMN_METHODS))
+    param_names = ['matrix', 'index', 'method']
+    timeout = 300
+
+    def setup(self, matrix, index, method):
+        self.A = matrices.get(matrix, index)
+        self.order = COLUMN_METHODS[method]
+        self.perm = self.order(self.A)
+
+    def time_order(self, matrix, index, method):
+        self.order(self.A)
+
+    def track_lnz(self, matrix, index, method):
+        return _analyze((self.A.T @ self.A).tocsc(), self.perm)['lnz']
+    track_lnz.unit = 'nonzeros'
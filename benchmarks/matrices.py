@@ -0,0 +1,94 @@
+'''Generated matrix corpus shared by the benchmarks.
+
+Every matrix is deterministic, CSC with sorted indices, and built once per
+process.  ``get(name, index)`` returns it with int32 or int64 index arrays,
+which select the int or SuiteSparse_long flavour of each library.
+'''
+
+import functools
+
+import numpy as np
+import scipy.sparse as sp
+
+
+def laplacian_2d(k):
+    '''5-point Laplacian on a k-by-k grid, SPD of order k**2.'''
+    T = sp.diags([-1.0, 2.0, -1.0], [-1, 0, 1], shape=(k, k))
+    I = sp.eye(k)
+    return sp.kron(T, I) + sp.kron(I, T)
+
+
+def laplacian_3d(k):
+    '''7-point Laplacian on a k-by-k-by-k grid, SPD of order k**3.'''
+    T = sp.diags([-1.0, 2.0, -1.0], [-1, 0, 1], shape=(k, k))
+    I = sp.eye(k)
+    return (sp.kron(sp.kron(T, I), I) + sp.kron(sp.kron(I, T), I)
+            + sp.kron(sp.kron(I, I), T))
+
+
+def banded(n, bandwidth, density, seed=0):
+    '''Random symmetric matrix whose off-diagonals within ``bandwidth`` of
+    the diagonal are filled with probability ``density``, made SPD by
+    diagonal dominance.'''
+    rng = np.random.default_rng(seed)
+    offsets = np.arange(1, bandwidth + 1)
+    diagonals = [rng.standard_normal(n - k) * (rng.random(n - k) < density)
+                 for k in offsets]
+    B = sp.diags(diagonals, offsets, shape=(n, n))
+    S = B + B.T
+    return S + sp.diags(np.asarray(abs(S).sum(axis=1)).ravel() + 1.0)
+
+
+def lp_constraints(m, n, per_column=4, seed=0):
+    '''Random m-by-n LP constraint matrix, n > m, with ``per_column``
+    entries in each column and an identity block for the slacks.'''
+    rng = np.random.default_rng(seed)
+    rows = np.concatenate([rng.choice(m, per_column, replace=False)
+                           for _ in range(n - m)])
+    cols = np.repeat(np.arange(n - m), per_column)
+    vals = rng.standard_normal(rows.size)
+    A = sp.coo_matrix((vals, (rows, cols)), shape=(m, n - m))
+    return sp.hstack([A, sp.eye(m)], format='csc')
+
+
+def kkt(n, m, seed=0):
+    '''Quasi-definite KKT matrix [[H, A'], [A, -delta*I]] of an equality
+    constrained QP, with H SPD of order n and A m-by-n.'''
+    H = banded(n, 5, 0.05, seed)
+    A = lp_constraints(m, n, seed=seed)[:, :n]
+    return sp.bmat([[H, A.T], [A, -1e-8 * sp.eye(m)]])
+
+
+def lp_normal(m, n, seed=0):
+    '''Normal equations A A' + delta*I of an interior-point LP step.'''
+    A = lp_constraints(m, n, seed=seed)
+    return A @ A.T + 1e-8 * sp.eye(m)
+
+
+#: Symmetric positive definite matrices, for Cholesky factorization.
+SPD = {
+    'lap2d': lambda: laplacian_2d(150),
+    'lap3d': lambda: laplacian_3d(25),
+    'banded': lambda: banded(20000, 100, 0.1),
+    'lp_normal': lambda: lp_normal(2500, 7500),
+}
+
+#: Symmetric matrices to order: the SPD ones and an indefinite KKT system.
+SYMMETRIC = dict(SPD, kkt=lambda: kkt(15000, 5000))
+
+#: Rectangular matrices, ordered by column.
+RECTANGULAR = {
+    'lp': lambda: lp_constraints(10000, 30000),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def get(name, index='int32'):
+    '''Matrix ``name`` of the corpus as CSC with ``index`` index arrays.'''
+    make = {**SYMMETRIC, **RECTANGULAR}[name]
+    A = sp.csc_matrix(make())
+    A.sum_duplicates()
+    A.sort_indices()
+    A.indptr = A.indptr.astype(index)
+    A.indices = A.indices.astype(index)
+    return A
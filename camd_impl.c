@@ -1 +1,159 @@
-void PyInit_camd(void) {}
+/* Python bindings for CAMD: constrained approximate minimum degree ordering. */
+
+#include "ss_common.h"
+#include "camd.h"
+
+static int
+check_status(int status)
+{
+    switch (status) {
+    case CAMD_OK:
+    case CAMD_OK_BUT_JUMBLED:
+        return 0;
+    case CAMD_OUT_OF_MEMORY:
+        PyErr_NoMemory();
+        return -1;
+    case CAMD_INVALID:
+        PyErr_SetString(PyExc_ValueError,
+                        "invalid matrix or constraints for camd_order");
+        return -1;
+    default:
+        PyErr_Format(PyExc_RuntimeError, "camd_order failed with status %d",
+                     status);
+        return -1;
+    }
+}
+
+/* Statistics of an ordering, from the Info array of camd_order. */
+static PyObject *
+order_stats(const double Info[CAMD_INFO], double time)
+{
+    return Py_BuildValue(
+        "{s:n,s:n,s:d,s:n,s:n,s:n,s:n,s:n,s:n,s:d,s:d,s:d,s:n,s:d}",
+        "n", (Py_ssize_t)Info[CAMD_N],
+        "nz", (Py_ssize_t)Info[CAMD_NZ],
+        "symmetry", Info[CAMD_SYMMETRY],
+        "nzdiag", (Py_ssize_t)Info[CAMD_NZDIAG],
+        "nz_a_plus_at", (Py_ssize_t)Info[CAMD_NZ_A_PLUS_AT],
+        "ndense", (Py_ssize_t)Info[CAMD_NDENSE],
+        "memory", (Py_ssize_t)Info[CAMD_MEMORY],
+        "ncmpa", (Py_ssize_t)Info[CAMD_NCMPA],
+        "lnz", (Py_ssize_t)Info[CAMD_LNZ],
+        "ndiv", Info[CAMD_NDIV],
+        "nmultsubs_ldl", Info[CAMD_NMULTSUBS_LDL],
+        "nmultsubs_lu", Info[CAMD_NMULTSUBS_LU],
+        "dmax", (Py_ssize_t)Info[CAMD_DMAX],
+        "time", time);
+}
+
+PyDoc_STRVAR(order_doc,
+"order(A, indices=None, *, C=None, dense=10.0, aggressive=True,\n"
+"      info=False)\n"
+"--\n\n"
+"Constrained approximate minimum degree ordering of the pattern of A+A'.\n\n"
+"A is a square scipy.sparse CSC or CSR matrix, or the indptr array of\n"
+"one when indices is also given.  The index arrays are used in place:\n"
+"int32 indices call camd_order and int64 indices call camd_l_order.  The\n"
+"GIL is released while the ordering runs.\n\n"
+"C, if given, assigns each row/column to a constraint set in the range\n"
+"0 to n-1.  All nodes in set 0 are ordered first, then set 1, and so on.\n\n"
+"Returns the permutation P, of the same dtype as the indices.  With\n"
+"info=True, returns (P, info) where info is a dict of the Info array of\n"
+"camd_order, with the keys described in suitesparse.amd.order.");
+
+static PyObject *
+order(PyObject *self, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"A", "indices", "C", "dense", "aggressive",
+                             "info", NULL};
+    PyObject *A, *indices = NULL, *Cobj = Py_None, *stats = NULL;
+    PyArrayObject *C = NULL, *perm;
+    double dense = CAMD_DEFAULT_DENSE;
+    int aggressive = CAMD_DEFAULT_AGGRESSIVE, info = 0;
+    double Control[CAMD_CONTROL], Info[CAMD_INFO], time;
+    ss_compressed c;
+    npy_intp n;
+    int status;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|O$Odpp:order", kwlist,
+                                     &A, &indices, &Cobj, &dense,
+                                     &aggressive, &info)) {
+        return NULL;
+    }
+    if (ss_parse_square(A, indices, &c) < 0) {
+        return NULL;
+    }
+    n = c.ncol;
+    if (Cobj != Py_None) {
+        C = ss_index_array_cast(Cobj, c.is_long ? SS_NPY_LONG : NPY_INT,
+                                "C");
+        if (C == NULL) {
+            ss_compressed_clear(&c);
+            return NULL;
+        }
+        if (PyArray_DIM(C, 0) != n) {
+            PyErr_Format(PyExc_ValueError, "C must have length %zd",
+                         (Py_ssize_t)n);
+            Py_DECREF(C);
+            ss_compressed_clear(&c);
+            return NULL;
+        }
+    }
+    perm = (PyArrayObject *)PyArray_SimpleNew(
+        1, &n, c.is_long ? SS_NPY_LONG : NPY_INT);
+    if (perm == NULL) {
+        Py_XDECREF(C);
+        ss_compressed_clear(&c);
+        return NULL;
+    }
+
+    camd_defaults(Control);
+    Control[CAMD_DENSE] = dense;
+    Control[CAMD_AGGRESSIVE] = aggressive;
+    Py_BEGIN_ALLOW_THREADS
+    time = SuiteSparse_time();
+    if (c.is_long) {
+        status = (int)camd_l_order(
+            (SuiteSparse_long)n, PyArray_DATA(c.indptr),
+            PyArray_DATA(c.indices), PyArray_DATA(perm), Control, Info,
+            C == NULL ? NULL : PyArray_DATA(C));
+    }
+    else {
+        status = camd_order(
+            (int)n, PyArray_DATA(c.indptr), PyArray_DATA(c.indices),
+            PyArray_DATA(perm), Control, Info,
+            C == NULL ? NULL : PyArray_DATA(C));
+    }
+    time = SuiteSparse_time() - time;
+    Py_END_ALLOW_THREADS
+    Py_XDECREF(C);
+    ss_compressed_clear(&c);
+    if (check_status(status) < 0
+        || (ss_want_stats(info)
+            && (stats = order_stats(Info, time)) == NULL)) {
+        Py_DECREF(perm);
+        return NULL;
+    }
+    return ss_return_stats("camd.order", (PyObject *)perm, stats, info);
+}
+
+static PyMethodDef camd_methods[] = {
+    {"order", (PyCFunction)(void (*)(void))order,
+     METH_VARARGS | METH_KEYWORDS, order_doc},
+    {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef camd_module = {
+    PyModuleDef_HEAD_INIT,
+    "suitesparse.camd",
+    "CAMD: constrained approximate minimum degree ordering.",
+    -1,
+    camd_methods,
+};
+
+PyMODINIT_FUNC
+PyInit_camd(void)
+{
+    import_array();
+    return PyModule_Create(&camd_module);
+}
@@ -1 +1,625 @@
-void PyInit_ccolamd(void) {}
+/* Python bindings for CCOLAMD and CSYMAMD: constrained column approximate
+ * minimum degree ordering, and the elimination tree of the ordered matrix. */
+
+#include <stdlib.h>
+#include <string.h>
+
+#include "ss_common.h"
+#include "ccolamd.h"
+
+static int
+check_status(const char *name, npy_intp status)
+{
+    if (status >= CCOLAMD_OK) {
+        return 0;
+    }
+    if (status == CCOLAMD_ERROR_out_of_memory) {
+        PyErr_NoMemory();
+        return -1;
+    }
+    if (status == CCOLAMD_ERROR_invalid_cmember) {
+        PyErr_Format(PyExc_ValueError,
+                     "%s: cmember must hold constraint sets in the range 0 "
+                     "to n-1", name);
+        return -1;
+    }
+    PyErr_Format(PyExc_ValueError, "%s failed with status %zd", name,
+                 (Py_ssize_t)status);
+    return -1;
+}
+
+static void
+set_knobs(double knobs[CCOLAMD_KNOBS], int is_long, double dense_row,
+          double dense_col, int aggressive, int lu)
+{
+    if (is_long) {
+        ccolamd_l_set_defaults(knobs);
+    }
+    else {
+        ccolamd_set_defaults(knobs);
+    }
+    knobs[CCOLAMD_DENSE_ROW] = dense_row;
+    knobs[CCOLAMD_DENSE_COL] = dense_col;
+    knobs[CCOLAMD_AGGRESSIVE] = aggressive;
+    knobs[CCOLAMD_LU] = lu;
+}
+
+/* Statistics of an ordering of an n_row-by-n_col matrix with nnz entries,
+ * from the stats array of ccolamd or csymamd. */
+static PyObject *
+order_stats(const npy_intp stats[CCOLAMD_STATS], npy_intp n_row,
+            npy_intp n_col, npy_intp nnz, double time)
+{
+    return Py_BuildValue(
+        "{s:n,s:n,s:n,s:n,s:n,s:n,s:O,s:d}",
+        "n_row", (Py_ssize_t)n_row,
+        "n_col", (Py_ssize_t)n_col,
+        "nnz", (Py_ssize_t)nnz,
+        "dense_row", (Py_ssize_t)stats[CCOLAMD_DENSE_ROW],
+        "dense_col", (Py_ssize_t)stats[CCOLAMD_DENSE_COL],
+        "defrag_count", (Py_ssize_t)stats[CCOLAMD_DEFRAG_COUNT],
+        "jumbled", stats[CCOLAMD_STATUS] == CCOLAMD_OK_BUT_JUMBLED
+                   ? Py_True : Py_False,
+        "time", time);
+}
+
+/* Index array of length n, cast to ``typenum``, of the optional argument
+ * ``name``.  Sets *out to NULL when obj is None. */
+static int
+parse_index_arg(PyObject *obj, npy_intp n, int typenum, const char *name,
+                PyArrayObject **out)
+{
+    *out = NULL;
+    if (obj == Py_None) {
+        return 0;
+    }
+    *out = ss_index_array_cast(obj, typenum, name);
+    if (*out == NULL) {
+        return -1;
+    }
+    if (PyArray_DIM(*out, 0) != n) {
+        PyErr_Format(PyExc_ValueError, "%s must have length %zd", name,
+                     (Py_ssize_t)n);
+        Py_CLEAR(*out);
+        return -1;
+    }
+    return 0;
+}
+
+SS_DEFINE_FILL_WORKSPACE(fill_workspace, int)
+SS_DEFINE_FILL_WORKSPACE(fill_workspace_l, SuiteSparse_long)
+
+PyDoc_STRVAR(ccolamd_doc,
+"ccolamd(A, indices=None, *, cmember=None, n_row=None, dense_row=10.0,\n"
+"        dense_col=10.0, aggressive=True, lu=False, info=False)\n"
+"--\n\n"
+"Constrained column approximate minimum degree ordering of A, for a\n"
+"Cholesky factorization of A'A or an LU factorization of A.\n\n"
+"A is a scipy.sparse CSC or CSR matrix, or the indptr array of a CSC\n"
+"matrix when indices is also given (n_row then defaults to the number of\n"
+"columns).  int32 indices call ccolamd and int64 indices call ccolamd_l.\n"
+"The GIL is released while the ordering runs.\n\n"
+"cmember, if given, assigns each column to a constraint set in the range\n"
+"0 to n_col-1.  All columns in set 0 are ordered first, then set 1, and\n"
+"so on.  lu=True optimizes the ordering for LU instead of Cholesky\n"
+"factorization.\n\n"
+"Returns the column permutation.  With info=True, returns (perm, info)\n"
+"where info is a dict of the stats array of ccolamd, with the keys\n"
+"described in suitesparse.colamd.colamd.");
+
+static PyObject *
+ccolamd_py(PyObject *self, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"A", "indices", "cmember", "n_row", "dense_row",
+                             "dense_col", "aggressive", "lu", "info", NULL};
+    PyObject *A, *indices = NULL, *cmember_obj = Py_None;
+    PyObject *n_row_obj = Py_None, *stats = NULL;
+    PyArrayObject *cmember = NULL, *work, *perm, *result;
+    double dense_row = 10.0, dense_col = 10.0, time;
+    int aggressive = 1, lu = 0, typenum, info = 0, k, fill;
+    double knobs[CCOLAMD_KNOBS];
+    npy_intp n_row, n_col, len, st[CCOLAMD_STATS];
+    size_t alen;
+    ss_compressed c;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|O$OOddppp:ccolamd",
+                                     kwlist, &A, &indices, &cmember_obj,
+                                     &n_row_obj, &dense_row, &dense_col,
+                                     &aggressive, &lu, &info)) {
+        return NULL;
+    }
+    if (ss_parse_compressed(A, indices, &c) < 0) {
+        return NULL;
+    }
+    /* dimensions of A itself, not of the compressed view */
+    n_row = c.is_csr ? c.ncol : c.nrow;
+    n_col = c.is_csr ? c.nrow : c.ncol;
+    if (n_row_obj != Py_None) {
+        if (c.is_csr || (indices == NULL || indices == Py_None)) {
+            PyErr_SetString(PyExc_TypeError,
+                            "n_row is only used with indptr/indices input");
+            ss_compressed_clear(&c);
+            return NULL;
+        }
+        n_row = PyLong_AsSsize_t(n_row_obj);
+        if (n_row == -1 && PyErr_Occurred()) {
+            ss_compressed_clear(&c);
+            return NULL;
+        }
+    }
+    typenum = c.is_long ? SS_NPY_LONG : NPY_INT;
+    if (parse_index_arg(cmember_obj, n_col, typenum, "cmember",
+                        &cmember) < 0) {
+        ss_compressed_clear(&c);
+        return NULL;
+    }
+    alen = c.is_long
+        ? ccolamd_l_recommended((SuiteSparse_long)c.nnz,
+                                (SuiteSparse_long)n_row,
+                                (SuiteSparse_long)n_col)
+        : ccolamd_recommended((int)c.nnz, (int)n_row, (int)n_col);
+    if (alen == 0) {
+        PyErr_SetString(PyExc_ValueError, "invalid or too large problem size");
+        Py_XDECREF(cmember);
+        ss_compressed_clear(&c);
+        return NULL;
+    }
+
+    /* CCOLAMD overwrites its input: the row indices go to a workspace */
+    len = (npy_intp)alen;
+    work = (PyArrayObject *)PyArray_SimpleNew(1, &len, typenum);
+    len = n_col + 1;
+    perm = (PyArrayObject *)PyArray_SimpleNew(1, &len, typenum);
+    if (work == NULL || perm == NULL) {
+        Py_XDECREF(work);
+        Py_XDECREF(perm);
+        Py_XDECREF(cmember);
+        ss_compressed_clear(&c);
+        return NULL;
+    }
+
+    set_knobs(knobs, c.is_long, dense_row, dense_col, aggressive, lu);
+    len = PyArray_DIM(work, 0);
+    Py_BEGIN_ALLOW_THREADS
+    time = SuiteSparse_time();
+    if (c.is_long) {
+        SuiteSparse_long stats[CCOLAMD_STATS];
+        fill = fill_workspace_l(&c, PyArray_DATA(work),
+                                PyArray_DATA(perm));
+        if (fill == 0) {
+            ccolamd_l((SuiteSparse_long)n_row, (SuiteSparse_long)n_col,
+                      (SuiteSparse_long)len, PyArray_DATA(work),
+                      PyArray_DATA(perm), knobs, stats,
+                      cmember == NULL ? NULL : PyArray_DATA(cmember));
+            for (k = 0; k < CCOLAMD_STATS; k++) {
+                st[k] = (npy_intp)stats[k];
+            }
+        }
+    }
+    else {
+        int stats[CCOLAMD_STATS];
+        fill = fill_workspace(&c, PyArray_DATA(work), PyArray_DATA(perm));
+        if (fill == 0) {
+            ccolamd((int)n_row, (int)n_col, (int)len, PyArray_DATA(work),
+                    PyArray_DATA(perm), knobs, stats,
+                    cmember == NULL ? NULL : PyArray_DATA(cmember));
+            for (k = 0; k < CCOLAMD_STATS; k++) {
+                st[k] = (npy_intp)stats[k];
+            }
+        }
+    }
+    time = SuiteSparse_time() - time;
+    Py_END_ALLOW_THREADS
+    Py_DECREF(work);
+    Py_XDECREF(cmember);
+    ss_compressed_clear(&c);
+    if (fill != 0) {
+        ss_bad_csr(fill);
+        Py_DECREF(perm);
+        return NULL;
+    }
+    if (check_status("ccolamd", st[CCOLAMD_STATUS]) < 0
+        || (ss_want_stats(info)
+            && (stats = order_stats(st, n_row, n_col, c.nnz, time))
+               == NULL)) {
+        Py_DECREF(perm);
+        return NULL;
+    }
+    /* the last entry of p is workspace, drop it from the result */
+    result = (PyArrayObject *)PySequence_GetSlice((PyObject *)perm, 0, n_col);
+    Py_DECREF(perm);
+    if (result == NULL) {
+        Py_XDECREF(stats);
+        return NULL;
+    }
+    return ss_return_stats("ccolamd.ccolamd", (PyObject *)result, stats,
+                           info);
+}
+
+PyDoc_STRVAR(csymamd_doc,
+"csymamd(A, indices=None, *, cmember=None, dense=10.0, aggressive=True,\n"
+"        info=False)\n"
+"--\n\n"
+"Constrained approximate minimum degree ordering of the pattern of A+A'.\n\n"
+"A is a square scipy.sparse CSC or CSR matrix, or the indptr array of\n"
+"one when indices is also given.  The index arrays are used in place:\n"
+"int32 indices call csymamd and int64 indices call csymamd_l.  The GIL is\n"
+"released while the ordering runs.\n\n"
+"cmember, if given, assigns each row/column to a constraint set in the\n"
+"range 0 to n-1.  All nodes in set 0 are ordered first, then set 1, and\n"
+"so on.\n\n"
+"Returns the permutation.  With info=True, returns (perm, info) where\n"
+"info is a dict of the stats array of csymamd, with the keys described in\n"
+"suitesparse.colamd.colamd.");
+
+static PyObject *
+csymamd_py(PyObject *self, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"A", "indices", "cmember", "dense",
+                             "aggressive", "info", NULL};
+    PyObject *A, *indices = NULL, *cmember_obj = Py_None, *stats = NULL;
+    PyArrayObject *cmember = NULL, *perm, *result;
+    double dense = 10.0, time;
+    int aggressive = 1, typenum, info = 0, k;
+    double knobs[CCOLAMD_KNOBS];
+    npy_intp n, len, st[CCOLAMD_STATS];
+    ss_compressed c;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|O$Odpp:csymamd", kwlist,
+                                     &A, &indices, &cmember_obj, &dense,
+                                     &aggressive, &info)) {
+        return NULL;
+    }
+    if (ss_parse_square(A, indices, &c) < 0) {
+        return NULL;
+    }
+    n = c.ncol;
+    typenum = c.is_long ? SS_NPY_LONG : NPY_INT;
+    if (parse_index_arg(cmember_obj, n, typenum, "cmember", &cmember) < 0) {
+        ss_compressed_clear(&c);
+        return NULL;
+    }
+    len = n + 1;
+    perm = (PyArrayObject *)PyArray_SimpleNew(1, &len, typenum);
+    if (perm == NULL) {
+        Py_XDECREF(cmember);
+        ss_compressed_clear(&c);
+        return NULL;
+    }
+
+    set_knobs(knobs, c.is_long, dense, dense, aggressive, 0);
+    Py_BEGIN_ALLOW_THREADS
+    time = SuiteSparse_time();
+    /* stype 0: order the pattern of A+A', as symamd does */
+    if (c.is_long) {
+        SuiteSparse_long stats[CCOLAMD_STATS];
+        csymamd_l((SuiteSparse_long)n, PyArray_DATA(c.indices),
+                  PyArray_DATA(c.indptr), PyArray_DATA(perm), knobs, stats,
+                  SuiteSparse_calloc, ss_free,
+                  cmember == NULL ? NULL : PyArray_DATA(cmember), 0);
+        for (k = 0; k < CCOLAMD_STATS; k++) {
+            st[k] = (npy_intp)stats[k];
+        }
+    }
+    else {
+        int stats[CCOLAMD_STATS];
+        csymamd((int)n, PyArray_DATA(c.indices), PyArray_DATA(c.indptr),
+                PyArray_DATA(perm), knobs, stats, SuiteSparse_calloc, ss_free,
+                cmember == NULL ? NULL : PyArray_DATA(cmember), 0);
+        for (k = 0; k < CCOLAMD_STATS; k++) {
+            st[k] = (npy_intp)stats[k];
+        }
+    }
+    time = SuiteSparse_time() - time;
+    Py_END_ALLOW_THREADS
+    Py_XDECREF(cmember);
+    ss_compressed_clear(&c);
+    if (check_status("csymamd", st[CCOLAMD_STATUS]) < 0
+        || (ss_want_stats(info)
+            && (stats = order_stats(st, n, n, c.nnz, time)) == NULL)) {
+        Py_DECREF(perm);
+        return NULL;
+    }
+    result = (PyArrayObject *)PySequence_GetSlice((PyObject *)perm, 0, n);
+    Py_DECREF(perm);
+    if (result == NULL) {
+        Py_XDECREF(stats);
+        return NULL;
+    }
+    return ss_return_stats("ccolamd.csymamd", (PyObject *)result, stats,
+                           info);
+}
+
+/* Elimination tree of the matrix whose columns are those of the
+ * compressed-column view taken in the order ``perm``: of the pattern of
+ * P(A+A')P' for a square matrix, or of (AP)'(AP) when ``column`` is set.
+ * Nodes are numbered in the permuted order.  Children are postordered with
+ * each constraint set kept contiguous: an edge between nodes of different
+ * sets of ``cmember`` (indexed by original column) is not followed, and the
+ * resulting trees are visited in increasing order of their roots.  That is
+ * a topological order of the tree, so it leaves the fill unchanged.
+ * Returns 0, SS_BAD_INDPTR or SS_BAD_INDEX for invalid input, or -1 if out
+ * of memory (no exception is set). */
+#define DEFINE_ETREE(NAME, Int)                                              \
+static int                                                                  \
+NAME(const ss_compressed *c, int column, const Int *perm,                    \
+     const Int *cmember, Int *parent, Int *post)                             \
+{                                                                            \
+    const Int *Ap = PyArray_DATA(c->indptr);                                 \
+    const Int *Ai = PyArray_DATA(c->indices);                                \
+    Int n = column ? (Int)(c->is_csr ? c->nrow : c->ncol) : (Int)c->ncol;    \
+    Int m = (Int)(column ? (c->is_csr ? c->ncol : c->nrow) : c->ncol);       \
+    Int nmajor = (Int)c->ncol, nnz = Ap[nmajor];                             \
+    Int *pinv, *ancestor, *prev, *Lp, *Li, *head, *next, *stack;             \
+    Int i, j, k, p, r, top, inext;                                           \
+                                                                             \
+    /* the indices are used as offsets below */                              \
+    for (j = 0; j < nmajor; j++) {                                           \
+        if (Ap[j] > Ap[j + 1]) {                                             \
+            return SS_BAD_INDPTR;                                            \
+        }                                                                    \
+    }                                                                        \
+    for (p = 0; p < nnz; p++) {                                              \
+        if (Ai[p] < 0 || Ai[p] >= (Int)c->nrow) {                            \
+            return SS_BAD_INDEX;                                             \
+        }                                                                    \
+    }                                                                        \
+    pinv = malloc(((size_t)3 * n + 2 + m) * sizeof(Int));                    \
+    Li = malloc(((size_t)nnz + 1) * sizeof(Int));                            \
+    if (pinv == NULL || Li == NULL) {                                        \
+        free(pinv);                                                          \
+        free(Li);                                                            \
+        return -1;                                                           \
+    }                                                                        \
+    ancestor = pinv + n;                                                     \
+    Lp = ancestor + n;              /* n + 2 entries */                      \
+    prev = Lp + n + 2;              /* m entries */                          \
+    for (k = 0; k < n; k++) {                                                \
+        pinv[perm == NULL ? k : perm[k]] = k;                                \
+    }                                                                        \
+                                                                             \
+    /* Li[Lp[k]:Lp[k+1]] lists the entries of permuted column k: the rows   \
+     * of A in the column case, else the neighbours of k numbered below k */ \
+    memset(Lp, 0, ((size_t)n + 2) * sizeof(Int));                            \
+    for (j = 0; j < nmajor; j++) {                                           \
+        for (p = Ap[j]; p < Ap[j + 1]; p++) {                                \
+            i = Ai[p];                                                       \
+            if (column) {                                                    \
+                Lp[pinv[c->is_csr ? i : j] + 2]++;                           \
+            }                                                                \
+            else if (pinv[i] != pinv[j]) {                                   \
+                Lp[(pinv[i] > pinv[j] ? pinv[i] : pinv[j]) + 2]++;           \
+            }                                                                \
+        }                                                                    \
+    }                                                                        \
+    for (k = 0; k < n; k++) {                                                \
+        Lp[k + 2] += Lp[k + 1];                                              \
+    }                                                                        \
+    for (j = 0; j < nmajor; j++) {                                           \
+        for (p = Ap[j]; p < Ap[j + 1]; p++) {                                \
+            i = Ai[p];                                                       \
+            if (column) {                                                    \
+                k = c->is_csr ? pinv[i] : pinv[j];                           \
+                Li[Lp[k + 1]++] = c->is_csr ? j : i;                         \
+            }                                                                \
+            else if (pinv[i] != pinv[j]) {                                   \
+                k = pinv[i] > pinv[j] ? pinv[i] : pinv[j];                   \
+                Li[Lp[k + 1]++] = pinv[i] < pinv[j] ? pinv[i] : pinv[j];     \
+            }                                                                \
+        }                                                                    \
+    }                                                                        \
+                                                                             \
+    /* Liu's algorithm with path compression, as cs_etree */                 \
+    for (i = 0; i < m; i++) {                                                \
+        prev[i] = -1;                                                        \
+    }                                                                        \
+    for (k = 0; k < n; k++) {                                                \
+        parent[k] = -1;                                                      \
+        ancestor[k] = -1;                                                    \
+        for (p = Lp[k]; p < Lp[k + 1]; p++) {                                \
+            for (i = column ? prev[Li[p]] : Li[p]; i != -1 && i < k;         \
+                 i = inext) {                                                \
+                inext = ancestor[i];                                         \
+                ancestor[i] = k;                                             \
+                if (inext == -1) {                                           \
+                    parent[i] = k;                                           \
+                }                                                            \
+            }                                                                \
+            if (column) {                                                    \
+                prev[Li[p]] = k;                                             \
+            }                                                                \
+        }                                                                    \
+    }                                                                        \
+                                                                             \
+    /* child lists in increasing order, then a depth-first search */         \
+    head = pinv;                                                             \
+    next = ancestor;                                                         \
+    stack = Lp;                                                              \
+    for (k = 0; k < n; k++) {                                                \
+        head[k] = -1;                                                        \
+    }                                                                        \
+    for (j = n - 1; j >= 0; j--) {                                           \
+        r = parent[j];                                                       \
+        if (r != -1 && (cmember == NULL                                      \
+                        || cmember[perm == NULL ? r : perm[r]]               \
+                           == cmember[perm == NULL ? j : perm[j]])) {        \
+            next[j] = head[r];                                               \
+            head[r] = j;                                                     \
+        }                                                                    \
+    }                                                                        \
+    k = 0;                                                                   \
+    for (j = 0; j < n; j++) {                                                \
+        r = parent[j];                                                       \
+        if (r != -1 && (cmember == NULL                                      \
+                        || cmember[perm == NULL ? r : perm[r]]               \
+                           == cmember[perm == NULL ? j : perm[j]])) {        \
+            continue;                                                        \
+        }                                                                    \
+        stack[0] = j;                                                        \
+        top = 0;                                                             \
+        while (top >= 0) {                                                   \
+            p = stack[top];                                                  \
+            i = head[p];                                                     \
+            if (i == -1) {                                                   \
+                top--;                                                       \
+                post[k++] = p;                                               \
+            }                                                                \
+            else {                                                           \
+                head[p] = next[i];                                           \
+                stack[++top] = i;                                            \
+            }                                                                \
+        }                                                                    \
+    }                                                                        \
+    free(pinv);                                                              \
+    free(Li);                                                                \
+    return 0;                                                                \
+}
+
+DEFINE_ETREE(etree_int, int)
+DEFINE_ETREE(etree_long, SuiteSparse_long)
+
+/* Check that perm is a permutation of 0..n-1. */
+static int
+check_perm(PyArrayObject *perm, int is_long)
+{
+    npy_intp n = PyArray_DIM(perm, 0), k, i;
+    char *seen = calloc((size_t)n + 1, 1);
+
+    if (seen == NULL) {
+        PyErr_NoMemory();
+        return -1;
+    }
+    for (k = 0; k < n; k++) {
+        i = ss_index_at(perm, k, is_long);
+        if (i < 0 || i >= n || seen[i]) {
+            free(seen);
+            PyErr_SetString(PyExc_ValueError, "perm is not a permutation");
+            return -1;
+        }
+        seen[i] = 1;
+    }
+    free(seen);
+    return 0;
+}
+
+PyDoc_STRVAR(etree_doc,
+"etree(A, indices=None, *, perm=None, cmember=None, column=False)\n"
+"--\n\n"
+"Elimination tree of a matrix ordered by perm, and a postorder of it that\n"
+"respects constraint sets.\n\n"
+"A is a scipy.sparse CSC or CSR matrix, or the indptr array of a square\n"
+"CSC matrix when indices is also given.  The tree is that of the\n"
+"Cholesky factor of the pattern of P(A+A')P', or of (AP)'(AP) with\n"
+"column=True, where P is the permutation perm (by default the identity)\n"
+"as returned by csymamd and ccolamd, or camd and colamd.  The GIL is\n"
+"released while the tree is computed.\n\n"
+"cmember, if given, is the array of constraint sets the ordering was\n"
+"computed with, indexed by original row/column.  The postorder then\n"
+"keeps the nodes of each set contiguous and the sets in increasing\n"
+"order, so that ``perm[post]`` still honours the constraints.\n\n"
+"Returns (parent, post), arrays of the dtype of the indices.  Nodes are\n"
+"numbered in the permuted order: parent[k] is the parent of node k, or -1\n"
+"for a root, and post lists the nodes in postorder.  ``perm[post]`` is an\n"
+"ordering with the same fill as perm, in which every subtree is\n"
+"numbered contiguously.");
+
+static PyObject *
+etree_py(PyObject *self, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"A", "indices", "perm", "cmember", "column",
+                             NULL};
+    PyObject *A, *indices = NULL, *perm_obj = Py_None;
+    PyObject *cmember_obj = Py_None;
+    PyArrayObject *perm = NULL, *cmember = NULL, *parent = NULL;
+    PyArrayObject *post = NULL;
+    int column = 0, typenum, status;
+    npy_intp n;
+    ss_compressed c;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|O$OOp:etree", kwlist,
+                                     &A, &indices, &perm_obj, &cmember_obj,
+                                     &column)) {
+        return NULL;
+    }
+    if ((column ? ss_parse_compressed(A, indices, &c)
+                : ss_parse_square(A, indices, &c)) < 0) {
+        return NULL;
+    }
+    n = column && c.is_csr ? c.nrow : c.ncol;
+    typenum = c.is_long ? SS_NPY_LONG : NPY_INT;
+    if (parse_index_arg(perm_obj, n, typenum, "perm", &perm) < 0
+        || (perm != NULL && check_perm(perm, c.is_long) < 0)
+        || parse_index_arg(cmember_obj, n, typenum, "cmember",
+                           &cmember) < 0) {
+        goto fail;
+    }
+    parent = (PyArrayObject *)PyArray_SimpleNew(1, &n, typenum);
+    post = (PyArrayObject *)PyArray_SimpleNew(1, &n, typenum);
+    if (parent == NULL || post == NULL) {
+        goto fail;
+    }
+
+    Py_BEGIN_ALLOW_THREADS
+    if (c.is_long) {
+        status = etree_long(
+            &c, column, perm == NULL ? NULL : PyArray_DATA(perm),
+            cmember == NULL ? NULL : PyArray_DATA(cmember),
+            PyArray_DATA(parent), PyArray_DATA(post));
+    }
+    else {
+        status = etree_int(
+            &c, column, perm == NULL ? NULL : PyArray_DATA(perm),
+            cmember == NULL ? NULL : PyArray_DATA(cmember),
+            PyArray_DATA(parent), PyArray_DATA(post));
+    }
+    Py_END_ALLOW_THREADS
+    if (status == SS_BAD_INDPTR || status == SS_BAD_INDEX) {
+        PyErr_SetString(PyExc_ValueError,
+                        status == SS_BAD_INDPTR
+                            ? "indptr is not nondecreasing"
+                            : "index out of range in A");
+        goto fail;
+    }
+    if (status < 0) {
+        PyErr_NoMemory();
+        goto fail;
+    }
+    Py_XDECREF(perm);
+    Py_XDECREF(cmember);
+    ss_compressed_clear(&c);
+    return Py_BuildValue("(NN)", parent, post);
+
+fail:
+    Py_XDECREF(perm);
+    Py_XDECREF(cmember);
+    Py_XDECREF(parent);
+    Py_XDECREF(post);
+    ss_compressed_clear(&c);
+    return NULL;
+}
+
+static PyMethodDef ccolamd_methods[] = {
+    {"ccolamd", (PyCFunction)(void (*)(void))ccolamd_py,
+     METH_VARARGS | METH_KEYWORDS, ccolamd_doc},
+    {"csymamd", (PyCFunction)(void (*)(void))csymamd_py,
+     METH_VARARGS | METH_KEYWORDS, csymamd_doc},
+    {"etree", (PyCFunction)(void (*)(void))etree_py,
+     METH_VARARGS | METH_KEYWORDS, etree_doc},
+    {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef ccolamd_module = {
+    PyModuleDef_HEAD_INIT,
+    "suitesparse.ccolamd",
+    "CCOLAMD and CSYMAMD: constrained column approximate minimum degree "
+    "ordering.",
+    -1,
+    ccolamd_methods,
+};
+
+PyMODINIT_FUNC
+PyInit_ccolamd(void)
+{
+    import_array();
+    return PyModule_Create(&ccolamd_module);
+}
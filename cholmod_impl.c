@@ -1 +1,3486 @@
-void PyInit_cholmod(void) {}
+/* Python bindings for CHOLMOD: sparse Cholesky factorization. */
+
+#include <errno.h>
+#include <stdint.h>
+#include <string.h>
+
+#include "ss_common.h"
+#include "pythread.h"
+#include "cholmod.h"
+
+/* Call the int or SuiteSparse_long flavour of a CHOLMOD routine, depending on
+ * the index type the factor was created with. */
+#define CHM(self, fn, ...) CHM_IS((self)->is_long, fn, __VA_ARGS__)
+#define CHM_IS(is_long, fn, ...)                                            \
+    ((is_long) ? cholmod_l_##fn(__VA_ARGS__) : cholmod_##fn(__VA_ARGS__))
+
+static PyObject *CholmodError;
+static PyObject *NotPositiveDefiniteError;
+
+typedef struct {
+    PyObject_HEAD
+    cholmod_common common;
+    cholmod_factor *L;
+    cholmod_dense *Y;   /* cholmod_solve2 workspaces, kept across solves */
+    cholmod_dense *E;
+    PyThread_type_lock lock;
+    Py_buffer view;     /* file mapped by load(mmap=True), or buffer given to
+                           from_buffer(); L points into it */
+    double analyze_time;    /* seconds of the last analyze, -1 if unknown */
+    double factorize_time;  /* and of the last factorize */
+    int is_long;
+    int stype;          /* CHOLMOD stype of the compressed-column input */
+    npy_intp n;
+} FactorObject;
+
+#define ACQUIRE_LOCK(obj) do {                                              \
+    if (!PyThread_acquire_lock((obj)->lock, 0)) {                           \
+        Py_BEGIN_ALLOW_THREADS                                              \
+        PyThread_acquire_lock((obj)->lock, 1);                              \
+        Py_END_ALLOW_THREADS                                                \
+    } } while (0)
+#define RELEASE_LOCK(obj) PyThread_release_lock((obj)->lock)
+
+/* Raise the Python exception matching Common->status.  Returns -1 if an
+ * exception was set, 0 if the status is OK or only a warning. */
+static int
+check_common(cholmod_common *common)
+{
+    switch (common->status) {
+    case CHOLMOD_OK:
+    case CHOLMOD_DSMALL:
+    case CHOLMOD_NOT_POSDEF:
+        return 0;
+    case CHOLMOD_OUT_OF_MEMORY:
+        PyErr_NoMemory();
+        return -1;
+    case CHOLMOD_INVALID:
+        PyErr_SetString(PyExc_ValueError, "invalid input to CHOLMOD");
+        return -1;
+    case CHOLMOD_TOO_LARGE:
+        PyErr_SetString(PyExc_OverflowError,
+                        "problem too large for CHOLMOD's index type");
+        return -1;
+    case CHOLMOD_NOT_INSTALLED:
+        PyErr_SetString(CholmodError,
+                        "method not installed in this CHOLMOD build");
+        return -1;
+    default:
+        PyErr_Format(CholmodError, "CHOLMOD failed with status %d",
+                     common->status);
+        return -1;
+    }
+}
+
+/* Point a cholmod_sparse header at the arrays of a parsed matrix.  ``x`` may
+ * be NULL for a pattern-only matrix.  Nothing is copied. */
+static void
+wrap_sparse(const ss_compressed *c, PyArrayObject *x, int stype, int sorted,
+            cholmod_sparse *A)
+{
+    memset(A, 0, sizeof(*A));
+    A->nrow = (size_t)c->nrow;
+    A->ncol = (size_t)c->ncol;
+    A->nzmax = (size_t)(c->nnz > 0 ? c->nnz : 1);
+    A->p = PyArray_DATA(c->indptr);
+    A->i = PyArray_DATA(c->indices);
+    A->x = x == NULL ? NULL : PyArray_DATA(x);
+    A->stype = c->is_csr ? -stype : stype;
+    A->itype = c->is_long ? CHOLMOD_LONG : CHOLMOD_INT;
+    A->xtype = x == NULL ? CHOLMOD_PATTERN : CHOLMOD_REAL;
+    A->dtype = CHOLMOD_DOUBLE;
+    A->sorted = sorted;
+    A->packed = 1;
+}
+
+/* Whether a scipy.sparse matrix reports sorted indices; FALSE if unknown. */
+static int
+has_sorted_indices(PyObject *A)
+{
+    PyObject *flag = PyObject_GetAttrString(A, "has_sorted_indices");
+    int sorted;
+
+    if (flag == NULL) {
+        PyErr_Clear();
+        return 0;
+    }
+    sorted = PyObject_IsTrue(flag);
+    Py_DECREF(flag);
+    if (sorted < 0) {
+        PyErr_Clear();
+        return 0;
+    }
+    return sorted;
+}
+
+/* A.tocsc(), after checking the indices of a CSR matrix: scipy's
+ * conversion trusts them as CHOLMOD does, and writes out of bounds for an
+ * index out of range.  Other formats are converted as they are. */
+static PyObject *
+checked_tocsc(PyObject *A)
+{
+    ss_compressed c;
+    int status;
+
+    if (ss_parse_compressed(A, NULL, &c) < 0) {
+        if (!PyErr_ExceptionMatches(PyExc_TypeError)) {
+            return NULL;
+        }
+        PyErr_Clear();
+    }
+    else {
+        status = c.is_csr ? ss_check_indices(&c) : 0;
+        ss_compressed_clear(&c);
+        if (status < 0) {
+            return NULL;
+        }
+    }
+    return PyObject_CallMethod(A, "tocsc", NULL);
+}
+
+/* Parse a square scipy.sparse matrix with values, using the index type of
+ * the factor.  On success ``c`` and ``*x`` hold references the caller must
+ * release. */
+static int
+parse_matrix(FactorObject *self, PyObject *obj, ss_compressed *c,
+             PyArrayObject **x, cholmod_sparse *A)
+{
+    if (ss_parse_square_as(obj, NULL, self->is_long ? SS_NPY_LONG : NPY_INT,
+                           c) < 0) {
+        return -1;
+    }
+    if (c->ncol != self->n) {
+        PyErr_Format(PyExc_ValueError,
+                     "matrix has shape (%zd, %zd) but the factor is of "
+                     "order %zd", (Py_ssize_t)c->nrow, (Py_ssize_t)c->ncol,
+                     (Py_ssize_t)self->n);
+        ss_compressed_clear(c);
+        return -1;
+    }
+    if (ss_check_indices(c) < 0) {
+        ss_compressed_clear(c);
+        return -1;
+    }
+    *x = ss_values_array(obj, c->nnz);
+    if (*x == NULL) {
+        ss_compressed_clear(c);
+        return -1;
+    }
+    wrap_sparse(c, *x, self->stype, has_sorted_indices(obj), A);
+    return 0;
+}
+
+static int
+check_permutation(PyArrayObject *perm, npy_intp n, int is_long)
+{
+    char *seen;
+    npy_intp k, j;
+
+    if (PyArray_DIM(perm, 0) != n) {
+        PyErr_Format(PyExc_ValueError, "perm must have length %zd",
+                     (Py_ssize_t)n);
+        return -1;
+    }
+    seen = PyMem_Calloc((size_t)n + 1, 1);
+    if (seen == NULL) {
+        PyErr_NoMemory();
+        return -1;
+    }
+    for (k = 0; k < n; k++) {
+        j = ss_index_at(perm, k, is_long);
+        if (j < 0 || j >= n || seen[j]) {
+            PyMem_Free(seen);
+            PyErr_SetString(PyExc_ValueError, "perm is not a permutation");
+            return -1;
+        }
+        seen[j] = 1;
+    }
+    PyMem_Free(seen);
+    return 0;
+}
+
+static int
+set_ordering(cholmod_common *common, const char *ordering, int have_perm)
+{
+    if (have_perm) {
+        if (strcmp(ordering, "default") != 0
+            && strcmp(ordering, "given") != 0) {
+            PyErr_SetString(PyExc_ValueError,
+                            "perm can only be used with ordering='given'");
+            return -1;
+        }
+        common->nmethods = 1;
+        common->method[0].ordering = CHOLMOD_GIVEN;
+        common->postorder = 0;
+        return 0;
+    }
+    if (strcmp(ordering, "default") == 0) {
+        return 0;
+    }
+    common->nmethods = 1;
+    common->postorder = 1;
+    if (strcmp(ordering, "natural") == 0) {
+        common->method[0].ordering = CHOLMOD_NATURAL;
+        common->postorder = 0;
+    }
+    else if (strcmp(ordering, "postordered") == 0) {
+        common->method[0].ordering = CHOLMOD_POSTORDERED;
+    }
+    else if (strcmp(ordering, "amd") == 0) {
+        common->method[0].ordering = CHOLMOD_AMD;
+    }
+#ifndef NPARTITION
+    else if (strcmp(ordering, "metis") == 0) {
+        common->method[0].ordering = CHOLMOD_METIS;
+    }
+    else if (strcmp(ordering, "nesdis") == 0) {
+        common->method[0].ordering = CHOLMOD_NESDIS;
+    }
+#endif
+    else {
+        PyErr_Format(PyExc_ValueError, "unknown ordering '%s'", ordering);
+        return -1;
+    }
+    return 0;
+}
+
+/* Permutation of the ordering 'auto', chosen by suitesparse._auto among
+ * several candidates; see OrderingSelector. */
+static PyObject *
+auto_ordering(PyObject *A, int lower)
+{
+    PyObject *mod, *func, *kwds, *args, *perm = NULL;
+
+    mod = PyImport_ImportModule("suitesparse._auto");
+    if (mod == NULL) {
+        return NULL;
+    }
+    func = PyObject_GetAttrString(mod, "order_auto");
+    Py_DECREF(mod);
+    if (func == NULL) {
+        return NULL;
+    }
+    args = PyTuple_Pack(1, A);
+    kwds = Py_BuildValue("{s:O}", "lower", lower ? Py_True : Py_False);
+    if (args != NULL && kwds != NULL) {
+        perm = PyObject_Call(func, args, kwds);
+    }
+    Py_XDECREF(args);
+    Py_XDECREF(kwds);
+    Py_DECREF(func);
+    return perm;
+}
+
+static int
+set_supernodal(cholmod_common *common, const char *mode)
+{
+    if (strcmp(mode, "auto") == 0) {
+        common->supernodal = CHOLMOD_AUTO;
+    }
+    else if (strcmp(mode, "simplicial") == 0) {
+        common->supernodal = CHOLMOD_SIMPLICIAL;
+    }
+    else if (strcmp(mode, "supernodal") == 0) {
+        common->supernodal = CHOLMOD_SUPERNODAL;
+    }
+    else {
+        PyErr_Format(PyExc_ValueError, "unknown supernodal mode '%s'", mode);
+        return -1;
+    }
+    return 0;
+}
+
+/* Copy the user-settable options, but none of the workspace, of a
+ * cholmod_common. */
+static void
+copy_options(cholmod_common *dst, const cholmod_common *src)
+{
+    dst->print = src->print;
+    dst->supernodal = src->supernodal;
+    dst->final_asis = src->final_asis;
+    dst->final_super = src->final_super;
+    dst->final_ll = src->final_ll;
+    dst->final_pack = src->final_pack;
+    dst->final_monotonic = src->final_monotonic;
+    dst->final_resymbol = src->final_resymbol;
+    dst->nmethods = src->nmethods;
+    dst->postorder = src->postorder;
+    memcpy(dst->method, src->method, sizeof(dst->method));
+}
+
+/* Bytes held by the arrays of a factor. */
+static size_t
+factor_nbytes(const cholmod_factor *L)
+{
+    size_t isize = L->itype == CHOLMOD_LONG
+        ? sizeof(SuiteSparse_long) : sizeof(int);
+    size_t xsize = L->xtype == CHOLMOD_PATTERN ? 0 : sizeof(double);
+    size_t total = 2 * L->n * isize;            /* Perm, ColCount */
+
+    if (L->IPerm != NULL) {
+        total += L->n * isize;
+    }
+    if (L->is_super) {
+        total += 3 * (L->nsuper + 1) * isize;   /* super, pi, px */
+        total += L->ssize * isize;              /* s */
+        total += L->xsize * xsize;              /* x */
+    }
+    else if (L->xtype != CHOLMOD_PATTERN) {
+        total += (L->n + 1) * isize;            /* p */
+        total += L->n * isize;                  /* nz */
+        total += 2 * (L->n + 2) * isize;        /* next, prev */
+        total += L->nzmax * (isize + xsize);    /* i, x */
+    }
+    return total;
+}
+
+/* ------------------------------------------------------------------------ */
+/* Factor files */
+/* ------------------------------------------------------------------------ */
+
+/* A factor file is a header of FILE_HEADER_SIZE bytes followed by the arrays
+ * of the cholmod_factor in native byte order, each at an offset aligned to
+ * FILE_ALIGN bytes, so that a mapped file is used in place. */
+#define FILE_MAGIC "SSCHOLF"
+#define FILE_VERSION 1
+#define FILE_BYTE_ORDER 0x01020304u
+#define FILE_HEADER_SIZE 512
+#define FILE_ALIGN 64
+
+enum {
+    F_PERM, F_IPERM, F_COLCOUNT, F_P, F_I, F_X, F_Z, F_NZ, F_NEXT, F_PREV,
+    F_SUPER, F_PI, F_PX, F_S, F_NARRAYS
+};
+
+typedef struct {
+    char magic[8];
+    uint32_t version;
+    uint32_t byte_order;
+    int64_t n, minor, nzmax, nsuper, ssize, xsize, maxcsize, maxesize;
+    int32_t ordering, is_ll, is_super, is_monotonic, itype, xtype, dtype,
+            stype;
+    int64_t offset[F_NARRAYS];  /* 0 for an absent array */
+} file_header;
+
+typedef struct {
+    void **ptr;
+    size_t count;
+    size_t size;
+} factor_array;
+
+/* The arrays of L, with the lengths cholmod_free_factor frees them with. */
+static void
+factor_arrays(cholmod_factor *L, factor_array a[F_NARRAYS])
+{
+    size_t isize = L->itype == CHOLMOD_LONG
+        ? sizeof(SuiteSparse_long) : sizeof(int);
+    size_t xs = L->is_super ? L->xsize : L->nzmax;
+
+#define ARRAY(k, field, n, s)                                               \
+    (a[k].ptr = &L->field, a[k].count = (n), a[k].size = (s))
+    ARRAY(F_PERM, Perm, L->n, isize);
+    ARRAY(F_IPERM, IPerm, L->n, isize);
+    ARRAY(F_COLCOUNT, ColCount, L->n, isize);
+    ARRAY(F_P, p, L->n + 1, isize);
+    ARRAY(F_I, i, L->nzmax, isize);
+    ARRAY(F_X, x, xs, L->xtype == CHOLMOD_COMPLEX ? 2 * sizeof(double)
+                                                  : sizeof(double));
+    ARRAY(F_Z, z, xs, sizeof(double));
+    ARRAY(F_NZ, nz, L->n, isize);
+    ARRAY(F_NEXT, next, L->n + 2, isize);
+    ARRAY(F_PREV, prev, L->n + 2, isize);
+    ARRAY(F_SUPER, super, L->nsuper + 1, isize);
+    ARRAY(F_PI, pi, L->nsuper + 1, isize);
+    ARRAY(F_PX, px, L->nsuper + 1, isize);
+    ARRAY(F_S, s, L->ssize, isize);
+#undef ARRAY
+}
+
+/* Whether array k must be present in L; IPerm is optional. */
+static int
+array_expected(const cholmod_factor *L, int k)
+{
+    switch (k) {
+    case F_PERM:
+    case F_COLCOUNT:
+        return 1;
+    case F_X:
+        return L->xtype != CHOLMOD_PATTERN;
+    case F_Z:
+        return L->xtype == CHOLMOD_ZOMPLEX;
+    case F_SUPER:
+    case F_PI:
+    case F_PX:
+    case F_S:
+        return L->is_super;
+    default:
+        return !L->is_super && L->xtype != CHOLMOD_PATTERN;
+    }
+}
+
+static int
+write_padding(FILE *f, size_t n)
+{
+    static const char zeros[FILE_HEADER_SIZE];
+
+    return fwrite(zeros, 1, n, f) == n ? 0 : -1;
+}
+
+/* Fill the header of L, with the offsets of its arrays in a.  Returns the
+ * size of the file. */
+static int64_t
+factor_header(cholmod_factor *L, int stype, file_header *h,
+              factor_array a[F_NARRAYS])
+{
+    int64_t pos = FILE_HEADER_SIZE, end = FILE_HEADER_SIZE;
+    int k;
+
+    memset(h, 0, sizeof(*h));
+    memcpy(h->magic, FILE_MAGIC, sizeof(FILE_MAGIC));
+    h->version = FILE_VERSION;
+    h->byte_order = FILE_BYTE_ORDER;
+    h->n = (int64_t)L->n;
+    h->minor = (int64_t)L->minor;
+    h->nzmax = (int64_t)L->nzmax;
+    h->nsuper = (int64_t)L->nsuper;
+    h->ssize = (int64_t)L->ssize;
+    h->xsize = (int64_t)L->xsize;
+    h->maxcsize = (int64_t)L->maxcsize;
+    h->maxesize = (int64_t)L->maxesize;
+    h->ordering = L->ordering;
+    h->is_ll = L->is_ll;
+    h->is_super = L->is_super;
+    h->is_monotonic = L->is_monotonic;
+    h->itype = L->itype;
+    h->xtype = L->xtype;
+    h->dtype = L->dtype;
+    h->stype = stype;
+    factor_arrays(L, a);
+    for (k = 0; k < F_NARRAYS; k++) {
+        if (*a[k].ptr != NULL) {
+            h->offset[k] = pos;
+            end = pos + (int64_t)(a[k].count * a[k].size);
+            pos = (end + FILE_ALIGN - 1) / FILE_ALIGN * FILE_ALIGN;
+        }
+    }
+    return end;
+}
+
+/* Write the header and arrays of L.  No Python calls; returns -1 with errno
+ * set on an I/O error. */
+static int
+write_factor(FILE *f, cholmod_factor *L, int stype)
+{
+    factor_array a[F_NARRAYS];
+    file_header h;
+    int64_t pos = FILE_HEADER_SIZE;
+    int k;
+
+    factor_header(L, stype, &h, a);
+    if (fwrite(&h, sizeof(h), 1, f) != 1
+        || write_padding(f, FILE_HEADER_SIZE - sizeof(h)) < 0) {
+        return -1;
+    }
+    for (k = 0; k < F_NARRAYS; k++) {
+        if (h.offset[k] == 0) {
+            continue;
+        }
+        if (write_padding(f, (size_t)(h.offset[k] - pos)) < 0
+            || fwrite(*a[k].ptr, a[k].size, a[k].count, f) != a[k].count) {
+            return -1;
+        }
+        pos = h.offset[k] + (int64_t)(a[k].count * a[k].size);
+    }
+    return 0;
+}
+
+/* Copy the file of L into buf, which holds the size factor_header()
+ * returned.  No Python calls. */
+static void
+copy_factor(char *buf, const file_header *h, const factor_array a[F_NARRAYS])
+{
+    int64_t pos = FILE_HEADER_SIZE;
+    int k;
+
+    memcpy(buf, h, sizeof(*h));
+    memset(buf + sizeof(*h), 0, FILE_HEADER_SIZE - sizeof(*h));
+    for (k = 0; k < F_NARRAYS; k++) {
+        if (h->offset[k] == 0) {
+            continue;
+        }
+        memset(buf + pos, 0, (size_t)(h->offset[k] - pos));
+        memcpy(buf + h->offset[k], *a[k].ptr, a[k].count * a[k].size);
+        pos = h->offset[k] + (int64_t)(a[k].count * a[k].size);
+    }
+}
+
+/* Check a header and fill the scalars of L from it.  ``length`` is the file
+ * size, or -1 if unknown.  Returns an error message or NULL. */
+static const char *
+read_header(const file_header *h, int64_t length, cholmod_factor *L)
+{
+    factor_array a[F_NARRAYS];
+    int k;
+
+    if (memcmp(h->magic, FILE_MAGIC, sizeof(FILE_MAGIC)) != 0) {
+        return "not a CHOLMOD factor file";
+    }
+    if (h->version != FILE_VERSION) {
+        return "unsupported factor file version";
+    }
+    if (h->byte_order != FILE_BYTE_ORDER) {
+        return "factor file was written with another byte order";
+    }
+    if ((h->itype != CHOLMOD_INT && h->itype != CHOLMOD_LONG)
+        || h->dtype != CHOLMOD_DOUBLE
+        || h->xtype < CHOLMOD_PATTERN || h->xtype > CHOLMOD_ZOMPLEX
+        || (h->stype != 1 && h->stype != -1)
+        || h->n < 0 || h->nzmax < 0 || h->nsuper < 0 || h->ssize < 0
+        || h->xsize < 0 || (h->itype == CHOLMOD_INT && h->n >= INT32_MAX)) {
+        return "corrupt factor file header";
+    }
+    L->n = (size_t)h->n;
+    L->minor = (size_t)h->minor;
+    L->nzmax = (size_t)h->nzmax;
+    L->nsuper = (size_t)h->nsuper;
+    L->ssize = (size_t)h->ssize;
+    L->xsize = (size_t)h->xsize;
+    L->maxcsize = (size_t)h->maxcsize;
+    L->maxesize = (size_t)h->maxesize;
+    L->ordering = h->ordering;
+    L->is_ll = h->is_ll;
+    L->is_super = h->is_super;
+    L->is_monotonic = h->is_monotonic;
+    L->itype = h->itype;
+    L->xtype = h->xtype;
+    L->dtype = h->dtype;
+    factor_arrays(L, a);
+    for (k = 0; k < F_NARRAYS; k++) {
+        int64_t offset = h->offset[k];
+
+        if ((offset != 0) != array_expected(L, k) && k != F_IPERM) {
+            return "corrupt factor file header";
+        }
+        if (offset == 0) {
+            continue;
+        }
+        if (offset < FILE_HEADER_SIZE || offset % FILE_ALIGN != 0
+            || a[k].count > (size_t)(INT64_MAX - offset) / a[k].size) {
+            return "corrupt factor file header";
+        }
+        if (length >= 0
+            && offset + (int64_t)(a[k].count * a[k].size) > length) {
+            return "truncated factor file";
+        }
+    }
+    return NULL;
+}
+
+/* Allocate and read the arrays of L, whose scalars are set, from f
+ * positioned after the header.  No Python calls; returns 0, or -1 for an
+ * I/O error with errno set, or -2 for a short file, or -3 if out of
+ * memory. */
+static int
+read_arrays(FILE *f, const file_header *h, cholmod_factor *L, int is_long,
+            cholmod_common *common)
+{
+    factor_array a[F_NARRAYS];
+    char skip[FILE_ALIGN];
+    int64_t pos = FILE_HEADER_SIZE;
+    size_t n;
+    int k;
+
+    factor_arrays(L, a);
+    for (k = 0; k < F_NARRAYS; k++) {
+        if (h->offset[k] == 0) {
+            continue;
+        }
+        /* arrays are written in order, FILE_ALIGN apart at most */
+        if (h->offset[k] < pos || h->offset[k] - pos > FILE_ALIGN) {
+            return -2;
+        }
+        n = (size_t)(h->offset[k] - pos);
+        if (fread(skip, 1, n, f) != n) {
+            return ferror(f) ? -1 : -2;
+        }
+        *a[k].ptr = CHM_IS(is_long, malloc, a[k].count, a[k].size, common);
+        if (*a[k].ptr == NULL) {
+            return -3;
+        }
+        if (fread(*a[k].ptr, a[k].size, a[k].count, f) != a[k].count) {
+            return ferror(f) ? -1 : -2;
+        }
+        pos = h->offset[k] + (int64_t)(a[k].count * a[k].size);
+    }
+    return 0;
+}
+
+/* Point the arrays of L, whose scalars are set, into a mapped file. */
+static void
+map_arrays(const file_header *h, char *base, cholmod_factor *L)
+{
+    factor_array a[F_NARRAYS];
+    int k;
+
+    factor_arrays(L, a);
+    for (k = 0; k < F_NARRAYS; k++) {
+        if (h->offset[k] != 0) {
+            *a[k].ptr = base + h->offset[k];
+        }
+    }
+}
+
+/* Detach from L the arrays that lie in the mapped file, which
+ * cholmod_free_factor must not free. */
+static void
+unmap_arrays(FactorObject *self)
+{
+    factor_array a[F_NARRAYS];
+    char *begin = self->view.buf, *end = begin + self->view.len;
+    int k;
+
+    factor_arrays(self->L, a);
+    for (k = 0; k < F_NARRAYS; k++) {
+        char *p = *a[k].ptr;
+        if (p >= begin && p <= end) {
+            *a[k].ptr = NULL;
+        }
+    }
+}
+
+static int
+check_mutable(FactorObject *self)
+{
+    if (self->view.buf != NULL) {
+        PyErr_SetString(PyExc_ValueError,
+                        "factor is memory-mapped and read-only; modify a "
+                        "copy()");
+        return -1;
+    }
+    return 0;
+}
+
+/* ------------------------------------------------------------------------ */
+/* Statistics */
+/* ------------------------------------------------------------------------ */
+
+static const char *
+ordering_name(int ordering)
+{
+    switch (ordering) {
+    case CHOLMOD_NATURAL:
+        return "natural";
+    case CHOLMOD_GIVEN:
+        return "given";
+    case CHOLMOD_AMD:
+        return "amd";
+    case CHOLMOD_METIS:
+        return "metis";
+    case CHOLMOD_NESDIS:
+        return "nesdis";
+    case CHOLMOD_COLAMD:
+        return "colamd";
+    case CHOLMOD_POSTORDERED:
+        return "postordered";
+    default:
+        return "unknown";
+    }
+}
+
+/* Statistics of the last analyze and factorize of a factor, from its
+ * cholmod_common and the timings taken around the calls. */
+static PyObject *
+factor_stats(FactorObject *self)
+{
+    return Py_BuildValue(
+        "{s:n,s:s,s:O,s:d,s:d,s:d,s:n,s:n,s:d,s:d}",
+        "n", (Py_ssize_t)self->n,
+        "ordering", ordering_name(self->L->ordering),
+        "is_super", self->L->is_super ? Py_True : Py_False,
+        "lnz", self->common.lnz,
+        "flops", self->common.fl,
+        "anz", self->common.anz,
+        "memory_usage", (Py_ssize_t)self->common.memory_usage,
+        "memory_inuse", (Py_ssize_t)self->common.memory_inuse,
+        "analyze_time", self->analyze_time,
+        "factorize_time", self->factorize_time);
+}
+
+/* Report the statistics of the call ``name`` on a factor to the hook. */
+static int
+report_stats(FactorObject *self, const char *name)
+{
+    PyObject *stats;
+
+    if (!ss_want_stats(0)) {
+        return 0;
+    }
+    stats = factor_stats(self);
+    if (stats == NULL) {
+        return -1;
+    }
+    ss_report_stats(name, stats);
+    Py_DECREF(stats);
+    return 0;
+}
+
+/* ------------------------------------------------------------------------ */
+/* Factor type */
+/* ------------------------------------------------------------------------ */
+
+/* Set up the lock and start the cholmod_common of a new Factor. */
+static int
+factor_init(FactorObject *self, int is_long, int stype, npy_intp n)
+{
+    self->lock = PyThread_allocate_lock();
+    if (self->lock == NULL) {
+        PyErr_SetString(PyExc_MemoryError, "unable to allocate lock");
+        return -1;
+    }
+    self->is_long = is_long;
+    self->stype = stype;
+    self->n = n;
+    self->analyze_time = self->factorize_time = -1;
+    CHM(self, start, &self->common);
+    self->common.print = 0;
+    return 0;
+}
+
+/* Allocate a Factor with a started cholmod_common but no factor yet. */
+static FactorObject *
+factor_alloc(PyTypeObject *type, int is_long, int stype, npy_intp n)
+{
+    FactorObject *self = (FactorObject *)type->tp_alloc(type, 0);
+
+    if (self == NULL) {
+        return NULL;
+    }
+    if (factor_init(self, is_long, stype, n) < 0) {
+        Py_DECREF(self);
+        return NULL;
+    }
+    return self;
+}
+
+PyDoc_STRVAR(factor_doc,
+"Factor(A, *, lower=False, supernodal='auto', ordering='default',\n"
+"       perm=None)\n"
+"--\n\n"
+"Symbolic Cholesky analysis of a symmetric sparse matrix.\n\n"
+"The fill-reducing ordering and the symbolic factorization are computed\n"
+"once by cholmod_analyze.  factorize() can then be called any number of\n"
+"times with matrices of the same sparsity pattern and new values, each\n"
+"call doing only the numeric work.\n\n"
+"Parameters\n"
+"----------\n"
+"A : scipy.sparse CSC or CSR matrix\n"
+"    Square matrix whose pattern is analyzed.  Only the upper triangle\n"
+"    is used, or the lower one if ``lower`` is true.  int32 indices use\n"
+"    cholmod_* and int64 indices use cholmod_l_*; the arrays are used in\n"
+"    place.\n"
+"lower : bool, optional\n"
+"    Use the lower instead of the upper triangle of A.\n"
+"supernodal : {'auto', 'simplicial', 'supernodal'}, optional\n"
+"    Factorization method.\n"
+"ordering : {'default', 'natural', 'postordered', 'amd', 'metis', "
+"'nesdis', 'auto', 'given'}, optional\n"
+"    Fill-reducing ordering.  'default' lets CHOLMOD choose: AMD, and\n"
+"    METIS as well if AMD leaves a lot of fill.  'metis' and 'nesdis'\n"
+"    (CHOLMOD's nested dissection) need the Partition module, see\n"
+"    ``HAS_PARTITION``.  'auto' tries several orderings in parallel and\n"
+"    keeps the one predicted to take the fewest flops, remembering the\n"
+"    winner for the sparsity pattern; see suitesparse.order_auto.\n"
+"perm : array_like, optional\n"
+"    User permutation, used as is with ordering='given'.");
+
+static PyObject *
+factor_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"A", "lower", "supernodal", "ordering", "perm",
+                             NULL};
+    PyObject *obj, *perm_obj = Py_None, *auto_perm = NULL;
+    PyArrayObject *perm = NULL;
+    const char *supernodal = "auto", *ordering = "default";
+    int lower = 0, sorted;
+    FactorObject *self;
+    ss_compressed c;
+    cholmod_sparse A;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|$pssO:Factor", kwlist,
+                                     &obj, &lower, &supernodal, &ordering,
+                                     &perm_obj)) {
+        return NULL;
+    }
+    if (ss_parse_square(obj, NULL, &c) < 0) {
+        return NULL;
+    }
+    if (ss_check_indices(&c) < 0) {
+        ss_compressed_clear(&c);
+        return NULL;
+    }
+    sorted = has_sorted_indices(obj);
+    if (strcmp(ordering, "auto") == 0 && perm_obj == Py_None) {
+        auto_perm = perm_obj = auto_ordering(obj, lower);
+        if (auto_perm == NULL) {
+            ss_compressed_clear(&c);
+            return NULL;
+        }
+        ordering = "given";
+    }
+
+    self = factor_alloc(type, c.is_long, lower ? -1 : 1, c.ncol);
+    if (self == NULL) {
+        Py_XDECREF(auto_perm);
+        ss_compressed_clear(&c);
+        return NULL;
+    }
+    if (set_supernodal(&self->common, supernodal) < 0
+        || set_ordering(&self->common, ordering, perm_obj != Py_None) < 0) {
+        goto fail;
+    }
+    if (perm_obj != Py_None) {
+        perm = ss_index_array_cast(
+            perm_obj, c.is_long ? SS_NPY_LONG : NPY_INT, "perm");
+        if (perm == NULL || check_permutation(perm, self->n, c.is_long) < 0) {
+            goto fail;
+        }
+    }
+
+    wrap_sparse(&c, NULL, self->stype, sorted, &A);
+    Py_BEGIN_ALLOW_THREADS
+    self->analyze_time = SuiteSparse_time();
+    self->L = CHM(self, analyze_p, &A,
+                  perm == NULL ? NULL : PyArray_DATA(perm), NULL, 0,
+                  &self->common);
+    self->analyze_time = SuiteSparse_time() - self->analyze_time;
+    Py_END_ALLOW_THREADS
+    if (self->L == NULL) {
+        if (check_common(&self->common) == 0) {
+            PyErr_SetString(CholmodError, "cholmod_analyze failed");
+        }
+        goto fail;
+    }
+    if (report_stats(self, "cholmod.Factor") < 0) {
+        goto fail;
+    }
+    Py_XDECREF(perm);
+    Py_XDECREF(auto_perm);
+    ss_compressed_clear(&c);
+    return (PyObject *)self;
+
+fail:
+    Py_XDECREF(perm);
+    Py_XDECREF(auto_perm);
+    ss_compressed_clear(&c);
+    Py_DECREF(self);
+    return NULL;
+}
+
+static void
+factor_dealloc(FactorObject *self)
+{
+    if (self->lock != NULL) {
+        if (self->L != NULL) {
+            if (self->view.buf != NULL) {
+                unmap_arrays(self);
+            }
+            CHM(self, free_factor, &self->L, &self->common);
+        }
+        CHM(self, free_dense, &self->Y, &self->common);
+        CHM(self, free_dense, &self->E, &self->common);
+        CHM(self, finish, &self->common);
+        PyThread_free_lock(self->lock);
+    }
+    PyBuffer_Release(&self->view);
+    Py_TYPE(self)->tp_free((PyObject *)self);
+}
+
+PyDoc_STRVAR(factorize_doc,
+"factorize(A, beta=0.0)\n"
+"--\n\n"
+"Numeric factorization of A + beta*I, reusing the symbolic analysis.\n\n"
+"A must have the sparsity pattern the factor was analyzed with (or a\n"
+"subset of it).  Its index arrays are used in place when they have the\n"
+"dtype of the analyzed matrix, and its values when they are float64.\n"
+"Raises NotPositiveDefiniteError if CHOLMOD finds that the matrix is not\n"
+"positive definite: a non-positive pivot in an LL' factorization or a zero\n"
+"pivot in an LDL' one.");
+
+static PyObject *
+factor_factorize(FactorObject *self, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"A", "beta", NULL};
+    PyObject *obj;
+    PyArrayObject *x;
+    double beta[2] = {0.0, 0.0}, time;
+    ss_compressed c;
+    cholmod_sparse A;
+    int ok;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|d:factorize", kwlist,
+                                     &obj, &beta[0])) {
+        return NULL;
+    }
+    if (check_mutable(self) < 0 || parse_matrix(self, obj, &c, &x, &A) < 0) {
+        return NULL;
+    }
+    ACQUIRE_LOCK(self);
+    Py_BEGIN_ALLOW_THREADS
+    time = SuiteSparse_time();
+    ok = CHM(self, factorize_p, &A, beta, NULL, 0, self->L, &self->common);
+    self->factorize_time = SuiteSparse_time() - time;
+    Py_END_ALLOW_THREADS
+    RELEASE_LOCK(self);
+    Py_DECREF(x);
+    ss_compressed_clear(&c);
+    if (!ok || check_common(&self->common) < 0) {
+        if (!PyErr_Occurred()) {
+            PyErr_SetString(CholmodError, "cholmod_factorize failed");
+        }
+        return NULL;
+    }
+    if (report_stats(self, "cholmod.Factor.factorize") < 0) {
+        return NULL;
+    }
+    if (self->common.status == CHOLMOD_NOT_POSDEF) {
+        PyErr_Format(NotPositiveDefiniteError,
+                     "matrix is not positive definite (leading minor %zd)",
+                     (Py_ssize_t)self->L->minor);
+        return NULL;
+    }
+    Py_RETURN_NONE;
+}
+
+static int
+parse_system(const char *name, int *sys)
+{
+    static const struct {
+        const char *name;
+        int value;
+    } systems[] = {
+        {"A", CHOLMOD_A}, {"LDLt", CHOLMOD_LDLt}, {"LD", CHOLMOD_LD},
+        {"DLt", CHOLMOD_DLt}, {"L", CHOLMOD_L}, {"Lt", CHOLMOD_Lt},
+        {"D", CHOLMOD_D}, {"P", CHOLMOD_P}, {"Pt", CHOLMOD_Pt},
+    };
+    size_t k;
+
+    for (k = 0; k < sizeof(systems) / sizeof(systems[0]); k++) {
+        if (strcmp(name, systems[k].name) == 0) {
+            *sys = systems[k].value;
+            return 0;
+        }
+    }
+    PyErr_Format(PyExc_ValueError, "unknown system '%s'", name);
+    return -1;
+}
+
+static int
+check_numeric(FactorObject *self)
+{
+    if (self->L->xtype == CHOLMOD_PATTERN) {
+        PyErr_SetString(PyExc_ValueError,
+                        "factor holds no numeric values; call factorize()");
+        return -1;
+    }
+    return 0;
+}
+
+/* Point a real cholmod_dense header at ``ncol`` columns of length ``nrow``
+ * stored contiguously at ``x``. */
+static void
+wrap_dense(double *x, npy_intp nrow, npy_intp ncol, cholmod_dense *X)
+{
+    memset(X, 0, sizeof(*X));
+    X->nrow = (size_t)nrow;
+    X->ncol = (size_t)ncol;
+    X->d = X->nrow;
+    X->nzmax = X->nrow * X->ncol;
+    X->x = x;
+    X->xtype = CHOLMOD_REAL;
+    X->dtype = CHOLMOD_DOUBLE;
+}
+
+/* Whether two C- or Fortran-contiguous arrays share memory.  Each uses
+ * every byte of its extent, so comparing the extents is exact, as
+ * numpy.shares_memory, which has no C API, would be. */
+static int
+contiguous_overlap(PyArrayObject *a, PyArrayObject *b)
+{
+    const char *a0 = PyArray_BYTES(a), *b0 = PyArray_BYTES(b);
+
+    return PyArray_NBYTES(a) > 0 && PyArray_NBYTES(b) > 0
+           && a0 < b0 + PyArray_NBYTES(b) && b0 < a0 + PyArray_NBYTES(a);
+}
+
+PyDoc_STRVAR(solve_doc,
+"solve(b, *, system='A', block_size=None, out=None)\n"
+"--\n\n"
+"Solve A x = b, or a system with the factors, by cholmod_solve2.\n\n"
+"b is a 1-D array of length n or a 2-D array with n rows, one right-hand\n"
+"side per column.  All columns are solved together, so a supernodal\n"
+"factor uses BLAS-3 triangular solves.  The Y and E workspaces of\n"
+"cholmod_solve2 are kept by the factor and reused across calls.\n\n"
+"Parameters\n"
+"----------\n"
+"b : array_like\n"
+"    Right-hand sides.  A Fortran-contiguous float64 b is read in place.\n"
+"    A C-contiguous one is read through a buffer of block_size columns.\n"
+"system : {'A', 'LDLt', 'LD', 'DLt', 'L', 'Lt', 'D', 'P', 'Pt'}, optional\n"
+"    System to solve, as in cholmod_solve: 'A' is A x = b, 'L' is\n"
+"    L x = b, 'P' is x = P b, and so on.\n"
+"block_size : int, optional\n"
+"    Solve at most this many columns per cholmod_solve2 call, which bounds\n"
+"    the workspace to n*block_size values.  Default is all columns.\n"
+"out : ndarray, optional\n"
+"    float64 array with the shape of b, C- or Fortran-contiguous, to write\n"
+"    x to, not sharing memory with b.  A Fortran-contiguous out is\n"
+"    written in place.\n\n"
+"Returns\n"
+"-------\n"
+"x : ndarray\n"
+"    The solution, ``out`` if given, else a new array with the shape and\n"
+"    memory order of b.");
+
+static PyObject *
+factor_solve(FactorObject *self, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"b", "system", "block_size", "out", NULL};
+    PyObject *obj, *block_size = Py_None, *out = Py_None;
+    PyArrayObject *b, *x;
+    const char *system = "A";
+    Py_ssize_t block = 0;
+    cholmod_dense B, Xblock, *X;
+    double *bbuf = NULL, *xbuf = NULL, *bdata, *xdata;
+    npy_intp n = self->n, nrhs, k1, nk, i, j;
+    int sys, b_is_c, x_is_c, ok = 1;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|$sOO:solve", kwlist,
+                                     &obj, &system, &block_size, &out)) {
+        return NULL;
+    }
+    if (check_numeric(self) < 0 || parse_system(system, &sys) < 0) {
+        return NULL;
+    }
+    if (block_size != Py_None) {
+        block = PyNumber_AsSsize_t(block_size, PyExc_OverflowError);
+        if (block == -1 && PyErr_Occurred()) {
+            return NULL;
+        }
+    }
+    if (block_size != Py_None && block <= 0) {
+        PyErr_SetString(PyExc_ValueError, "block_size must be positive");
+        return NULL;
+    }
+    b = (PyArrayObject *)PyArray_FROM_OTF(obj, NPY_DOUBLE, NPY_ARRAY_ALIGNED);
+    if (b == NULL) {
+        return NULL;
+    }
+    if (PyArray_NDIM(b) < 1 || PyArray_NDIM(b) > 2
+        || PyArray_DIM(b, 0) != n) {
+        PyErr_Format(PyExc_ValueError,
+                     "b must be a 1-D or 2-D array with %zd rows",
+                     (Py_ssize_t)n);
+        Py_DECREF(b);
+        return NULL;
+    }
+    if (!PyArray_IS_F_CONTIGUOUS(b) && !PyArray_IS_C_CONTIGUOUS(b)) {
+        Py_SETREF(b, (PyArrayObject *)PyArray_FROM_OTF(
+            (PyObject *)b, NPY_DOUBLE, NPY_ARRAY_F_CONTIGUOUS));
+        if (b == NULL) {
+            return NULL;
+        }
+    }
+    b_is_c = !PyArray_IS_F_CONTIGUOUS(b);
+
+    if (out == Py_None) {
+        x = (PyArrayObject *)PyArray_NewLikeArray(
+            b, b_is_c ? NPY_CORDER : NPY_FORTRANORDER, NULL, 0);
+        if (x == NULL) {
+            Py_DECREF(b);
+            return NULL;
+        }
+    }
+    else {
+        if (!PyArray_Check(out)
+            || PyArray_TYPE((PyArrayObject *)out) != NPY_DOUBLE
+            || !PyArray_SAMESHAPE((PyArrayObject *)out, b)
+            || !PyArray_ISWRITEABLE((PyArrayObject *)out)
+            || !PyArray_ISALIGNED((PyArrayObject *)out)
+            || (!PyArray_IS_F_CONTIGUOUS((PyArrayObject *)out)
+                && !PyArray_IS_C_CONTIGUOUS((PyArrayObject *)out))) {
+            PyErr_SetString(PyExc_ValueError,
+                            "out must be a writeable, contiguous float64 "
+                            "array with the shape of b");
+            Py_DECREF(b);
+            return NULL;
+        }
+        if (contiguous_overlap((PyArrayObject *)out, b)) {
+            PyErr_SetString(PyExc_ValueError,
+                            "out must not share memory with b");
+            Py_DECREF(b);
+            return NULL;
+        }
+        x = (PyArrayObject *)out;
+        Py_INCREF(x);
+    }
+    x_is_c = !PyArray_IS_F_CONTIGUOUS(x);
+
+    nrhs = PyArray_NDIM(b) == 2 ? PyArray_DIM(b, 1) : 1;
+    if (block == 0 || block > nrhs) {
+        block = nrhs > 0 ? nrhs : 1;
+    }
+    if (b_is_c) {
+        bbuf = PyMem_Malloc((size_t)(n * block) * sizeof(double));
+    }
+    if (x_is_c) {
+        xbuf = PyMem_Malloc((size_t)(n * block) * sizeof(double));
+    }
+    if ((b_is_c && bbuf == NULL) || (x_is_c && xbuf == NULL)) {
+        PyMem_Free(bbuf);
+        PyMem_Free(xbuf);
+        Py_DECREF(b);
+        Py_DECREF(x);
+        return PyErr_NoMemory();
+    }
+    bdata = PyArray_DATA(b);
+    xdata = PyArray_DATA(x);
+
+    ACQUIRE_LOCK(self);
+    Py_BEGIN_ALLOW_THREADS
+    for (k1 = 0; ok && k1 < nrhs; k1 += nk) {
+        nk = nrhs - k1 < block ? nrhs - k1 : block;
+        if (b_is_c) {
+            for (i = 0; i < n; i++) {
+                for (j = 0; j < nk; j++) {
+                    bbuf[i + j * n] = bdata[i * nrhs + k1 + j];
+                }
+            }
+            wrap_dense(bbuf, n, nk, &B);
+        }
+        else {
+            wrap_dense(bdata + k1 * n, n, nk, &B);
+        }
+        /* X has exactly the size and type cholmod_solve2 asks for, so it
+         * is written in place and never reallocated. */
+        wrap_dense(x_is_c ? xbuf : xdata + k1 * n, n, nk, &Xblock);
+        X = &Xblock;
+        ok = CHM(self, solve2, sys, self->L, &B, NULL, &X, NULL, &self->Y,
+                 &self->E, &self->common);
+        if (x_is_c && ok) {
+            for (i = 0; i < n; i++) {
+                for (j = 0; j < nk; j++) {
+                    xdata[i * nrhs + k1 + j] = xbuf[i + j * n];
+                }
+            }
+        }
+    }
+    Py_END_ALLOW_THREADS
+    RELEASE_LOCK(self);
+    PyMem_Free(bbuf);
+    PyMem_Free(xbuf);
+    Py_DECREF(b);
+    if (check_common(&self->common) < 0 || !ok) {
+        if (!PyErr_Occurred()) {
+            PyErr_SetString(CholmodError, "cholmod_solve2 failed");
+        }
+        Py_DECREF(x);
+        return NULL;
+    }
+    return (PyObject *)x;
+}
+
+/* Parse a scipy.sparse matrix with n rows and any number of columns into a
+ * real cholmod_sparse header, converted to CSC with the factor's index type.
+ * On success ``c`` and ``*x`` hold references the caller must release. */
+static int
+parse_columns(FactorObject *self, PyObject *obj, const char *name,
+              ss_compressed *c, PyArrayObject **x, cholmod_sparse *A)
+{
+    PyObject *csc = checked_tocsc(obj);
+
+    if (csc == NULL) {
+        return -1;
+    }
+    if (ss_parse_compressed_as(csc, NULL,
+                               self->is_long ? SS_NPY_LONG : NPY_INT, c) < 0) {
+        Py_DECREF(csc);
+        return -1;
+    }
+    if (c->nrow != self->n) {
+        PyErr_Format(PyExc_ValueError, "%s must have %zd rows", name,
+                     (Py_ssize_t)self->n);
+        goto fail;
+    }
+    if (ss_check_indices(c) < 0) {
+        goto fail;
+    }
+    *x = ss_values_array(csc, c->nnz);
+    if (*x == NULL) {
+        goto fail;
+    }
+    wrap_sparse(c, *x, 0, has_sorted_indices(csc), A);
+    Py_DECREF(csc);
+    return 0;
+fail:
+    ss_compressed_clear(c);
+    Py_DECREF(csc);
+    return -1;
+}
+
+/* scipy.sparse.csc_matrix holding a copy of a packed cholmod_sparse. */
+static PyObject *
+sparse_to_scipy(int is_long, const cholmod_sparse *A)
+{
+    npy_intp ncol1 = (npy_intp)A->ncol + 1, nnz;
+    int itype = is_long ? SS_NPY_LONG : NPY_INT;
+    PyArrayObject *indptr, *indices = NULL, *data = NULL;
+    PyObject *sparse, *result = NULL;
+
+    indptr = (PyArrayObject *)PyArray_SimpleNew(1, &ncol1, itype);
+    if (indptr == NULL) {
+        return NULL;
+    }
+    memcpy(PyArray_DATA(indptr), A->p, (size_t)PyArray_NBYTES(indptr));
+    nnz = ss_index_at(indptr, ncol1 - 1, is_long);
+    indices = (PyArrayObject *)PyArray_SimpleNew(1, &nnz, itype);
+    data = (PyArrayObject *)PyArray_SimpleNew(1, &nnz, NPY_DOUBLE);
+    if (indices == NULL || data == NULL) {
+        goto done;
+    }
+    memcpy(PyArray_DATA(indices), A->i, (size_t)PyArray_NBYTES(indices));
+    memcpy(PyArray_DATA(data), A->x, (size_t)PyArray_NBYTES(data));
+    sparse = PyImport_ImportModule("scipy.sparse");
+    if (sparse != NULL) {
+        result = PyObject_CallMethod(sparse, "csc_matrix", "(OOO)(nn)",
+                                     data, indices, indptr,
+                                     (Py_ssize_t)A->nrow,
+                                     (Py_ssize_t)A->ncol);
+        Py_DECREF(sparse);
+    }
+done:
+    Py_DECREF(indptr);
+    Py_XDECREF(indices);
+    Py_XDECREF(data);
+    return result;
+}
+
+PyDoc_STRVAR(spsolve_doc,
+"spsolve(B, *, system='A')\n"
+"--\n\n"
+"Solve A X = B for a sparse right-hand side by cholmod_spsolve.\n\n"
+"B is a scipy.sparse matrix with n rows; CSC index arrays of the factor's\n"
+"dtype are used in place, other inputs are converted.  system is as for\n"
+"solve().  Returns X as a scipy.sparse CSC matrix.");
+
+static PyObject *
+factor_spsolve(FactorObject *self, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"B", "system", NULL};
+    PyObject *obj, *result;
+    PyArrayObject *x;
+    const char *system = "A";
+    ss_compressed c;
+    cholmod_sparse B, *X;
+    int sys;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|$s:spsolve", kwlist,
+                                     &obj, &system)) {
+        return NULL;
+    }
+    if (check_numeric(self) < 0 || parse_system(system, &sys) < 0) {
+        return NULL;
+    }
+    if (parse_columns(self, obj, "B", &c, &x, &B) < 0) {
+        return NULL;
+    }
+
+    ACQUIRE_LOCK(self);
+    Py_BEGIN_ALLOW_THREADS
+    X = CHM(self, spsolve, sys, self->L, &B, &self->common);
+    Py_END_ALLOW_THREADS
+    RELEASE_LOCK(self);
+    Py_DECREF(x);
+    ss_compressed_clear(&c);
+    if (X == NULL) {
+        if (check_common(&self->common) == 0) {
+            PyErr_SetString(CholmodError, "cholmod_spsolve failed");
+        }
+        return NULL;
+    }
+    result = sparse_to_scipy(self->is_long, X);
+    CHM(self, free_sparse, &X, &self->common);
+    return result;
+}
+
+/* Row permutation P*C of a real sparse matrix with n rows, using the fill-
+ * reducing ordering of L as the Modify routines require.  Call with the
+ * factor's lock held. */
+static cholmod_sparse *
+permute_rows(FactorObject *self, cholmod_sparse *C)
+{
+    return CHM(self, submatrix, C, self->L->Perm, (SuiteSparse_long)self->n,
+               NULL, -1, 1, 1, &self->common);
+}
+
+/* Position of row ``k`` of A in the permuted matrix P*A*P'. */
+static npy_intp
+permuted_index(FactorObject *self, npy_intp k)
+{
+    npy_intp j;
+
+    for (j = 0; j < self->n; j++) {
+        if ((self->is_long ? (npy_intp)((SuiteSparse_long *)self->L->Perm)[j]
+                           : (npy_intp)((int *)self->L->Perm)[j]) == k) {
+            return j;
+        }
+    }
+    return -1;
+}
+
+static int
+check_row(FactorObject *self, Py_ssize_t k)
+{
+    if (k < 0 || k >= self->n) {
+        PyErr_Format(PyExc_IndexError,
+                     "row %zd out of range for a factor of order %zd",
+                     k, (Py_ssize_t)self->n);
+        return -1;
+    }
+    return 0;
+}
+
+/* Raise for a failed Modify call, or for a factor that is no longer
+ * positive definite after it. */
+static PyObject *
+modify_result(FactorObject *self, int ok, const char *name)
+{
+    if (check_common(&self->common) < 0 || !ok) {
+        if (!PyErr_Occurred()) {
+            PyErr_Format(CholmodError, "%s failed", name);
+        }
+        return NULL;
+    }
+    if (self->common.status == CHOLMOD_NOT_POSDEF) {
+        PyErr_SetString(NotPositiveDefiniteError,
+                        "modified matrix is not positive definite");
+        return NULL;
+    }
+    Py_RETURN_NONE;
+}
+
+PyDoc_STRVAR(update_doc,
+"update(C, *, downdate=False)\n"
+"--\n\n"
+"Rank-k update of the factor to that of A + C*C', or A - C*C' with\n"
+"downdate=True, by cholmod_updown.\n\n"
+"The cost is proportional to the number of entries of L that change,\n"
+"usually far less than a new factorize().  C is a scipy.sparse matrix\n"
+"with n rows in the ordering of A; it is permuted with ``perm`` here.\n"
+"A supernodal or LL' factor is first converted to simplicial LDL', and\n"
+"stays so.  Raises NotPositiveDefiniteError if a downdate leaves the\n"
+"matrix indefinite.");
+
+static PyObject *
+factor_update(FactorObject *self, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"C", "downdate", NULL};
+    PyObject *obj;
+    PyArrayObject *x;
+    ss_compressed c;
+    cholmod_sparse C, *PC;
+    int downdate = 0, ok = 0;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|$p:update", kwlist,
+                                     &obj, &downdate)) {
+        return NULL;
+    }
+    if (check_mutable(self) < 0 || check_numeric(self) < 0
+        || parse_columns(self, obj, "C", &c, &x, &C) < 0) {
+        return NULL;
+    }
+    ACQUIRE_LOCK(self);
+    Py_BEGIN_ALLOW_THREADS
+    PC = permute_rows(self, &C);
+    if (PC != NULL) {
+        ok = CHM(self, updown, !downdate, PC, self->L, &self->common);
+        CHM(self, free_sparse, &PC, &self->common);
+    }
+    Py_END_ALLOW_THREADS
+    RELEASE_LOCK(self);
+    Py_DECREF(x);
+    ss_compressed_clear(&c);
+    return modify_result(self, ok, "cholmod_updown");
+}
+
+PyDoc_STRVAR(rowadd_doc,
+"rowadd(k, r)\n"
+"--\n\n"
+"Add row and column k of A to the factor by cholmod_rowadd.\n\n"
+"Row and column k of the factored matrix must be those of the identity,\n"
+"as left by rowdel(k).  r is a scipy.sparse n-by-1 matrix holding the new\n"
+"column k of A, diagonal entry included.  k and r are in the ordering of\n"
+"A and are mapped through ``perm`` here.  The factor is converted to\n"
+"simplicial LDL' as for update().");
+
+static PyObject *
+factor_rowadd(FactorObject *self, PyObject *args)
+{
+    PyObject *obj;
+    PyArrayObject *x;
+    Py_ssize_t k;
+    npy_intp pk;
+    ss_compressed c;
+    cholmod_sparse R, *PR;
+    int ok = 0;
+
+    if (!PyArg_ParseTuple(args, "nO:rowadd", &k, &obj)) {
+        return NULL;
+    }
+    if (check_mutable(self) < 0 || check_numeric(self) < 0
+        || check_row(self, k) < 0
+        || parse_columns(self, obj, "r", &c, &x, &R) < 0) {
+        return NULL;
+    }
+    if (c.ncol != 1) {
+        PyErr_SetString(PyExc_ValueError, "r must have a single column");
+        Py_DECREF(x);
+        ss_compressed_clear(&c);
+        return NULL;
+    }
+    ACQUIRE_LOCK(self);
+    Py_BEGIN_ALLOW_THREADS
+    pk = permuted_index(self, k);
+    PR = permute_rows(self, &R);
+    if (PR != NULL) {
+        ok = CHM(self, rowadd, (size_t)pk, PR, self->L, &self->common);
+        CHM(self, free_sparse, &PR, &self->common);
+    }
+    Py_END_ALLOW_THREADS
+    RELEASE_LOCK(self);
+    Py_DECREF(x);
+    ss_compressed_clear(&c);
+    return modify_result(self, ok, "cholmod_rowadd");
+}
+
+PyDoc_STRVAR(rowdel_doc,
+"rowdel(k)\n"
+"--\n\n"
+"Delete row and column k of A from the factor by cholmod_rowdel.\n\n"
+"Afterwards the factor is that of A with row and column k replaced by\n"
+"those of the identity; rowadd(k, r) puts them back.  k is in the\n"
+"ordering of A.  The factor is converted to simplicial LDL' as for\n"
+"update().");
+
+static PyObject *
+factor_rowdel(FactorObject *self, PyObject *arg)
+{
+    Py_ssize_t k = PyNumber_AsSsize_t(arg, PyExc_IndexError);
+    npy_intp pk;
+    int ok;
+
+    if ((k == -1 && PyErr_Occurred()) || check_mutable(self) < 0
+        || check_numeric(self) < 0 || check_row(self, k) < 0) {
+        return NULL;
+    }
+    ACQUIRE_LOCK(self);
+    Py_BEGIN_ALLOW_THREADS
+    pk = permuted_index(self, k);
+    ok = CHM(self, rowdel, (size_t)pk, NULL, self->L, &self->common);
+    Py_END_ALLOW_THREADS
+    RELEASE_LOCK(self);
+    return modify_result(self, ok, "cholmod_rowdel");
+}
+
+PyDoc_STRVAR(copy_doc,
+"copy()\n"
+"--\n\n"
+"Return an independent copy of the factor, symbolic and numeric parts\n"
+"included, with the same options.");
+
+static PyObject *
+factor_copy(FactorObject *self, PyObject *Py_UNUSED(ignored))
+{
+    FactorObject *copy;
+
+    copy = factor_alloc(Py_TYPE(self), self->is_long, self->stype, self->n);
+    if (copy == NULL) {
+        return NULL;
+    }
+    copy_options(&copy->common, &self->common);
+    copy->common.lnz = self->common.lnz;
+    copy->common.fl = self->common.fl;
+    copy->common.anz = self->common.anz;
+    copy->analyze_time = self->analyze_time;
+    copy->factorize_time = self->factorize_time;
+    ACQUIRE_LOCK(self);
+    Py_BEGIN_ALLOW_THREADS
+    copy->L = CHM(copy, copy_factor, self->L, &copy->common);
+    Py_END_ALLOW_THREADS
+    RELEASE_LOCK(self);
+    if (copy->L == NULL) {
+        if (check_common(&copy->common) == 0) {
+            PyErr_SetString(CholmodError, "cholmod_copy_factor failed");
+        }
+        Py_DECREF(copy);
+        return NULL;
+    }
+    return (PyObject *)copy;
+}
+
+PyDoc_STRVAR(save_doc,
+"save(path)\n"
+"--\n\n"
+"Write the factor to a file that Factor.load() reads back.\n\n"
+"The cholmod_factor is stored as it is, symbolic or numeric, simplicial\n"
+"or supernodal, after a header: its arrays are written in native byte\n"
+"order, each aligned to 64 bytes, so that a mapped file can be used in\n"
+"place.  The analysis options are not stored.");
+
+static PyObject *
+factor_save(FactorObject *self, PyObject *arg)
+{
+    PyObject *path;
+    FILE *f;
+    int status = -1, saved_errno = 0;
+
+    if (!PyUnicode_FSConverter(arg, &path)) {
+        return NULL;
+    }
+    ACQUIRE_LOCK(self);
+    Py_BEGIN_ALLOW_THREADS
+    f = fopen(PyBytes_AS_STRING(path), "wb");
+    if (f != NULL) {
+        status = write_factor(f, self->L, self->stype);
+        saved_errno = errno;
+        if (fclose(f) != 0 && status == 0) {
+            status = -1;
+            saved_errno = errno;
+        }
+    }
+    else {
+        saved_errno = errno;
+    }
+    Py_END_ALLOW_THREADS
+    RELEASE_LOCK(self);
+    Py_DECREF(path);
+    if (status < 0) {
+        errno = saved_errno != 0 ? saved_errno : EIO;
+        return PyErr_SetFromErrnoWithFilenameObject(PyExc_OSError, arg);
+    }
+    Py_RETURN_NONE;
+}
+
+/* Map a whole file read-only into self->view, via numpy.memmap. */
+static int
+map_file(FactorObject *self, PyObject *filename)
+{
+    PyObject *numpy, *memmap = NULL, *args = NULL, *kwargs = NULL;
+    PyObject *mapped = NULL;
+    int status;
+
+    numpy = PyImport_ImportModule("numpy");
+    if (numpy != NULL) {
+        memmap = PyObject_GetAttrString(numpy, "memmap");
+        args = PyTuple_Pack(1, filename);
+        kwargs = Py_BuildValue("{s:s}", "mode", "r");
+        if (memmap != NULL && args != NULL && kwargs != NULL) {
+            mapped = PyObject_Call(memmap, args, kwargs);
+        }
+    }
+    Py_XDECREF(numpy);
+    Py_XDECREF(memmap);
+    Py_XDECREF(args);
+    Py_XDECREF(kwargs);
+    if (mapped == NULL) {
+        return -1;
+    }
+    status = PyObject_GetBuffer(mapped, &self->view, PyBUF_SIMPLE);
+    Py_DECREF(mapped);
+    return status;
+}
+
+/* Give self, allocated by tp_alloc, a cholmod_factor with the scalars of
+ * the header h and no arrays, for them to be read or mapped in. */
+static int
+factor_from_header(FactorObject *self, const file_header *h)
+{
+    cholmod_factor *L;
+    size_t isize;
+    int is_long = h->itype == CHOLMOD_LONG;
+
+    if (factor_init(self, is_long, h->stype, (npy_intp)h->n) < 0) {
+        return -1;
+    }
+    /* A fresh factor, without the Perm and ColCount it comes with. */
+    L = CHM(self, allocate_factor, (size_t)h->n, &self->common);
+    if (L == NULL) {
+        if (check_common(&self->common) == 0) {
+            PyErr_SetString(CholmodError, "cholmod_allocate_factor failed");
+        }
+        return -1;
+    }
+    isize = is_long ? sizeof(SuiteSparse_long) : sizeof(int);
+    CHM(self, free, L->n, isize, L->Perm, &self->common);
+    CHM(self, free, L->n, isize, L->ColCount, &self->common);
+    L->Perm = L->ColCount = NULL;
+    read_header(h, -1, L);
+    self->L = L;
+    /* the statistics of the analysis are not stored */
+    self->common.lnz = self->common.fl = self->common.anz = -1;
+    return 0;
+}
+
+/* Point a new factor at the file held in self->view, checking its header
+ * first. */
+static int
+map_factor(FactorObject *self)
+{
+    cholmod_factor header_L;
+    file_header h;
+    const char *msg;
+
+    memset(&header_L, 0, sizeof(header_L));
+    if (self->view.len < FILE_HEADER_SIZE) {
+        msg = "not a CHOLMOD factor file";
+    }
+    else if ((uintptr_t)self->view.buf % sizeof(double) != 0) {
+        msg = "factor buffer is not aligned to 8 bytes";
+    }
+    else {
+        memcpy(&h, self->view.buf, sizeof(h));
+        msg = read_header(&h, (int64_t)self->view.len, &header_L);
+    }
+    if (msg != NULL) {
+        PyErr_SetString(PyExc_ValueError, msg);
+        return -1;
+    }
+    if (factor_from_header(self, &h) < 0) {
+        return -1;
+    }
+    map_arrays(&h, self->view.buf, self->L);
+    return 0;
+}
+
+PyDoc_STRVAR(load_doc,
+"load(path, *, mmap=False)\n"
+"--\n\n"
+"Read a factor written by save().\n\n"
+"The index type and the symmetry of the factor are those it was saved\n"
+"with; the analysis options are CHOLMOD's defaults.  With mmap=True the\n"
+"file is mapped read-only and the factor points into it: loading takes\n"
+"no time, pages are read as solves touch them, and processes that map\n"
+"the same file share its pages, as with from_buffer().  A mapped factor\n"
+"can be solved with and copied but not modified: factorize(), update(),\n"
+"rowadd() and rowdel() raise ValueError, and work on a copy() instead.\n"
+"Only load files from trusted sources; they are checked for\n"
+"consistency, not validated.");
+
+static PyObject *
+factor_load(PyTypeObject *type, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"path", "mmap", NULL};
+    PyObject *filename, *path;
+    FactorObject *self = NULL;
+    cholmod_factor header_L;
+    file_header h;
+    const char *msg;
+    FILE *f = NULL;
+    int mmap = 0, status = 0, saved_errno = 0;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|$p:load", kwlist,
+                                     &filename, &mmap)) {
+        return NULL;
+    }
+    if (mmap) {
+        self = (FactorObject *)type->tp_alloc(type, 0);
+        if (self != NULL
+            && (map_file(self, filename) < 0 || map_factor(self) < 0)) {
+            Py_CLEAR(self);
+        }
+        return (PyObject *)self;
+    }
+    /* Read and check the header before allocating anything. */
+    if (!PyUnicode_FSConverter(filename, &path)) {
+        return NULL;
+    }
+    Py_BEGIN_ALLOW_THREADS
+    f = fopen(PyBytes_AS_STRING(path), "rb");
+    if (f == NULL) {
+        saved_errno = errno;
+    }
+    else if (fread(&h, sizeof(h), 1, f) != 1
+             || fseek(f, FILE_HEADER_SIZE, SEEK_SET) != 0) {
+        status = ferror(f) ? -1 : -2;
+        saved_errno = errno;
+    }
+    Py_END_ALLOW_THREADS
+    Py_DECREF(path);
+    if (f == NULL || status == -1) {
+        if (f != NULL) {
+            fclose(f);
+        }
+        errno = saved_errno != 0 ? saved_errno : EIO;
+        return PyErr_SetFromErrnoWithFilenameObject(PyExc_OSError, filename);
+    }
+    memset(&header_L, 0, sizeof(header_L));
+    msg = status == -2 ? "not a CHOLMOD factor file"
+                       : read_header(&h, -1, &header_L);
+    if (msg != NULL) {
+        PyErr_SetString(PyExc_ValueError, msg);
+        goto fail;
+    }
+
+    self = (FactorObject *)type->tp_alloc(type, 0);
+    if (self == NULL || factor_from_header(self, &h) < 0) {
+        goto fail;
+    }
+    Py_BEGIN_ALLOW_THREADS
+    status = read_arrays(f, &h, self->L, self->is_long, &self->common);
+    saved_errno = errno;
+    fclose(f);
+    Py_END_ALLOW_THREADS
+    f = NULL;
+    if (status == -1) {
+        errno = saved_errno != 0 ? saved_errno : EIO;
+        PyErr_SetFromErrnoWithFilenameObject(PyExc_OSError, filename);
+        goto fail;
+    }
+    if (status == -2) {
+        PyErr_SetString(PyExc_ValueError, "truncated factor file");
+        goto fail;
+    }
+    if (status == -3) {
+        PyErr_NoMemory();
+        goto fail;
+    }
+    return (PyObject *)self;
+
+fail:
+    if (f != NULL) {
+        fclose(f);
+    }
+    Py_XDECREF(self);
+    return NULL;
+}
+
+PyDoc_STRVAR(to_buffer_doc,
+"to_buffer(buffer)\n"
+"--\n\n"
+"Write the factor into a writable buffer, as save() writes it to a file.\n\n"
+"The buffer, e.g. the ``buf`` of a multiprocessing.shared_memory.\n"
+"SharedMemory or an mmap.mmap, must hold at least ``saved_nbytes``\n"
+"bytes.  Factor.from_buffer() then uses it in place.  Returns the number\n"
+"of bytes written.");
+
+static PyObject *
+factor_to_buffer(FactorObject *self, PyObject *arg)
+{
+    factor_array a[F_NARRAYS];
+    file_header h;
+    Py_buffer view;
+    int64_t size;
+
+    if (PyObject_GetBuffer(arg, &view, PyBUF_WRITABLE) < 0) {
+        return NULL;
+    }
+    ACQUIRE_LOCK(self);
+    size = factor_header(self->L, self->stype, &h, a);
+    if (view.len < size) {
+        RELEASE_LOCK(self);
+        PyErr_Format(PyExc_ValueError,
+                     "buffer of %zd bytes is too small for the factor, "
+                     "which needs %lld", view.len, (long long)size);
+        PyBuffer_Release(&view);
+        return NULL;
+    }
+    Py_BEGIN_ALLOW_THREADS
+    copy_factor(view.buf, &h, a);
+    Py_END_ALLOW_THREADS
+    RELEASE_LOCK(self);
+    PyBuffer_Release(&view);
+    return PyLong_FromLongLong((long long)size);
+}
+
+PyDoc_STRVAR(from_buffer_doc,
+"from_buffer(buffer)\n"
+"--\n\n"
+"Factor using in place a buffer written by to_buffer() or save().\n\n"
+"Nothing is copied: the factor points into the buffer and keeps it\n"
+"exported as long as it lives, so that it is read-only like a factor\n"
+"loaded with mmap=True.  A buffer in shared memory, or a file mapped by\n"
+"every process, lets a pool of processes solve with one copy of the\n"
+"factor: see suitesparse.SharedFactor.  The buffer must be aligned to 8\n"
+"bytes, and its contents must not change while the factor lives.");
+
+static PyObject *
+factor_from_buffer(PyTypeObject *type, PyObject *arg)
+{
+    FactorObject *self = (FactorObject *)type->tp_alloc(type, 0);
+
+    if (self == NULL) {
+        return NULL;
+    }
+    if (PyObject_GetBuffer(arg, &self->view, PyBUF_SIMPLE) < 0) {
+        self->view.buf = NULL;
+        Py_DECREF(self);
+        return NULL;
+    }
+    if (map_factor(self) < 0) {
+        Py_DECREF(self);
+        return NULL;
+    }
+    return (PyObject *)self;
+}
+
+static PyObject *
+factor_get_perm(FactorObject *self, void *closure)
+{
+    PyArrayObject *perm;
+    npy_intp n = self->n;
+
+    perm = (PyArrayObject *)PyArray_SimpleNew(
+        1, &n, self->is_long ? SS_NPY_LONG : NPY_INT);
+    if (perm != NULL) {
+        memcpy(PyArray_DATA(perm), self->L->Perm, (size_t)PyArray_NBYTES(perm));
+    }
+    return (PyObject *)perm;
+}
+
+static PyObject *
+factor_get_shape(FactorObject *self, void *closure)
+{
+    return Py_BuildValue("(nn)", (Py_ssize_t)self->n, (Py_ssize_t)self->n);
+}
+
+static PyObject *
+factor_get_is_super(FactorObject *self, void *closure)
+{
+    return PyBool_FromLong(self->L->is_super);
+}
+
+static PyObject *
+factor_get_is_ll(FactorObject *self, void *closure)
+{
+    return PyBool_FromLong(self->L->is_ll);
+}
+
+static PyObject *
+factor_get_nbytes(FactorObject *self, void *closure)
+{
+    return PyLong_FromSize_t(factor_nbytes(self->L));
+}
+
+static PyObject *
+factor_get_saved_nbytes(FactorObject *self, void *closure)
+{
+    factor_array a[F_NARRAYS];
+    file_header h;
+
+    return PyLong_FromLongLong(
+        (long long)factor_header(self->L, self->stype, &h, a));
+}
+
+static PyObject *
+factor_get_stats(FactorObject *self, void *closure)
+{
+    return factor_stats(self);
+}
+
+static PyObject *
+factor_get_memory(FactorObject *self, void *closure)
+{
+    return Py_BuildValue("{s:n,s:n,s:n}",
+                         "current", (Py_ssize_t)self->common.memory_inuse,
+                         "peak", (Py_ssize_t)self->common.memory_usage,
+                         "blocks", (Py_ssize_t)self->common.malloc_count);
+}
+
+static PyMethodDef factor_methods[] = {
+    {"factorize", (PyCFunction)(void (*)(void))factor_factorize,
+     METH_VARARGS | METH_KEYWORDS, factorize_doc},
+    {"solve", (PyCFunction)(void (*)(void))factor_solve,
+     METH_VARARGS | METH_KEYWORDS, solve_doc},
+    {"spsolve", (PyCFunction)(void (*)(void))factor_spsolve,
+     METH_VARARGS | METH_KEYWORDS, spsolve_doc},
+    {"update", (PyCFunction)(void (*)(void))factor_update,
+     METH_VARARGS | METH_KEYWORDS, update_doc},
+    {"rowadd", (PyCFunction)factor_rowadd, METH_VARARGS, rowadd_doc},
+    {"rowdel", (PyCFunction)factor_rowdel, METH_O, rowdel_doc},
+    {"copy", (PyCFunction)factor_copy, METH_NOARGS, copy_doc},
+    {"__copy__", (PyCFunction)factor_copy, METH_NOARGS, copy_doc},
+    {"save", (PyCFunction)factor_save, METH_O, save_doc},
+    {"load", (PyCFunction)(void (*)(void))factor_load,
+     METH_CLASS | METH_VARARGS | METH_KEYWORDS, load_doc},
+    {"to_buffer", (PyCFunction)factor_to_buffer, METH_O, to_buffer_doc},
+    {"from_buffer", (PyCFunction)factor_from_buffer, METH_CLASS | METH_O,
+     from_buffer_doc},
+    {NULL, NULL, 0, NULL}
+};
+
+static PyGetSetDef factor_getset[] = {
+    {"perm", (getter)factor_get_perm, NULL,
+     "Fill-reducing permutation chosen by the analysis.", NULL},
+    {"shape", (getter)factor_get_shape, NULL, "Shape of the matrix.", NULL},
+    {"is_super", (getter)factor_get_is_super, NULL,
+     "True for a supernodal factor.", NULL},
+    {"is_ll", (getter)factor_get_is_ll, NULL,
+     "True for an LL' factor, False for LDL'.", NULL},
+    {"nbytes", (getter)factor_get_nbytes, NULL,
+     "Bytes held by the arrays of the factor.", NULL},
+    {"saved_nbytes", (getter)factor_get_saved_nbytes, NULL,
+     "Bytes written by save() and to_buffer().", NULL},
+    {"stats", (getter)factor_get_stats, NULL,
+     "Statistics of the last analyze and factorize, from cholmod_common:\n"
+     "order of A ('n'), ordering chosen ('ordering'), whether L is\n"
+     "supernodal ('is_super'), entries in L, diagonal included ('lnz'),\n"
+     "floating-point operations of a numeric factorization ('flops'),\n"
+     "entries in the analyzed triangle of A ('anz'), peak and current\n"
+     "bytes of the factor's cholmod_common ('memory_usage',\n"
+     "'memory_inuse'), and wall-clock seconds of cholmod_analyze and\n"
+     "cholmod_factorize ('analyze_time', 'factorize_time').  -1 where\n"
+     "unknown, as for a loaded factor.  The same dict is passed to the\n"
+     "hook set by suitesparse.set_stats_hook after each call.", NULL},
+    {"memory", (getter)factor_get_memory, NULL,
+     "Memory counters of the factor's cholmod_common: bytes allocated\n"
+     "through it and still in use ('current'), their peak since the factor\n"
+     "was created ('peak') and the live blocks ('blocks').  Workspaces are\n"
+     "included, so 'peak' is the most the factor needed at once.", NULL},
+    {NULL, NULL, NULL, NULL, NULL}
+};
+
+static PyTypeObject FactorType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    .tp_name = "suitesparse.cholmod.Factor",
+    .tp_basicsize = sizeof(FactorObject),
+    .tp_dealloc = (destructor)factor_dealloc,
+    .tp_flags = Py_TPFLAGS_DEFAULT,
+    .tp_doc = factor_doc,
+    .tp_methods = factor_methods,
+    .tp_getset = factor_getset,
+    .tp_new = factor_new,
+};
+
+/* ------------------------------------------------------------------------ */
+/* Matrix Market */
+/* ------------------------------------------------------------------------ */
+
+static void
+free_block(PyObject *capsule)
+{
+    SuiteSparse_free(PyCapsule_GetPointer(capsule, "suitesparse.block"));
+}
+
+/* 1-D array of n items over a block allocated by SuiteSparse, which the
+ * array takes over: the block is freed with the array, or right away on
+ * failure. */
+static PyObject *
+own_block(void *block, npy_intp n, int typenum)
+{
+    PyObject *arr, *capsule;
+
+    arr = PyArray_SimpleNewFromData(1, &n, typenum, block);
+    if (arr == NULL) {
+        SuiteSparse_free(block);
+        return NULL;
+    }
+    capsule = PyCapsule_New(block, "suitesparse.block", free_block);
+    if (capsule == NULL) {
+        Py_DECREF(arr);
+        SuiteSparse_free(block);
+        return NULL;
+    }
+    /* Steals the capsule even on failure, which then frees the block. */
+    if (PyArray_SetBaseObject((PyArrayObject *)arr, capsule) < 0) {
+        Py_DECREF(arr);
+        return NULL;
+    }
+    return arr;
+}
+
+/* scipy.sparse matrix of class cls set up directly from its arrays, as the
+ * constructor may copy them to downcast the indices.  Steals the arrays. */
+static PyObject *
+scipy_from_arrays(const char *cls, size_t nrow, size_t ncol, int sorted,
+                  const char **names, PyObject **arrays, int narrays)
+{
+    PyObject *sparse, *result = NULL;
+    int k;
+
+    for (k = 0; k < narrays; k++) {
+        if (arrays[k] == NULL) {
+            goto done;
+        }
+    }
+    sparse = PyImport_ImportModule("scipy.sparse");
+    if (sparse == NULL) {
+        goto done;
+    }
+    result = PyObject_CallMethod(sparse, cls, "((nn))", (Py_ssize_t)nrow,
+                                 (Py_ssize_t)ncol);
+    Py_DECREF(sparse);
+    for (k = 0; result != NULL && k < narrays; k++) {
+        if (PyObject_SetAttrString(result, names[k], arrays[k]) < 0) {
+            Py_CLEAR(result);
+        }
+    }
+    if (result != NULL && sorted
+        && PyObject_SetAttrString(result, "has_sorted_indices", Py_True) < 0) {
+        Py_CLEAR(result);
+    }
+done:
+    for (k = 0; k < narrays; k++) {
+        Py_XDECREF(arrays[k]);
+    }
+    return result;
+}
+
+/* Python object for what cholmod_read_matrix returned, taking over its
+ * arrays.  The CHOLMOD object is freed in any case. */
+static PyObject *
+read_result(void *G, int mtype, int is_long, cholmod_common *c)
+{
+    static const char *csc_names[] = {"indptr", "indices", "data"};
+    static const char *coo_names[] = {"row", "col", "data"};
+    int itype = is_long ? SS_NPY_LONG : NPY_INT;
+    PyObject *arrays[3], *result;
+
+    if (mtype == CHOLMOD_SPARSE) {
+        cholmod_sparse *A = G;
+        npy_intp nnz = is_long ? (npy_intp)((SuiteSparse_long *)A->p)[A->ncol]
+                               : (npy_intp)((int *)A->p)[A->ncol];
+        arrays[0] = own_block(A->p, (npy_intp)A->ncol + 1, itype);
+        arrays[1] = own_block(A->i, nnz, itype);
+        arrays[2] = own_block(A->x, nnz, A->xtype == CHOLMOD_COMPLEX
+                                         ? NPY_CDOUBLE : NPY_DOUBLE);
+        A->p = A->i = A->x = NULL;
+        result = scipy_from_arrays("csc_matrix", A->nrow, A->ncol, A->sorted,
+                                   csc_names, arrays, 3);
+        CHM_IS(is_long, free_sparse, &A, c);
+    }
+    else if (mtype == CHOLMOD_TRIPLET) {
+        cholmod_triplet *T = G;
+        arrays[0] = own_block(T->i, (npy_intp)T->nnz, itype);
+        arrays[1] = own_block(T->j, (npy_intp)T->nnz, itype);
+        arrays[2] = own_block(T->x, (npy_intp)T->nnz,
+                              T->xtype == CHOLMOD_COMPLEX ? NPY_CDOUBLE
+                                                          : NPY_DOUBLE);
+        T->i = T->j = T->x = NULL;
+        result = scipy_from_arrays("coo_matrix", T->nrow, T->ncol, 0,
+                                   coo_names, arrays, 3);
+        CHM_IS(is_long, free_triplet, &T, c);
+    }
+    else {
+        cholmod_dense *X = G;
+        npy_intp dims[2] = {(npy_intp)X->nrow, (npy_intp)X->ncol};
+        PyArray_Dims shape = {dims, 2};
+        /* Read dense matrices have leading dimension nrow. */
+        arrays[0] = own_block(X->x, dims[0] * dims[1],
+                              X->xtype == CHOLMOD_COMPLEX ? NPY_CDOUBLE
+                                                          : NPY_DOUBLE);
+        X->x = NULL;
+        result = arrays[0] == NULL ? NULL
+            : PyArray_Newshape((PyArrayObject *)arrays[0], &shape,
+                               NPY_FORTRANORDER);
+        Py_XDECREF(arrays[0]);
+        CHM_IS(is_long, free_dense, &X, c);
+    }
+    return result;
+}
+
+PyDoc_STRVAR(mmread_doc,
+"mmread(path, *, index_dtype=numpy.int32, format='csc', expand=False)\n"
+"--\n\n"
+"Read a Matrix Market file with CHOLMOD's reader.\n\n"
+"The file is parsed in C without holding the GIL, and the arrays CHOLMOD\n"
+"builds are handed to numpy as they are; nothing is copied.\n\n"
+"Parameters\n"
+"----------\n"
+"path : str or path-like\n"
+"    A Matrix Market file, or a file in CHOLMOD's triplet format.\n"
+"index_dtype : int32 or int64\n"
+"    Index type of the result, which selects the CHOLMOD flavour.\n"
+"format : {'csc', 'coo'}\n"
+"    'csc' gives a CSC matrix with sorted indices and no duplicates, the\n"
+"    form Factor and umfpack use without conversion.  'coo' gives the\n"
+"    entries as stored, one triangle for symmetric files.\n"
+"expand : bool\n"
+"    For 'csc': store both triangles of symmetric and Hermitian matrices.\n"
+"    By default they keep their upper triangle only, which Factor reads as\n"
+"    symmetric; skew-symmetric and complex symmetric matrices are always\n"
+"    expanded.\n\n"
+"Returns\n"
+"-------\n"
+"A : scipy.sparse matrix or ndarray\n"
+"    Files in Matrix Market 'array' format give a Fortran-ordered ndarray.\n"
+"    Complex files give complex128 values.  Pattern-only files are given\n"
+"    values as CHOLMOD does: ones if unsymmetric; for symmetric patterns\n"
+"    -1 off the diagonal and 1 plus the degree on it, which is positive\n"
+"    definite.");
+
+static PyObject *
+mmread(PyObject *self, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"path", "index_dtype", "format", "expand", NULL};
+    PyObject *filename, *path;
+    PyArray_Descr *dtype = NULL;
+    const char *format = "csc";
+    int expand = 0, prefer, mtype = 0, is_long, saved_errno = 0;
+    cholmod_common c;
+    void *G = NULL;
+    FILE *f;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|$O&sp:mmread", kwlist,
+                                     &filename, PyArray_DescrConverter2,
+                                     &dtype, &format, &expand)) {
+        return NULL;
+    }
+    if (!PyUnicode_FSConverter(filename, &path)) {
+        Py_XDECREF(dtype);
+        return NULL;
+    }
+    if (dtype == NULL || PyArray_EquivTypenums(dtype->type_num, NPY_INT)) {
+        is_long = 0;
+    }
+    else if (PyArray_EquivTypenums(dtype->type_num, SS_NPY_LONG)) {
+        is_long = 1;
+    }
+    else {
+        PyErr_Format(PyExc_ValueError,
+                     "index_dtype must be int32 or int64, not %S", dtype);
+        goto fail;
+    }
+    if (strcmp(format, "csc") == 0) {
+        prefer = expand ? 1 : 2;
+    }
+    else if (strcmp(format, "coo") == 0 && !expand) {
+        prefer = 0;
+    }
+    else {
+        PyErr_SetString(PyExc_ValueError,
+                        strcmp(format, "coo") == 0
+                        ? "expand is only supported with format='csc'"
+                        : "format must be 'csc' or 'coo'");
+        goto fail;
+    }
+
+    CHM_IS(is_long, start, &c);
+    c.print = 0;
+    Py_BEGIN_ALLOW_THREADS
+    f = fopen(PyBytes_AS_STRING(path), "r");
+    if (f == NULL) {
+        saved_errno = errno;
+    }
+    else {
+        G = CHM_IS(is_long, read_matrix, f, prefer, &mtype, &c);
+        fclose(f);
+    }
+    Py_END_ALLOW_THREADS
+    if (f == NULL) {
+        errno = saved_errno;
+        PyErr_SetFromErrnoWithFilenameObject(PyExc_OSError, filename);
+    }
+    else if (check_common(&c) == 0 && G == NULL) {
+        PyErr_SetString(PyExc_ValueError, "not a valid Matrix Market file");
+    }
+    if (G == NULL) {
+        CHM_IS(is_long, finish, &c);
+        goto fail;
+    }
+    Py_DECREF(path);
+    Py_XDECREF(dtype);
+    {
+        PyObject *result = read_result(G, mtype, is_long, &c);
+        CHM_IS(is_long, finish, &c);
+        return result;
+    }
+fail:
+    Py_DECREF(path);
+    Py_XDECREF(dtype);
+    return NULL;
+}
+
+PyDoc_STRVAR(mmwrite_doc,
+"mmwrite(path, A, *, symmetric=False)\n"
+"--\n\n"
+"Write a real sparse matrix to a Matrix Market file with CHOLMOD's writer.\n\n"
+"A is a scipy.sparse matrix; a CSC matrix is written from its arrays\n"
+"without a copy, other formats are converted first.  The GIL is released\n"
+"while writing.  CHOLMOD detects symmetric and\n"
+"skew-symmetric matrices and writes one triangle of them.  With\n"
+"symmetric=True only the upper triangle of A is read, as Factor does, and\n"
+"the matrix is written as symmetric.");
+
+static PyObject *
+mmwrite(PyObject *self, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"path", "A", "symmetric", NULL};
+    PyObject *filename, *path, *obj, *csc;
+    PyArrayObject *x;
+    int symmetric = 0, ok = 0, saved_errno = 0;
+    ss_compressed m;
+    cholmod_sparse A;
+    cholmod_common c;
+    FILE *f;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "OO|$p:mmwrite", kwlist,
+                                     &filename, &obj, &symmetric)) {
+        return NULL;
+    }
+    csc = checked_tocsc(obj);
+    if (csc == NULL) {
+        return NULL;
+    }
+    if ((symmetric ? ss_parse_square_as(csc, NULL, -1, &m)
+                   : ss_parse_compressed_as(csc, NULL, -1, &m)) < 0) {
+        Py_DECREF(csc);
+        return NULL;
+    }
+    if (ss_check_indices(&m) < 0) {
+        ss_compressed_clear(&m);
+        Py_DECREF(csc);
+        return NULL;
+    }
+    x = ss_values_array(csc, m.nnz);
+    if (x == NULL || !PyUnicode_FSConverter(filename, &path)) {
+        Py_XDECREF(x);
+        ss_compressed_clear(&m);
+        Py_DECREF(csc);
+        return NULL;
+    }
+    wrap_sparse(&m, x, symmetric, has_sorted_indices(csc), &A);
+
+    CHM_IS(m.is_long, start, &c);
+    c.print = 0;
+    Py_BEGIN_ALLOW_THREADS
+    f = fopen(PyBytes_AS_STRING(path), "w");
+    if (f == NULL) {
+        saved_errno = errno;
+    }
+    else {
+        ok = CHM_IS(m.is_long, write_sparse, f, &A, NULL, NULL, &c) >= 0;
+        saved_errno = errno;
+        if (fclose(f) != 0 && ok) {
+            ok = 0;
+            saved_errno = errno;
+        }
+    }
+    Py_END_ALLOW_THREADS
+    /* A failed write leaves the status OK, a rejected matrix does not. */
+    if (!ok && (f == NULL || check_common(&c) == 0)) {
+        errno = saved_errno != 0 ? saved_errno : EIO;
+        PyErr_SetFromErrnoWithFilenameObject(PyExc_OSError, filename);
+    }
+    CHM_IS(m.is_long, finish, &c);
+    Py_DECREF(path);
+    Py_DECREF(x);
+    ss_compressed_clear(&m);
+    Py_DECREF(csc);
+    if (PyErr_Occurred()) {
+        return NULL;
+    }
+    Py_RETURN_NONE;
+}
+
+/* ------------------------------------------------------------------------ */
+/* BLAS */
+/* ------------------------------------------------------------------------ */
+
+/* setup.py defines SUITESPARSE_BLAS_VENDOR and SUITESPARSE_BLAS_<VENDOR> for
+ * the BLAS the supernodal module is linked against. */
+#ifndef SUITESPARSE_BLAS_VENDOR
+#define SUITESPARSE_BLAS_VENDOR "unknown"
+#endif
+
+#if defined(SUITESPARSE_BLAS_OPENBLAS)
+extern int openblas_get_num_threads(void);
+extern void openblas_set_num_threads(int);
+extern char *openblas_get_config(void);
+#elif defined(SUITESPARSE_BLAS_MKL)
+extern int MKL_Get_Max_Threads(void);
+extern void MKL_Set_Num_Threads(int);
+extern void MKL_Get_Version_String(char *, int);
+#elif defined(SUITESPARSE_BLAS_BLIS)
+extern int64_t bli_thread_get_num_threads(void);
+extern void bli_thread_set_num_threads(int64_t);
+#endif
+
+PyDoc_STRVAR(blas_info_doc,
+"blas_info()\n"
+"--\n\n"
+"Describe the BLAS used by the supernodal kernels.\n\n"
+"Returns a dict with the build-time 'vendor' (openblas, mkl, blis,\n"
+"accelerate, flexiblas, atlas, reference, or unknown when the build\n"
+"could not tell), the current 'num_threads' (None if the BLAS cannot\n"
+"report it) and a vendor-specific 'config' string or None.");
+
+static PyObject *
+blas_info(PyObject *self, PyObject *Py_UNUSED(ignored))
+{
+    PyObject *num_threads = Py_None, *config = Py_None, *result;
+
+    Py_INCREF(num_threads);
+    Py_INCREF(config);
+#if defined(SUITESPARSE_BLAS_OPENBLAS)
+    Py_SETREF(num_threads, PyLong_FromLong(openblas_get_num_threads()));
+    Py_SETREF(config, PyUnicode_FromString(openblas_get_config()));
+#elif defined(SUITESPARSE_BLAS_MKL)
+    {
+        char version[256];
+        MKL_Get_Version_String(version, (int)sizeof(version));
+        version[sizeof(version) - 1] = '\0';
+        Py_SETREF(num_threads, PyLong_FromLong(MKL_Get_Max_Threads()));
+        Py_SETREF(config, PyUnicode_FromString(version));
+    }
+#elif defined(SUITESPARSE_BLAS_BLIS)
+    Py_SETREF(num_threads,
+              PyLong_FromLongLong((long long)bli_thread_get_num_threads()));
+#elif defined(SUITESPARSE_BLAS_REFERENCE)
+    Py_SETREF(num_threads, PyLong_FromLong(1));
+#endif
+    if (num_threads == NULL || config == NULL) {
+        Py_XDECREF(num_threads);
+        Py_XDECREF(config);
+        return NULL;
+    }
+    result = Py_BuildValue("{s:s,s:N,s:N}", "vendor", SUITESPARSE_BLAS_VENDOR,
+                           "num_threads", num_threads, "config", config);
+    return result;
+}
+
+PyDoc_STRVAR(set_blas_num_threads_doc,
+"set_blas_num_threads(n)\n"
+"--\n\n"
+"Set the number of threads of the BLAS, for BLAS libraries that support\n"
+"it (OpenBLAS, MKL and BLIS).  Raises NotImplementedError otherwise.");
+
+static PyObject *
+set_blas_num_threads(PyObject *self, PyObject *arg)
+{
+    long n = PyLong_AsLong(arg);
+
+    if (n == -1 && PyErr_Occurred()) {
+        return NULL;
+    }
+    if (n < 1) {
+        PyErr_SetString(PyExc_ValueError, "n must be positive");
+        return NULL;
+    }
+    if (n > INT_MAX) {
+        PyErr_SetString(PyExc_OverflowError, "n is too large");
+        return NULL;
+    }
+#if defined(SUITESPARSE_BLAS_OPENBLAS)
+    openblas_set_num_threads((int)n);
+#elif defined(SUITESPARSE_BLAS_MKL)
+    MKL_Set_Num_Threads((int)n);
+#elif defined(SUITESPARSE_BLAS_BLIS)
+    bli_thread_set_num_threads((int64_t)n);
+#else
+    PyErr_Format(PyExc_NotImplementedError,
+                 "cannot set the number of threads of the %s BLAS",
+                 SUITESPARSE_BLAS_VENDOR);
+    return NULL;
+#endif
+    Py_RETURN_NONE;
+}
+
+/* ------------------------------------------------------------------------ */
+/* Matrix operations (MatrixOps) */
+/* ------------------------------------------------------------------------ */
+
+/* Parse a real scipy.sparse matrix of any shape into an unsymmetric
+ * cholmod_sparse header over its arrays.  A CSR matrix is wrapped as its
+ * transpose when ``allow_csr`` is set; other formats are converted to CSC.
+ * typenum forces the index type, -1 keeps that of the input.  On success
+ * ``c`` and ``*x`` hold references the caller must release. */
+static int
+parse_real(PyObject *obj, const char *name, int typenum, int allow_csr,
+           ss_compressed *c, PyArrayObject **x, cholmod_sparse *A)
+{
+    PyObject *format, *m;
+    int is_csr = 0;
+
+    format = PyObject_GetAttrString(obj, "format");
+    if (format == NULL) {
+        PyErr_Clear();
+        PyErr_Format(PyExc_TypeError, "%s must be a scipy.sparse matrix",
+                     name);
+        return -1;
+    }
+    is_csr = PyUnicode_Check(format)
+             && PyUnicode_CompareWithASCIIString(format, "csr") == 0;
+    Py_DECREF(format);
+    if (is_csr && allow_csr) {
+        m = obj;
+        Py_INCREF(m);
+    }
+    else if ((m = checked_tocsc(obj)) == NULL) {
+        return -1;
+    }
+    if (ss_parse_compressed_as(m, NULL, typenum, c) < 0) {
+        Py_DECREF(m);
+        return -1;
+    }
+    if (ss_check_indices(c) < 0) {
+        ss_compressed_clear(c);
+        Py_DECREF(m);
+        return -1;
+    }
+    *x = ss_values_array(m, c->nnz);
+    if (*x == NULL) {
+        ss_compressed_clear(c);
+        Py_DECREF(m);
+        return -1;
+    }
+    wrap_sparse(c, *x, 0, has_sorted_indices(m), A);
+    Py_DECREF(m);
+    return 0;
+}
+
+/* Index array of ``name`` with entries in 0..n-1, or NULL with *out NULL
+ * for None. */
+static int
+parse_index_set(PyObject *obj, npy_intp n, int is_long, const char *name,
+                PyArrayObject **out)
+{
+    npy_intp k, i;
+
+    *out = NULL;
+    if (obj == Py_None) {
+        return 0;
+    }
+    *out = ss_index_array_cast(obj, is_long ? SS_NPY_LONG : NPY_INT, name);
+    if (*out == NULL) {
+        return -1;
+    }
+    for (k = 0; k < PyArray_DIM(*out, 0); k++) {
+        i = ss_index_at(*out, k, is_long);
+        if (i < 0 || i >= n) {
+            PyErr_Format(PyExc_IndexError, "%s index %zd out of range",
+                         name, (Py_ssize_t)i);
+            Py_CLEAR(*out);
+            return -1;
+        }
+    }
+    return 0;
+}
+
+/* Return value of a MatrixOps call: C as a scipy.sparse CSC matrix with
+ * sorted indices, or the CHOLMOD error if C is NULL.  Frees C and finishes
+ * the common. */
+static PyObject *
+sparse_result(int is_long, cholmod_sparse *C, const char *name,
+              cholmod_common *cm)
+{
+    PyObject *result = NULL;
+
+    if (C == NULL) {
+        if (check_common(cm) == 0) {
+            PyErr_Format(CholmodError, "cholmod_%s failed", name);
+        }
+    }
+    else {
+        if (!C->sorted) {
+            CHM_IS(is_long, sort, C, cm);
+        }
+        result = sparse_to_scipy(is_long, C);
+        CHM_IS(is_long, free_sparse, &C, cm);
+    }
+    CHM_IS(is_long, finish, cm);
+    return result;
+}
+
+PyDoc_STRVAR(sdmult_doc,
+"sdmult(A, X, *, transpose=False, alpha=1.0, beta=0.0, out=None)\n"
+"--\n\n"
+"Sparse times dense: ``alpha * A @ X + beta * out``, or with A' if\n"
+"transpose is true, by cholmod_sdmult.\n\n"
+"A is a scipy.sparse matrix; the arrays of a CSC or CSR matrix are used\n"
+"in place, other formats are converted.  X is a 1-D array or a 2-D array\n"
+"with one column per right-hand side; a Fortran-contiguous float64 X is\n"
+"read in place, others are copied once.  All columns are multiplied in\n"
+"one call with the GIL released.\n\n"
+"out, if given, is a Fortran-contiguous float64 array of the shape of the\n"
+"result, updated in place (and read when beta is nonzero).  Returns out,\n"
+"or a new Fortran-ordered array.");
+
+static PyObject *
+sdmult_py(PyObject *module, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"A", "X", "transpose", "alpha", "beta", "out",
+                             NULL};
+    PyObject *obj, *X_obj, *out = Py_None;
+    PyArrayObject *x, *X, *Y;
+    double alpha[2] = {1.0, 0.0}, beta[2] = {0.0, 0.0};
+    int transpose = 0, ok;
+    npy_intp nrow, ncol, nrhs, dims[2];
+    ss_compressed c;
+    cholmod_common cm;
+    cholmod_sparse A;
+    cholmod_dense Xd, Yd;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "OO|$pddO:sdmult", kwlist,
+                                     &obj, &X_obj, &transpose, &alpha[0],
+                                     &beta[0], &out)) {
+        return NULL;
+    }
+    if (parse_real(obj, "A", -1, 1, &c, &x, &A) < 0) {
+        return NULL;
+    }
+    /* a CSR matrix is held as its transpose */
+    if (c.is_csr) {
+        transpose = !transpose;
+    }
+    nrow = transpose ? (npy_intp)A.ncol : (npy_intp)A.nrow;
+    ncol = transpose ? (npy_intp)A.nrow : (npy_intp)A.ncol;
+    X = (PyArrayObject *)PyArray_FROM_OTF(
+        X_obj, NPY_DOUBLE, NPY_ARRAY_F_CONTIGUOUS | NPY_ARRAY_ALIGNED);
+    if (X == NULL) {
+        goto fail;
+    }
+    if (PyArray_NDIM(X) < 1 || PyArray_NDIM(X) > 2
+        || PyArray_DIM(X, 0) != ncol) {
+        PyErr_Format(PyExc_ValueError,
+                     "X must be a 1-D or 2-D array with %zd rows",
+                     (Py_ssize_t)ncol);
+        Py_DECREF(X);
+        goto fail;
+    }
+    nrhs = PyArray_NDIM(X) == 2 ? PyArray_DIM(X, 1) : 1;
+    dims[0] = nrow;
+    dims[1] = nrhs;
+    if (out == Py_None) {
+        Y = (PyArrayObject *)PyArray_ZEROS(PyArray_NDIM(X), dims, NPY_DOUBLE,
+                                           1);
+    }
+    else if (!PyArray_Check(out)
+             || PyArray_TYPE((PyArrayObject *)out) != NPY_DOUBLE
+             || PyArray_NDIM((PyArrayObject *)out) != PyArray_NDIM(X)
+             || !PyArray_CompareLists(PyArray_DIMS((PyArrayObject *)out),
+                                      dims, PyArray_NDIM(X))
+             || !PyArray_IS_F_CONTIGUOUS((PyArrayObject *)out)
+             || !PyArray_ISWRITEABLE((PyArrayObject *)out)
+             || !PyArray_ISALIGNED((PyArrayObject *)out)) {
+        PyErr_SetString(PyExc_ValueError,
+                        "out must be a writeable, Fortran-contiguous "
+                        "float64 array of the shape of the result");
+        Y = NULL;
+    }
+    else {
+        Y = (PyArrayObject *)out;
+        Py_INCREF(Y);
+    }
+    if (Y == NULL) {
+        Py_DECREF(X);
+        goto fail;
+    }
+
+    wrap_dense(PyArray_DATA(X), ncol, nrhs, &Xd);
+    wrap_dense(PyArray_DATA(Y), nrow, nrhs, &Yd);
+    CHM_IS(c.is_long, start, &cm);
+    cm.print = 0;
+    Py_BEGIN_ALLOW_THREADS
+    ok = CHM_IS(c.is_long, sdmult, &A, transpose, alpha, beta, &Xd, &Yd,
+                &cm);
+    Py_END_ALLOW_THREADS
+    if (!ok && check_common(&cm) == 0) {
+        PyErr_SetString(CholmodError, "cholmod_sdmult failed");
+    }
+    CHM_IS(c.is_long, finish, &cm);
+    Py_DECREF(X);
+    Py_DECREF(x);
+    ss_compressed_clear(&c);
+    if (!ok) {
+        Py_DECREF(Y);
+        return NULL;
+    }
+    return (PyObject *)Y;
+
+fail:
+    Py_DECREF(x);
+    ss_compressed_clear(&c);
+    return NULL;
+}
+
+PyDoc_STRVAR(ssmult_doc,
+"ssmult(A, B)\n"
+"--\n\n"
+"Sparse times sparse: ``A @ B`` by cholmod_ssmult, with the GIL released.\n\n"
+"A and B are scipy.sparse matrices, used in place when CSC (B is\n"
+"converted to the index dtype of A if needed).  Returns a CSC matrix\n"
+"with sorted indices.");
+
+static PyObject *
+ssmult_py(PyObject *module, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"A", "B", NULL};
+    PyObject *objA, *objB;
+    PyArrayObject *xA, *xB;
+    ss_compressed a, b;
+    cholmod_common cm;
+    cholmod_sparse A, B, *C = NULL;
+    int match;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "OO:ssmult", kwlist,
+                                     &objA, &objB)) {
+        return NULL;
+    }
+    if (parse_real(objA, "A", -1, 0, &a, &xA, &A) < 0) {
+        return NULL;
+    }
+    if (parse_real(objB, "B", a.is_long ? SS_NPY_LONG : NPY_INT, 0, &b,
+                   &xB, &B) < 0) {
+        Py_DECREF(xA);
+        ss_compressed_clear(&a);
+        return NULL;
+    }
+    match = A.ncol == B.nrow;
+    if (!match) {
+        PyErr_Format(PyExc_ValueError,
+                     "dimension mismatch: A has %zd columns, B %zd rows",
+                     (Py_ssize_t)A.ncol, (Py_ssize_t)B.nrow);
+    }
+    else {
+        CHM_IS(a.is_long, start, &cm);
+        cm.print = 0;
+        Py_BEGIN_ALLOW_THREADS
+        C = CHM_IS(a.is_long, ssmult, &A, &B, 0, 1, 1, &cm);
+        Py_END_ALLOW_THREADS
+    }
+    Py_DECREF(xA);
+    Py_DECREF(xB);
+    ss_compressed_clear(&a);
+    ss_compressed_clear(&b);
+    if (!match) {
+        return NULL;
+    }
+    return sparse_result(a.is_long, C, "ssmult", &cm);
+}
+
+PyDoc_STRVAR(aat_doc,
+"aat(A, *, columns=None)\n"
+"--\n\n"
+"``A @ A.T`` by cholmod_aat, with the GIL released: the normal-equations\n"
+"matrix, ready for Factor.\n\n"
+"A is a scipy.sparse matrix, used in place when CSC.  columns, if given,\n"
+"restricts the product to those columns of A: ``A[:, f] @ A[:, f].T``.\n"
+"Returns the symmetric result, both triangles, as a CSC matrix with\n"
+"sorted indices.");
+
+static PyObject *
+aat_py(PyObject *module, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"A", "columns", NULL};
+    PyObject *obj, *fset_obj = Py_None;
+    PyArrayObject *x, *fset;
+    ss_compressed c;
+    cholmod_common cm;
+    cholmod_sparse A, *C;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|$O:aat", kwlist, &obj,
+                                     &fset_obj)) {
+        return NULL;
+    }
+    if (parse_real(obj, "A", -1, 0, &c, &x, &A) < 0) {
+        return NULL;
+    }
+    if (parse_index_set(fset_obj, c.ncol, c.is_long, "columns", &fset) < 0) {
+        Py_DECREF(x);
+        ss_compressed_clear(&c);
+        return NULL;
+    }
+    CHM_IS(c.is_long, start, &cm);
+    cm.print = 0;
+    Py_BEGIN_ALLOW_THREADS
+    C = CHM_IS(c.is_long, aat, &A, fset == NULL ? NULL : PyArray_DATA(fset),
+               fset == NULL ? 0 : (size_t)PyArray_DIM(fset, 0), 1, &cm);
+    Py_END_ALLOW_THREADS
+    Py_XDECREF(fset);
+    Py_DECREF(x);
+    ss_compressed_clear(&c);
+    return sparse_result(c.is_long, C, "aat", &cm);
+}
+
+PyDoc_STRVAR(submatrix_doc,
+"submatrix(A, rows=None, cols=None)\n"
+"--\n\n"
+"``A[rows][:, cols]`` by cholmod_submatrix, with the GIL released.\n\n"
+"A is a scipy.sparse matrix, used in place when CSC.  rows and cols are\n"
+"integer arrays, which may repeat indices; None takes all rows or\n"
+"columns.  Returns a CSC matrix with sorted indices.");
+
+static PyObject *
+submatrix_py(PyObject *module, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"A", "rows", "cols", NULL};
+    PyObject *obj, *rows_obj = Py_None, *cols_obj = Py_None;
+    PyArrayObject *x, *rows, *cols = NULL;
+    ss_compressed c;
+    cholmod_common cm;
+    cholmod_sparse A, *C;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|OO:submatrix", kwlist,
+                                     &obj, &rows_obj, &cols_obj)) {
+        return NULL;
+    }
+    if (parse_real(obj, "A", -1, 0, &c, &x, &A) < 0) {
+        return NULL;
+    }
+    if (parse_index_set(rows_obj, c.nrow, c.is_long, "rows", &rows) < 0
+        || parse_index_set(cols_obj, c.ncol, c.is_long, "cols", &cols) < 0) {
+        Py_XDECREF(rows);
+        Py_DECREF(x);
+        ss_compressed_clear(&c);
+        return NULL;
+    }
+    CHM_IS(c.is_long, start, &cm);
+    cm.print = 0;
+    Py_BEGIN_ALLOW_THREADS
+    C = CHM_IS(c.is_long, submatrix, &A,
+               rows == NULL ? NULL : PyArray_DATA(rows),
+               rows == NULL ? -1 : (SuiteSparse_long)PyArray_DIM(rows, 0),
+               cols == NULL ? NULL : PyArray_DATA(cols),
+               cols == NULL ? -1 : (SuiteSparse_long)PyArray_DIM(cols, 0),
+               1, 1, &cm);
+    Py_END_ALLOW_THREADS
+    Py_XDECREF(rows);
+    Py_XDECREF(cols);
+    Py_DECREF(x);
+    ss_compressed_clear(&c);
+    return sparse_result(c.is_long, C, "submatrix", &cm);
+}
+
+PyDoc_STRVAR(horzcat_doc,
+"horzcat(A, B)\n"
+"--\n\n"
+"``[A, B]`` by cholmod_horzcat, with the GIL released.  A and B are\n"
+"scipy.sparse matrices with the same number of rows, used in place when\n"
+"CSC.  Returns a CSC matrix.");
+
+PyDoc_STRVAR(vertcat_doc,
+"vertcat(A, B)\n"
+"--\n\n"
+"``[A; B]`` by cholmod_vertcat, with the GIL released.  A and B are\n"
+"scipy.sparse matrices with the same number of columns, used in place\n"
+"when CSC.  Returns a CSC matrix.");
+
+static PyObject *
+concatenate(PyObject *args, int vertical)
+{
+    PyObject *objA, *objB;
+    PyArrayObject *xA, *xB;
+    ss_compressed a, b;
+    cholmod_common cm;
+    cholmod_sparse A, B, *C = NULL;
+    int match;
+
+    if (!PyArg_ParseTuple(args, vertical ? "OO:vertcat" : "OO:horzcat",
+                          &objA, &objB)) {
+        return NULL;
+    }
+    if (parse_real(objA, "A", -1, 0, &a, &xA, &A) < 0) {
+        return NULL;
+    }
+    if (parse_real(objB, "B", a.is_long ? SS_NPY_LONG : NPY_INT, 0, &b,
+                   &xB, &B) < 0) {
+        Py_DECREF(xA);
+        ss_compressed_clear(&a);
+        return NULL;
+    }
+    match = vertical ? A.ncol == B.ncol : A.nrow == B.nrow;
+    if (!match) {
+        PyErr_Format(PyExc_ValueError,
+                     "dimension mismatch: A has %zd %s, B %zd",
+                     (Py_ssize_t)(vertical ? A.ncol : A.nrow),
+                     vertical ? "columns" : "rows",
+                     (Py_ssize_t)(vertical ? B.ncol : B.nrow));
+    }
+    else {
+        CHM_IS(a.is_long, start, &cm);
+        cm.print = 0;
+        Py_BEGIN_ALLOW_THREADS
+        C = vertical ? CHM_IS(a.is_long, vertcat, &A, &B, 1, &cm)
+                     : CHM_IS(a.is_long, horzcat, &A, &B, 1, &cm);
+        Py_END_ALLOW_THREADS
+    }
+    Py_DECREF(xA);
+    Py_DECREF(xB);
+    ss_compressed_clear(&a);
+    ss_compressed_clear(&b);
+    if (!match) {
+        return NULL;
+    }
+    return sparse_result(a.is_long, C, vertical ? "vertcat" : "horzcat",
+                         &cm);
+}
+
+static PyObject *
+horzcat_py(PyObject *module, PyObject *args)
+{
+    return concatenate(args, 0);
+}
+
+static PyObject *
+vertcat_py(PyObject *module, PyObject *args)
+{
+    return concatenate(args, 1);
+}
+
+PyDoc_STRVAR(scale_doc,
+"scale(A, s, *, mode='row')\n"
+"--\n\n"
+"Scale A in place by cholmod_scale, with the GIL released.\n\n"
+"A is a scipy.sparse CSC or CSR matrix with float64 data, which is\n"
+"overwritten.  mode is 'scalar' (A = s*A, s a number), 'row'\n"
+"(A = diag(s)*A), 'col' (A = A*diag(s)) or 'sym' (A = diag(s)*A*diag(s),\n"
+"A square).");
+
+static PyObject *
+scale_py(PyObject *module, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"A", "s", "mode", NULL};
+    static const struct {
+        const char *name;
+        int value;
+    } modes[] = {
+        {"scalar", CHOLMOD_SCALAR}, {"row", CHOLMOD_ROW},
+        {"col", CHOLMOD_COL}, {"sym", CHOLMOD_SYM},
+    };
+    PyObject *obj, *s_obj, *data;
+    PyArrayObject *x, *s;
+    const char *mode_name = "row";
+    int mode = -1, ok;
+    size_t k;
+    npy_intp len;
+    ss_compressed c;
+    cholmod_common cm;
+    cholmod_sparse A;
+    cholmod_dense S;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "OO|$s:scale", kwlist, &obj,
+                                     &s_obj, &mode_name)) {
+        return NULL;
+    }
+    for (k = 0; k < sizeof(modes) / sizeof(modes[0]); k++) {
+        if (strcmp(mode_name, modes[k].name) == 0) {
+            mode = modes[k].value;
+        }
+    }
+    if (mode < 0) {
+        PyErr_Format(PyExc_ValueError, "unknown scale mode '%s'", mode_name);
+        return NULL;
+    }
+    if (ss_parse_compressed(obj, NULL, &c) < 0) {
+        return NULL;
+    }
+    if (ss_check_indices(&c) < 0) {
+        ss_compressed_clear(&c);
+        return NULL;
+    }
+    x = ss_values_array(obj, c.nnz);
+    data = x == NULL ? NULL : PyObject_GetAttrString(obj, "data");
+    if (data != NULL && ((PyObject *)x != data || !PyArray_ISWRITEABLE(x))) {
+        PyErr_SetString(PyExc_TypeError,
+                        "A.data must be a writeable contiguous float64 "
+                        "array to be scaled in place");
+        Py_CLEAR(data);
+    }
+    Py_XDECREF(data);
+    if (data == NULL) {
+        Py_XDECREF(x);
+        ss_compressed_clear(&c);
+        return NULL;
+    }
+    wrap_sparse(&c, x, 0, 1, &A);
+    /* a CSR matrix is held as its transpose */
+    if (c.is_csr && mode == CHOLMOD_ROW) {
+        mode = CHOLMOD_COL;
+    }
+    else if (c.is_csr && mode == CHOLMOD_COL) {
+        mode = CHOLMOD_ROW;
+    }
+    len = mode == CHOLMOD_SCALAR ? 1
+        : mode == CHOLMOD_ROW ? (npy_intp)A.nrow : (npy_intp)A.ncol;
+    s = (PyArrayObject *)PyArray_FROM_OTF(s_obj, NPY_DOUBLE,
+                                          NPY_ARRAY_IN_ARRAY);
+    if (s != NULL && (PyArray_SIZE(s) != len
+                      || (mode == CHOLMOD_SYM && A.nrow != A.ncol))) {
+        PyErr_Format(PyExc_ValueError,
+                     mode == CHOLMOD_SYM && A.nrow != A.ncol
+                     ? "mode 'sym' needs a square matrix"
+                     : "s must have %zd entries", (Py_ssize_t)len);
+        Py_CLEAR(s);
+    }
+    if (s == NULL) {
+        Py_DECREF(x);
+        ss_compressed_clear(&c);
+        return NULL;
+    }
+    wrap_dense(PyArray_DATA(s), len, 1, &S);
+    CHM_IS(c.is_long, start, &cm);
+    cm.print = 0;
+    Py_BEGIN_ALLOW_THREADS
+    ok = CHM_IS(c.is_long, scale, &S, mode, &A, &cm);
+    Py_END_ALLOW_THREADS
+    if (!ok && check_common(&cm) == 0) {
+        PyErr_SetString(CholmodError, "cholmod_scale failed");
+    }
+    CHM_IS(c.is_long, finish, &cm);
+    Py_DECREF(s);
+    Py_DECREF(x);
+    ss_compressed_clear(&c);
+    if (!ok) {
+        return NULL;
+    }
+    Py_RETURN_NONE;
+}
+
+PyDoc_STRVAR(norm_doc,
+"norm(A, ord=1)\n"
+"--\n\n"
+"1-norm (largest column sum of absolute values) or, with\n"
+"``ord=numpy.inf``, infinity-norm (largest row sum) of A, by\n"
+"cholmod_norm_sparse.  A is a scipy.sparse matrix, used in place when\n"
+"CSC or CSR.");
+
+static PyObject *
+norm_py(PyObject *module, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"A", "ord", NULL};
+    PyObject *obj;
+    PyArrayObject *x;
+    double ord = 1.0, result;
+    int which;
+    ss_compressed c;
+    cholmod_common cm;
+    cholmod_sparse A;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|d:norm", kwlist, &obj,
+                                     &ord)) {
+        return NULL;
+    }
+    if (ord != 1.0 && !Py_IS_INFINITY(ord)) {
+        PyErr_SetString(PyExc_ValueError, "ord must be 1 or numpy.inf");
+        return NULL;
+    }
+    if (parse_real(obj, "A", -1, 1, &c, &x, &A) < 0) {
+        return NULL;
+    }
+    /* 0 is the infinity-norm; a CSR matrix is held as its transpose */
+    which = (ord == 1.0) != c.is_csr;
+    CHM_IS(c.is_long, start, &cm);
+    cm.print = 0;
+    Py_BEGIN_ALLOW_THREADS
+    result = CHM_IS(c.is_long, norm_sparse, &A, which, &cm);
+    Py_END_ALLOW_THREADS
+    CHM_IS(c.is_long, finish, &cm);
+    Py_DECREF(x);
+    ss_compressed_clear(&c);
+    if (result < 0) {
+        if (check_common(&cm) == 0) {
+            PyErr_SetString(CholmodError, "cholmod_norm_sparse failed");
+        }
+        return NULL;
+    }
+    return PyFloat_FromDouble(result);
+}
+
+/* ------------------------------------------------------------------------ */
+/* Schur complement */
+/* ------------------------------------------------------------------------ */
+
+/* Store v at position k of an index array of int or SuiteSparse_long. */
+static void
+set_index(void *arr, npy_intp k, npy_intp v, int is_long)
+{
+    if (is_long) {
+        ((SuiteSparse_long *)arr)[k] = (SuiteSparse_long)v;
+    }
+    else {
+        ((int *)arr)[k] = (int)v;
+    }
+}
+
+/* The interior rows/columns of a matrix of order n: those not in the
+ * interface B, in increasing order.  Checks that B holds distinct indices
+ * in range. */
+static PyArrayObject *
+interior_indices(PyArrayObject *B, npy_intp n, int is_long)
+{
+    npy_intp nB = PyArray_DIM(B, 0), nI = n - nB, k, j;
+    PyArrayObject *I;
+    char *mark;
+
+    mark = PyMem_Calloc((size_t)n + 1, 1);
+    if (mark == NULL) {
+        return (PyArrayObject *)PyErr_NoMemory();
+    }
+    for (k = 0; k < nB; k++) {
+        j = ss_index_at(B, k, is_long);
+        if (j < 0 || j >= n || mark[j]) {
+            PyMem_Free(mark);
+            PyErr_SetString(PyExc_ValueError,
+                            "interface must hold distinct indices of rows "
+                            "of A");
+            return NULL;
+        }
+        mark[j] = 1;
+    }
+    I = (PyArrayObject *)PyArray_SimpleNew(1, &nI,
+                                           is_long ? SS_NPY_LONG : NPY_INT);
+    if (I != NULL) {
+        for (j = 0, k = 0; j < n; j++) {
+            if (!mark[j]) {
+                set_index(PyArray_DATA(I), k++, j, is_long);
+            }
+        }
+    }
+    PyMem_Free(mark);
+    return I;
+}
+
+/* Entry k of an index array of int or SuiteSparse_long. */
+static npy_intp
+get_index(const void *arr, npy_intp k, int is_long)
+{
+    return is_long ? (npy_intp)((const SuiteSparse_long *)arr)[k]
+                   : (npy_intp)((const int *)arr)[k];
+}
+
+/* Drop from the packed matrix F the entries whose row and column are both
+ * marked in isB. */
+static void
+drop_interface_block(cholmod_sparse *F, const char *isB, int is_long)
+{
+    double *Fx = F->x;
+    npy_intp j, p, p1, i, nz = 0;
+
+    for (j = 0, p = 0; j < (npy_intp)F->ncol; j++) {
+        p1 = get_index(F->p, j + 1, is_long);
+        for (; p < p1; p++) {
+            i = get_index(F->i, p, is_long);
+            if (!(isB[i] && isB[j])) {
+                set_index(F->i, nz, i, is_long);
+                Fx[nz++] = Fx[p];
+            }
+        }
+        set_index(F->p, j + 1, nz, is_long);
+    }
+}
+
+/* S = A_BB - A_BI inv(A_II) A_IB of the symmetric matrix A, by a
+ * factorization that stops at the interface.  The interior is ordered
+ * first, by the fill-reducing ordering of A_II, and the interface last, in
+ * the order of B.  Factorizing A with its A_BB block dropped then gives
+ * L_II and L_BI; at the first interface column the pivot is -|L_BI(k,:)|^2
+ * (times D), so an LL' factorization stops there, and an LDL' one computes
+ * the rest of the interface rows without the interior columns needing it.
+ * S = A_BB - L_BI D_I L_BI' (D = I for LL') is the update the interface
+ * block would have received, so S need not be positive definite.  The
+ * ordering chosen for A_II and the interior column that failed, if any,
+ * are returned in *ordering and *minor.  Call without the GIL. */
+static cholmod_sparse *
+schur_complement(cholmod_sparse *A, void *I, size_t nI, void *B, size_t nB,
+                 int is_long, int *ordering, size_t *minor,
+                 cholmod_common *cm)
+{
+    double one[2] = {1.0, 0.0}, minus_one[2] = {-1.0, 0.0}, lnz, fl;
+    size_t isize = is_long ? sizeof(SuiteSparse_long) : sizeof(int);
+    size_t n = nI + nB, k;
+    cholmod_sparse *F, *A_II = NULL, *A_BB = NULL, *Lsp = NULL;
+    cholmod_sparse *L_BI = NULL, *W = NULL, *Lt = NULL, *WLt = NULL;
+    cholmod_sparse *S = NULL;
+    cholmod_dense *D = NULL;
+    cholmod_factor *L = NULL;
+    void *P = NULL, *seq = NULL, *rows;
+    char *isB = NULL;
+    int supernodal, is_ll;
+
+    *ordering = CHOLMOD_NATURAL;
+    *minor = nI;
+    /* both triangles, so that the blocks can be taken by submatrix */
+    F = CHM_IS(is_long, copy, A, 0, 1, cm);
+    if (F == NULL) {
+        goto done;
+    }
+    A_BB = CHM_IS(is_long, submatrix, F, B, (SuiteSparse_long)nB, B,
+                  (SuiteSparse_long)nB, 1, 1, cm);
+    if (A_BB == NULL || nI == 0) {
+        S = A_BB;
+        A_BB = NULL;
+        goto done;
+    }
+
+    /* the ordering of the interior, from a symbolic analysis of A_II */
+    A_II = CHM_IS(is_long, submatrix, F, I, (SuiteSparse_long)nI, I,
+                  (SuiteSparse_long)nI, 1, 1, cm);
+    if (A_II == NULL) {
+        goto done;
+    }
+    A_II->stype = 1;
+    supernodal = cm->supernodal;
+    cm->supernodal = CHOLMOD_SIMPLICIAL;
+    L = CHM_IS(is_long, analyze, A_II, cm);
+    cm->supernodal = supernodal;
+    P = SuiteSparse_malloc(n, isize);
+    seq = SuiteSparse_malloc(n, isize);
+    isB = SuiteSparse_calloc(n, 1);
+    if (L == NULL || P == NULL || seq == NULL || isB == NULL) {
+        if (cm->status == CHOLMOD_OK) {
+            cm->status = CHOLMOD_OUT_OF_MEMORY;
+        }
+        goto done;
+    }
+    *ordering = L->ordering;
+    lnz = cm->lnz;
+    fl = cm->fl;
+    for (k = 0; k < nI; k++) {
+        set_index(P, (npy_intp)k,
+                  get_index(I, get_index(L->Perm, (npy_intp)k, is_long),
+                            is_long), is_long);
+    }
+    for (k = 0; k < nB; k++) {
+        npy_intp j = get_index(B, (npy_intp)k, is_long);
+        set_index(P, (npy_intp)(nI + k), j, is_long);
+        isB[j] = 1;
+    }
+    for (k = 0; k < n; k++) {
+        set_index(seq, (npy_intp)k, (npy_intp)k, is_long);
+    }
+    CHM_IS(is_long, free_factor, &L, cm);
+
+    /* one factorization of A without A_BB, in exactly that order */
+    drop_interface_block(F, isB, is_long);
+    F->stype = 1;
+    cm->nmethods = 1;
+    cm->method[0].ordering = CHOLMOD_GIVEN;
+    cm->postorder = 0;
+    cm->quick_return_if_not_posdef = 0;
+    L = CHM_IS(is_long, analyze_p, F, P, NULL, 0, cm);
+    if (L == NULL) {
+        goto done;
+    }
+    CHM_IS(is_long, factorize, F, L, cm);
+    if (cm->status < CHOLMOD_OK) {
+        goto done;
+    }
+    if (L->minor < nI) {
+        *minor = L->minor;
+        cm->status = CHOLMOD_NOT_POSDEF;
+        goto done;
+    }
+    /* failing past the interior is expected */
+    cm->status = CHOLMOD_OK;
+    /* the statistics are those of the interior */
+    cm->lnz = lnz;
+    cm->fl = fl;
+
+    is_ll = L->is_ll;
+    Lsp = CHM_IS(is_long, factor_to_sparse, L, cm);
+    if (Lsp == NULL) {
+        goto done;
+    }
+    /* rows nI..n-1 are the interface, columns 0..nI-1 the interior */
+    rows = (char *)seq + nI * isize;
+    L_BI = CHM_IS(is_long, submatrix, Lsp, rows, (SuiteSparse_long)nB, seq,
+                  (SuiteSparse_long)nI, 1, 1, cm);
+    if (L_BI == NULL) {
+        goto done;
+    }
+    if (is_ll) {
+        W = L_BI;
+    }
+    else {
+        /* the first entry of each column of an LDL' factor is D */
+        D = CHM_IS(is_long, allocate_dense, nI, 1, nI, CHOLMOD_REAL, cm);
+        W = CHM_IS(is_long, copy_sparse, L_BI, cm);
+        if (D == NULL || W == NULL) {
+            goto done;
+        }
+        for (k = 0; k < nI; k++) {
+            ((double *)D->x)[k] = ((double *)Lsp->x)[
+                get_index(Lsp->p, (npy_intp)k, is_long)];
+        }
+        if (!CHM_IS(is_long, scale, D, CHOLMOD_COL, W, cm)) {
+            goto done;
+        }
+    }
+    Lt = CHM_IS(is_long, transpose, L_BI, 1, cm);
+    if (Lt == NULL) {
+        goto done;
+    }
+    WLt = CHM_IS(is_long, ssmult, W, Lt, 0, 1, 1, cm);
+    if (WLt == NULL) {
+        goto done;
+    }
+    S = CHM_IS(is_long, add, A_BB, WLt, one, minus_one, 1, 1, cm);
+
+done:
+    SuiteSparse_free(P);
+    SuiteSparse_free(seq);
+    SuiteSparse_free(isB);
+    if (W != L_BI) {
+        CHM_IS(is_long, free_sparse, &W, cm);
+    }
+    CHM_IS(is_long, free_dense, &D, cm);
+    CHM_IS(is_long, free_factor, &L, cm);
+    CHM_IS(is_long, free_sparse, &F, cm);
+    CHM_IS(is_long, free_sparse, &A_II, cm);
+    CHM_IS(is_long, free_sparse, &A_BB, cm);
+    CHM_IS(is_long, free_sparse, &Lsp, cm);
+    CHM_IS(is_long, free_sparse, &L_BI, cm);
+    CHM_IS(is_long, free_sparse, &Lt, cm);
+    CHM_IS(is_long, free_sparse, &WLt, cm);
+    return S;
+}
+
+/* Fortran-ordered float64 array of a packed real cholmod_sparse. */
+static PyObject *
+sparse_to_ndarray(int is_long, const cholmod_sparse *A)
+{
+    npy_intp dims[2] = {(npy_intp)A->nrow, (npy_intp)A->ncol}, j, p;
+    PyArrayObject *x;
+    const double *Ax = A->x;
+    double *xdata;
+
+    x = (PyArrayObject *)PyArray_ZEROS(2, dims, NPY_DOUBLE, 1);
+    if (x == NULL) {
+        return NULL;
+    }
+    xdata = PyArray_DATA(x);
+    for (j = 0; j < dims[1]; j++) {
+        npy_intp p1 = is_long ? (npy_intp)((SuiteSparse_long *)A->p)[j + 1]
+                              : (npy_intp)((int *)A->p)[j + 1];
+        p = is_long ? (npy_intp)((SuiteSparse_long *)A->p)[j]
+                    : (npy_intp)((int *)A->p)[j];
+        for (; p < p1; p++) {
+            npy_intp i = is_long ? (npy_intp)((SuiteSparse_long *)A->i)[p]
+                                 : (npy_intp)((int *)A->i)[p];
+            xdata[i + j * dims[0]] = Ax[p];
+        }
+    }
+    return (PyObject *)x;
+}
+
+PyDoc_STRVAR(schur_doc,
+"schur(A, interface, *, lower=False, sparse=False, supernodal='auto',\n"
+"      ordering='default', info=False)\n"
+"--\n\n"
+"Schur complement of the interior block of a symmetric matrix.\n\n"
+"With B the interface rows/columns and I the others, returns\n"
+"``S = A[B, B] - A[B, I] inv(A[I, I]) A[I, B]`` without forming the\n"
+"inverse or solving with the columns of A[I, B].  The interior is\n"
+"ordered first, by the fill-reducing ordering of A[I, I], and the\n"
+"interface last; one factorization of A, stopped at the interface,\n"
+"gives the interior columns of L, and S is A[B, B] minus the update\n"
+"those columns make to the interface block: L_BI L_BI', or L_BI D_I\n"
+"L_BI' for LDL'.  So S need not be positive definite, as for a\n"
+"floating subdomain.  The GIL is released meanwhile.\n\n"
+"Parameters\n"
+"----------\n"
+"A : scipy.sparse CSC or CSR matrix\n"
+"    Symmetric matrix, of which only the upper triangle is used, or the\n"
+"    lower one if ``lower`` is true.  A[I, I] must be positive definite\n"
+"    for an LL' factorization; a simplicial LDL' one only needs nonzero\n"
+"    pivots.\n"
+"interface : array_like of int\n"
+"    Distinct indices of the interface rows/columns, in the order of the\n"
+"    rows and columns of S.\n"
+"lower : bool, optional\n"
+"    Use the lower instead of the upper triangle of A.\n"
+"sparse : bool, optional\n"
+"    Return S as a scipy.sparse CSC matrix instead of a dense array.\n"
+"supernodal, ordering : str, optional\n"
+"    Factorization method and fill-reducing ordering of A[I, I], as for\n"
+"    Factor (except 'auto' and 'given' orderings).\n"
+"info : bool, optional\n"
+"    Also return a dict with the order of the interior and interface\n"
+"    blocks ('n_interior', 'n_interface'), the 'ordering', 'lnz' and\n"
+"    'flops' of the factorization of A[I, I], the entries of S ('nnz')\n"
+"    and the wall-clock 'time'.  The same dict is passed to the hook set\n"
+"    by suitesparse.set_stats_hook.\n\n"
+"Returns\n"
+"-------\n"
+"S : ndarray or scipy.sparse.csc_matrix\n"
+"    The symmetric Schur complement, both triangles, Fortran-ordered if\n"
+"    dense.\n\n"
+"Raises NotPositiveDefiniteError if the factorization of A[I, I] fails\n"
+"for lack of positive definiteness.");
+
+static PyObject *
+schur(PyObject *module, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"A", "interface", "lower", "sparse",
+                             "supernodal", "ordering", "info", NULL};
+    PyObject *obj, *B_obj, *result = NULL, *stats = NULL;
+    PyArrayObject *x = NULL, *B = NULL, *I = NULL;
+    const char *supernodal = "auto", *ordering = "default";
+    int lower = 0, sparse = 0, info = 0;
+    npy_intp n, nB;
+    double time;
+    ss_compressed c;
+    cholmod_common cm;
+    cholmod_sparse A, *S;
+    size_t minor;
+    int interior_ordering;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "OO|$ppssp:schur", kwlist,
+                                     &obj, &B_obj, &lower, &sparse,
+                                     &supernodal, &ordering, &info)) {
+        return NULL;
+    }
+    if (ss_parse_square(obj, NULL, &c) < 0) {
+        return NULL;
+    }
+    if (ss_check_indices(&c) < 0) {
+        ss_compressed_clear(&c);
+        return NULL;
+    }
+    n = c.ncol;
+    x = ss_values_array(obj, c.nnz);
+    if (x == NULL) {
+        ss_compressed_clear(&c);
+        return NULL;
+    }
+    B = ss_index_array_cast(B_obj, c.is_long ? SS_NPY_LONG : NPY_INT,
+                            "interface");
+    if (B == NULL || (I = interior_indices(B, n, c.is_long)) == NULL) {
+        Py_XDECREF(B);
+        Py_DECREF(x);
+        ss_compressed_clear(&c);
+        return NULL;
+    }
+    nB = PyArray_DIM(B, 0);
+
+    CHM_IS(c.is_long, start, &cm);
+    cm.print = 0;
+    if (set_supernodal(&cm, supernodal) < 0
+        || set_ordering(&cm, ordering, 0) < 0) {
+        goto done;
+    }
+    wrap_sparse(&c, x, lower ? -1 : 1, has_sorted_indices(obj), &A);
+    Py_BEGIN_ALLOW_THREADS
+    time = SuiteSparse_time();
+    S = schur_complement(&A, PyArray_DATA(I), (size_t)(n - nB),
+                         PyArray_DATA(B), (size_t)nB, c.is_long,
+                         &interior_ordering, &minor, &cm);
+    time = SuiteSparse_time() - time;
+    Py_END_ALLOW_THREADS
+
+    if (S == NULL) {
+        if (cm.status == CHOLMOD_NOT_POSDEF) {
+            PyErr_Format(NotPositiveDefiniteError,
+                         "interior block is not positive definite "
+                         "(leading minor %zd of the ordered interior)",
+                         (Py_ssize_t)minor);
+        }
+        else if (check_common(&cm) == 0) {
+            PyErr_SetString(CholmodError, "Schur complement failed");
+        }
+        goto done;
+    }
+    result = sparse ? sparse_to_scipy(c.is_long, S)
+                    : sparse_to_ndarray(c.is_long, S);
+    if (result != NULL && ss_want_stats(info)) {
+        stats = Py_BuildValue(
+            "{s:n,s:n,s:s,s:d,s:d,s:n,s:d}",
+            "n_interior", (Py_ssize_t)(n - nB),
+            "n_interface", (Py_ssize_t)nB,
+            "ordering", ordering_name(interior_ordering),
+            "lnz", n == nB ? 0.0 : cm.lnz,
+            "flops", n == nB ? 0.0 : cm.fl,
+            "nnz", (Py_ssize_t)CHM_IS(c.is_long, nnz, S, &cm),
+            "time", time);
+        if (stats == NULL) {
+            Py_CLEAR(result);
+        }
+    }
+    CHM_IS(c.is_long, free_sparse, &S, &cm);
+
+done:
+    CHM_IS(c.is_long, finish, &cm);
+    Py_DECREF(I);
+    Py_DECREF(B);
+    Py_DECREF(x);
+    ss_compressed_clear(&c);
+    if (result == NULL) {
+        return NULL;
+    }
+    return ss_return_stats("cholmod.schur", result, stats, info);
+}
+
+/* ------------------------------------------------------------------------ */
+/* module */
+/* ------------------------------------------------------------------------ */
+
+static PyMethodDef cholmod_methods[] = {
+    {"mmread", (PyCFunction)(void (*)(void))mmread,
+     METH_VARARGS | METH_KEYWORDS, mmread_doc},
+    {"mmwrite", (PyCFunction)(void (*)(void))mmwrite,
+     METH_VARARGS | METH_KEYWORDS, mmwrite_doc},
+    {"sdmult", (PyCFunction)(void (*)(void))sdmult_py,
+     METH_VARARGS | METH_KEYWORDS, sdmult_doc},
+    {"ssmult", (PyCFunction)(void (*)(void))ssmult_py,
+     METH_VARARGS | METH_KEYWORDS, ssmult_doc},
+    {"aat", (PyCFunction)(void (*)(void))aat_py,
+     METH_VARARGS | METH_KEYWORDS, aat_doc},
+    {"submatrix", (PyCFunction)(void (*)(void))submatrix_py,
+     METH_VARARGS | METH_KEYWORDS, submatrix_doc},
+    {"horzcat", (PyCFunction)horzcat_py, METH_VARARGS, horzcat_doc},
+    {"vertcat", (PyCFunction)vertcat_py, METH_VARARGS, vertcat_doc},
+    {"scale", (PyCFunction)(void (*)(void))scale_py,
+     METH_VARARGS | METH_KEYWORDS, scale_doc},
+    {"norm", (PyCFunction)(void (*)(void))norm_py,
+     METH_VARARGS | METH_KEYWORDS, norm_doc},
+    {"schur", (PyCFunction)(void (*)(void))schur,
+     METH_VARARGS | METH_KEYWORDS, schur_doc},
+    {"blas_info", (PyCFunction)blas_info, METH_NOARGS, blas_info_doc},
+    {"set_blas_num_threads", (PyCFunction)set_blas_num_threads, METH_O,
+     set_blas_num_threads_doc},
+    {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef cholmod_module = {
+    PyModuleDef_HEAD_INIT,
+    "suitesparse.cholmod",
+    "CHOLMOD: sparse Cholesky factorization.",
+    -1,
+    cholmod_methods,
+};
+
+PyMODINIT_FUNC
+PyInit_cholmod(void)
+{
+    PyObject *m;
+
+    import_array();
+    if (PyType_Ready(&FactorType) < 0) {
+        return NULL;
+    }
+    m = PyModule_Create(&cholmod_module);
+    if (m == NULL) {
+        return NULL;
+    }
+    CholmodError = PyErr_NewExceptionWithDoc(
+        "suitesparse.cholmod.CholmodError",
+        "Error reported by CHOLMOD.", PyExc_RuntimeError, NULL);
+    NotPositiveDefiniteError = PyErr_NewExceptionWithDoc(
+        "suitesparse.cholmod.NotPositiveDefiniteError",
+        "The matrix to factorize is not positive definite.",
+        CholmodError, NULL);
+    if (CholmodError == NULL || NotPositiveDefiniteError == NULL
+        || PyModule_AddObjectRef(m, "CholmodError", CholmodError) < 0
+        || PyModule_AddObjectRef(m, "NotPositiveDefiniteError",
+                                 NotPositiveDefiniteError) < 0
+        || PyModule_AddObjectRef(m, "Factor", (PyObject *)&FactorType) < 0
+#ifdef NPARTITION
+        || PyModule_AddObjectRef(m, "HAS_PARTITION", Py_False) < 0
+#else
+        || PyModule_AddObjectRef(m, "HAS_PARTITION", Py_True) < 0
+#endif
+        ) {
+        Py_DECREF(m);
+        return NULL;
+    }
+    return m;
+}
@@ -1 +1,375 @@
-void PyInit_colamd(void) {}
+/* Python bindings for COLAMD and SYMAMD: column approximate minimum degree
+ * ordering. */
+
+#include <stdlib.h>
+#include <string.h>
+
+#include "ss_common.h"
+#include "colamd.h"
+
+static int
+check_status(const char *name, npy_intp status)
+{
+    if (status >= COLAMD_OK) {
+        return 0;
+    }
+    if (status == COLAMD_ERROR_out_of_memory) {
+        PyErr_NoMemory();
+        return -1;
+    }
+    PyErr_Format(PyExc_ValueError, "%s failed with status %zd", name,
+                 (Py_ssize_t)status);
+    return -1;
+}
+
+static void
+set_knobs(double knobs[COLAMD_KNOBS], int is_long, double dense_row,
+          double dense_col, int aggressive)
+{
+    if (is_long) {
+        colamd_l_set_defaults(knobs);
+    }
+    else {
+        colamd_set_defaults(knobs);
+    }
+    knobs[COLAMD_DENSE_ROW] = dense_row;
+    knobs[COLAMD_DENSE_COL] = dense_col;
+    knobs[COLAMD_AGGRESSIVE] = aggressive;
+}
+
+/* Statistics of an ordering of an n_row-by-n_col matrix with nnz entries,
+ * from the stats array of colamd or symamd. */
+static PyObject *
+order_stats(const npy_intp stats[COLAMD_STATS], npy_intp n_row,
+            npy_intp n_col, npy_intp nnz, double time)
+{
+    return Py_BuildValue(
+        "{s:n,s:n,s:n,s:n,s:n,s:n,s:O,s:d}",
+        "n_row", (Py_ssize_t)n_row,
+        "n_col", (Py_ssize_t)n_col,
+        "nnz", (Py_ssize_t)nnz,
+        "dense_row", (Py_ssize_t)stats[COLAMD_DENSE_ROW],
+        "dense_col", (Py_ssize_t)stats[COLAMD_DENSE_COL],
+        "defrag_count", (Py_ssize_t)stats[COLAMD_DEFRAG_COUNT],
+        "jumbled", stats[COLAMD_STATUS] == COLAMD_OK_BUT_JUMBLED
+                   ? Py_True : Py_False,
+        "time", time);
+}
+
+SS_DEFINE_FILL_WORKSPACE(fill_workspace, int)
+SS_DEFINE_FILL_WORKSPACE(fill_workspace_l, SuiteSparse_long)
+
+PyDoc_STRVAR(recommended_doc,
+"recommended(nnz, n_row, n_col, dtype=numpy.int32)\n"
+"--\n\n"
+"Recommended length of the workspace passed to colamd(), as returned by\n"
+"colamd_recommended (int32) or colamd_l_recommended (int64).");
+
+static PyObject *
+recommended(PyObject *self, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"nnz", "n_row", "n_col", "dtype", NULL};
+    Py_ssize_t nnz, n_row, n_col;
+    PyArray_Descr *dtype = NULL;
+    size_t alen;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "nnn|O&:recommended", kwlist,
+                                     &nnz, &n_row, &n_col,
+                                     PyArray_DescrConverter2, &dtype)) {
+        return NULL;
+    }
+    if (dtype == NULL || dtype->elsize == sizeof(int)) {
+        if (nnz > INT_MAX || n_row > INT_MAX || n_col > INT_MAX) {
+            alen = 0;
+        }
+        else {
+            alen = colamd_recommended((int)nnz, (int)n_row, (int)n_col);
+        }
+    }
+    else {
+        alen = colamd_l_recommended((SuiteSparse_long)nnz,
+                                    (SuiteSparse_long)n_row,
+                                    (SuiteSparse_long)n_col);
+    }
+    Py_XDECREF(dtype);
+    if (alen == 0) {
+        PyErr_SetString(PyExc_ValueError, "invalid or too large problem size");
+        return NULL;
+    }
+    return PyLong_FromSize_t(alen);
+}
+
+PyDoc_STRVAR(colamd_doc,
+"colamd(A, indices=None, *, n_row=None, dense_row=10.0, dense_col=10.0,\n"
+"       aggressive=True, workspace=None, info=False)\n"
+"--\n\n"
+"Column approximate minimum degree ordering of A, for a Cholesky\n"
+"factorization of A'A or an LU factorization of A.\n\n"
+"A is a scipy.sparse CSC or CSR matrix, or the indptr array of a CSC\n"
+"matrix when indices is also given (n_row then defaults to the number of\n"
+"columns).  int32 indices call colamd and int64 indices call colamd_l.\n\n"
+"COLAMD overwrites its input, so the row indices are copied into\n"
+"``workspace``: a writable contiguous array with the dtype of the indices\n"
+"and at least ``recommended(nnz, n_row, n_col, dtype)`` entries.  Passing\n"
+"the same workspace to repeated calls avoids reallocating it.  The GIL is\n"
+"released while the ordering runs.\n\n"
+"Returns the column permutation.  With info=True, returns (perm, info)\n"
+"where info is a dict of the stats array of colamd:\n\n"
+"n_row, n_col, nnz\n"
+"    Shape of A and entries in A.\n"
+"dense_row, dense_col\n"
+"    Dense or empty rows and columns, ignored and ordered last.\n"
+"defrag_count\n"
+"    Garbage collections of the workspace; a larger workspace avoids\n"
+"    them.\n"
+"jumbled\n"
+"    Whether A had unsorted or duplicate row indices.\n"
+"time\n"
+"    Wall-clock seconds of the ordering.\n\n"
+"The same dict is passed to the hook set by suitesparse.set_stats_hook.");
+
+static PyObject *
+colamd_py(PyObject *self, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"A", "indices", "n_row", "dense_row",
+                             "dense_col", "aggressive", "workspace", "info",
+                             NULL};
+    PyObject *A, *indices = NULL, *n_row_obj = Py_None, *work_obj = Py_None;
+    PyObject *stats = NULL;
+    PyArrayObject *work = NULL, *perm, *result;
+    double dense_row = 10.0, dense_col = 10.0, time;
+    int aggressive = 1, typenum, info = 0, k, fill;
+    double knobs[COLAMD_KNOBS];
+    npy_intp n_row, n_col, len, st[COLAMD_STATS];
+    size_t alen;
+    ss_compressed c;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|O$OddpOp:colamd", kwlist,
+                                     &A, &indices, &n_row_obj, &dense_row,
+                                     &dense_col, &aggressive, &work_obj,
+                                     &info)) {
+        return NULL;
+    }
+    if (ss_parse_compressed(A, indices, &c) < 0) {
+        return NULL;
+    }
+    /* dimensions of A itself, not of the compressed view */
+    n_row = c.is_csr ? c.ncol : c.nrow;
+    n_col = c.is_csr ? c.nrow : c.ncol;
+    if (n_row_obj != Py_None) {
+        if (c.is_csr || (indices == NULL || indices == Py_None)) {
+            PyErr_SetString(PyExc_TypeError,
+                            "n_row is only used with indptr/indices input");
+            ss_compressed_clear(&c);
+            return NULL;
+        }
+        n_row = PyLong_AsSsize_t(n_row_obj);
+        if (n_row == -1 && PyErr_Occurred()) {
+            ss_compressed_clear(&c);
+            return NULL;
+        }
+    }
+    typenum = c.is_long ? SS_NPY_LONG : NPY_INT;
+    alen = c.is_long
+        ? colamd_l_recommended((SuiteSparse_long)c.nnz,
+                               (SuiteSparse_long)n_row,
+                               (SuiteSparse_long)n_col)
+        : colamd_recommended((int)c.nnz, (int)n_row, (int)n_col);
+    if (alen == 0) {
+        PyErr_SetString(PyExc_ValueError, "invalid or too large problem size");
+        ss_compressed_clear(&c);
+        return NULL;
+    }
+
+    if (work_obj == Py_None) {
+        npy_intp dim = (npy_intp)alen;
+        work = (PyArrayObject *)PyArray_SimpleNew(1, &dim, typenum);
+    }
+    else if (!PyArray_Check(work_obj)
+             || PyArray_TYPE((PyArrayObject *)work_obj) != typenum
+             || PyArray_NDIM((PyArrayObject *)work_obj) != 1
+             || !PyArray_ISCARRAY((PyArrayObject *)work_obj)) {
+        PyErr_SetString(PyExc_ValueError,
+                        "workspace must be a writable contiguous 1-D array "
+                        "with the dtype of the indices");
+    }
+    else if ((size_t)PyArray_DIM((PyArrayObject *)work_obj, 0) < alen) {
+        PyErr_Format(PyExc_ValueError,
+                     "workspace must have at least %zu entries", alen);
+    }
+    else {
+        work = (PyArrayObject *)work_obj;
+        Py_INCREF(work);
+    }
+    if (work == NULL) {
+        ss_compressed_clear(&c);
+        return NULL;
+    }
+    len = n_col + 1;
+    perm = (PyArrayObject *)PyArray_SimpleNew(1, &len, typenum);
+    if (perm == NULL) {
+        Py_DECREF(work);
+        ss_compressed_clear(&c);
+        return NULL;
+    }
+
+    set_knobs(knobs, c.is_long, dense_row, dense_col, aggressive);
+    len = PyArray_DIM(work, 0);
+    Py_BEGIN_ALLOW_THREADS
+    time = SuiteSparse_time();
+    if (c.is_long) {
+        SuiteSparse_long stats[COLAMD_STATS];
+        fill = fill_workspace_l(&c, PyArray_DATA(work),
+                                PyArray_DATA(perm));
+        if (fill == 0) {
+            colamd_l((SuiteSparse_long)n_row, (SuiteSparse_long)n_col,
+                     (SuiteSparse_long)len, PyArray_DATA(work),
+                     PyArray_DATA(perm), knobs, stats);
+            for (k = 0; k < COLAMD_STATS; k++) {
+                st[k] = (npy_intp)stats[k];
+            }
+        }
+    }
+    else {
+        int stats[COLAMD_STATS];
+        fill = fill_workspace(&c, PyArray_DATA(work), PyArray_DATA(perm));
+        if (fill == 0) {
+            colamd((int)n_row, (int)n_col, (int)len, PyArray_DATA(work),
+                   PyArray_DATA(perm), knobs, stats);
+            for (k = 0; k < COLAMD_STATS; k++) {
+                st[k] = (npy_intp)stats[k];
+            }
+        }
+    }
+    time = SuiteSparse_time() - time;
+    Py_END_ALLOW_THREADS
+    Py_DECREF(work);
+    ss_compressed_clear(&c);
+    if (fill != 0) {
+        ss_bad_csr(fill);
+        Py_DECREF(perm);
+        return NULL;
+    }
+    if (check_status("colamd", st[COLAMD_STATUS]) < 0
+        || (ss_want_stats(info)
+            && (stats = order_stats(st, n_row, n_col, c.nnz, time))
+               == NULL)) {
+        Py_DECREF(perm);
+        return NULL;
+    }
+    /* the last entry of p is workspace, drop it from the result */
+    result = (PyArrayObject *)PySequence_GetSlice((PyObject *)perm, 0, n_col);
+    Py_DECREF(perm);
+    if (result == NULL) {
+        Py_XDECREF(stats);
+        return NULL;
+    }
+    return ss_return_stats("colamd.colamd", (PyObject *)result, stats, info);
+}
+
+PyDoc_STRVAR(symamd_doc,
+"symamd(A, indices=None, *, dense=10.0, aggressive=True, info=False)\n"
+"--\n\n"
+"Approximate minimum degree ordering of a symmetric matrix, computed by\n"
+"applying COLAMD to a matrix M such that M'M has the pattern of A+A'.\n\n"
+"A is a square scipy.sparse CSC or CSR matrix, or the indptr array of\n"
+"one when indices is also given.  The index arrays are used in place:\n"
+"int32 indices call symamd and int64 indices call symamd_l.  The GIL is\n"
+"released while the ordering runs.\n\n"
+"Returns the permutation.  With info=True, returns (perm, info) where\n"
+"info is a dict of the stats array of symamd, with the keys described in\n"
+"colamd(); n_row and n_col are both the order of A, and dense_row and\n"
+"dense_col both count the dense rows/columns ordered last.");
+
+static PyObject *
+symamd_py(PyObject *self, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"A", "indices", "dense", "aggressive", "info",
+                             NULL};
+    PyObject *A, *indices = NULL, *stats = NULL;
+    PyArrayObject *perm, *result;
+    double dense = 10.0, time;
+    int aggressive = 1, info = 0, k;
+    double knobs[COLAMD_KNOBS];
+    npy_intp n, len, st[COLAMD_STATS];
+    ss_compressed c;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|O$dpp:symamd", kwlist,
+                                     &A, &indices, &dense, &aggressive,
+                                     &info)) {
+        return NULL;
+    }
+    if (ss_parse_square(A, indices, &c) < 0) {
+        return NULL;
+    }
+    n = c.ncol;
+    len = n + 1;
+    perm = (PyArrayObject *)PyArray_SimpleNew(
+        1, &len, c.is_long ? SS_NPY_LONG : NPY_INT);
+    if (perm == NULL) {
+        ss_compressed_clear(&c);
+        return NULL;
+    }
+
+    set_knobs(knobs, c.is_long, dense, dense, aggressive);
+    Py_BEGIN_ALLOW_THREADS
+    time = SuiteSparse_time();
+    if (c.is_long) {
+        SuiteSparse_long stats[COLAMD_STATS];
+        symamd_l((SuiteSparse_long)n, PyArray_DATA(c.indices),
+                 PyArray_DATA(c.indptr), PyArray_DATA(perm), knobs, stats,
+                 SuiteSparse_calloc, ss_free);
+        for (k = 0; k < COLAMD_STATS; k++) {
+            st[k] = (npy_intp)stats[k];
+        }
+    }
+    else {
+        int stats[COLAMD_STATS];
+        symamd((int)n, PyArray_DATA(c.indices), PyArray_DATA(c.indptr),
+               PyArray_DATA(perm), knobs, stats, SuiteSparse_calloc, ss_free);
+        for (k = 0; k < COLAMD_STATS; k++) {
+            st[k] = (npy_intp)stats[k];
+        }
+    }
+    time = SuiteSparse_time() - time;
+    Py_END_ALLOW_THREADS
+    ss_compressed_clear(&c);
+    if (check_status("symamd", st[COLAMD_STATUS]) < 0
+        || (ss_want_stats(info)
+            && (stats = order_stats(st, n, n, c.nnz, time)) == NULL)) {
+        Py_DECREF(perm);
+        return NULL;
+    }
+    result = (PyArrayObject *)PySequence_GetSlice((PyObject *)perm, 0, n);
+    Py_DECREF(perm);
+    if (result == NULL) {
+        Py_XDECREF(stats);
+        return NULL;
+    }
+    return ss_return_stats("colamd.symamd", (PyObject *)result, stats, info);
+}
+
+static PyMethodDef colamd_methods[] = {
+    {"colamd", (PyCFunction)(void (*)(void))colamd_py,
+     METH_VARARGS | METH_KEYWORDS, colamd_doc},
+    {"symamd", (PyCFunction)(void (*)(void))symamd_py,
+     METH_VARARGS | METH_KEYWORDS, symamd_doc},
+    {"recommended", (PyCFunction)(void (*)(void))recommended,
+     METH_VARARGS | METH_KEYWORDS, recommended_doc},
+    {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef colamd_module = {
+    PyModuleDef_HEAD_INIT,
+    "suitesparse.colamd",
+    "COLAMD and SYMAMD: column approximate minimum degree ordering.",
+    -1,
+    colamd_methods,
+};
+
+PyMODINIT_FUNC
+PyInit_colamd(void)
+{
+    import_array();
+    return PyModule_Create(&colamd_module);
+}
@@ -0,0 +1,139 @@
+/* The SuiteSparse runtime shared by all binding modules.
+ *
+ * Every binding (memory, amd, camd, colamd, ccolamd, cholmod, umfpack,
+ * spqr) is compiled into this one extension, linked once against the
+ * SuiteSparse libraries.  The modules therefore share one copy of the code
+ * and of its global state, in particular the SuiteSparse_config allocator
+ * and timer and the hook the statistics of every call are reported to.
+ * PyInit__core creates them as attributes of _core; the package registers
+ * them in sys.modules as suitesparse.<name>. */
+
+#include "ss_common.h"
+
+PyMODINIT_FUNC PyInit_memory(void);
+PyMODINIT_FUNC PyInit_amd(void);
+PyMODINIT_FUNC PyInit_camd(void);
+PyMODINIT_FUNC PyInit_colamd(void);
+PyMODINIT_FUNC PyInit_ccolamd(void);
+PyMODINIT_FUNC PyInit_cholmod(void);
+PyMODINIT_FUNC PyInit_umfpack(void);
+PyMODINIT_FUNC PyInit_spqr(void);
+
+static const struct {
+    const char *name;
+    PyObject *(*init)(void);
+} submodules[] = {
+    /* first: it installs the SuiteSparse_config allocator hooks */
+    {"memory", PyInit_memory},
+    {"amd", PyInit_amd},
+    {"camd", PyInit_camd},
+    {"colamd", PyInit_colamd},
+    {"ccolamd", PyInit_ccolamd},
+    {"cholmod", PyInit_cholmod},
+    {"umfpack", PyInit_umfpack},
+    {"spqr", PyInit_spqr},
+};
+
+/* Declared in ss_common.h: the hook every module reports its statistics
+ * to. */
+PyObject *ss_stats_hook = NULL;
+
+static PyObject *
+set_stats_hook(PyObject *self, PyObject *hook)
+{
+    PyObject *old = ss_stats_hook;
+
+    if (hook != Py_None && !PyCallable_Check(hook)) {
+        PyErr_SetString(PyExc_TypeError, "hook must be callable or None");
+        return NULL;
+    }
+    if (hook == Py_None) {
+        ss_stats_hook = NULL;
+    }
+    else {
+        Py_INCREF(hook);
+        ss_stats_hook = hook;
+    }
+    if (old == NULL) {
+        Py_RETURN_NONE;
+    }
+    return old;
+}
+
+static PyObject *
+get_stats_hook(PyObject *self, PyObject *Py_UNUSED(ignored))
+{
+    if (ss_stats_hook == NULL) {
+        Py_RETURN_NONE;
+    }
+    Py_INCREF(ss_stats_hook);
+    return ss_stats_hook;
+}
+
+static PyObject *
+report_stats(PyObject *self, PyObject *args)
+{
+    PyObject *stats;
+    const char *name;
+
+    if (!PyArg_ParseTuple(args, "sO:_report_stats", &name, &stats)) {
+        return NULL;
+    }
+    ss_report_stats(name, stats);
+    Py_RETURN_NONE;
+}
+
+static PyMethodDef core_methods[] = {
+    {"_set_stats_hook", set_stats_hook, METH_O,
+     "Install the stats hook, or remove it with None; returns the old one."},
+    {"_get_stats_hook", get_stats_hook, METH_NOARGS,
+     "The installed stats hook, or None."},
+    {"_report_stats", report_stats, METH_VARARGS,
+     "Pass (name, stats) of a call made in Python to the stats hook."},
+    {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef core_module = {
+    PyModuleDef_HEAD_INIT,
+    "suitesparse._core",
+    "Shared SuiteSparse runtime holding all binding modules.",
+    -1,
+    core_methods,
+};
+
+PyMODINIT_FUNC
+PyInit__core(void)
+{
+    PyObject *m, *sub, *names;
+    size_t k;
+
+    m = PyModule_Create(&core_module);
+    if (m == NULL) {
+        return NULL;
+    }
+    names = PyTuple_New(sizeof(submodules) / sizeof(submodules[0]));
+    if (names == NULL || PyModule_AddObjectRef(m, "__all__", names) < 0) {
+        goto fail;
+    }
+    for (k = 0; k < sizeof(submodules) / sizeof(submodules[0]); k++) {
+        sub = submodules[k].init();
+        if (sub == NULL) {
+            goto fail;
+        }
+        if (PyModule_AddObjectRef(m, submodules[k].name, sub) < 0) {
+            Py_DECREF(sub);
+            goto fail;
+        }
+        Py_DECREF(sub);
+        PyTuple_SET_ITEM(names, k, PyUnicode_FromString(submodules[k].name));
+        if (PyTuple_GET_ITEM(names, k) == NULL) {
+            goto fail;
+        }
+    }
+    Py_DECREF(names);
+    return m;
+fail:
+    Py_XDECREF(names);
+    Py_DECREF(m);
+    return NULL;
+}
@@ -0,0 +1,309 @@
+/* Python bindings for the SuiteSparse_config memory hooks: pluggable
+ * allocators and allocation statistics. */
+
+#include <stdint.h>
+#include <stdlib.h>
+#include <string.h>
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include "pythread.h"
+#include "SuiteSparse_config.h"
+
+/* A backend allocator.  Entries are never freed, since live blocks keep a
+ * pointer to the backend that allocated them. */
+typedef struct {
+    void *(*malloc_func)(size_t);
+    void *(*calloc_func)(size_t, size_t);
+    void *(*realloc_func)(void *, size_t);
+    void (*free_func)(void *);
+    const char *name;
+} allocator;
+
+/* Every block is preceded by this header, padded so that the block keeps
+ * the alignment the backend gives. */
+typedef union {
+    struct {
+        size_t size;
+        const allocator *backend;
+    } h;
+    long double ld;
+    long long ll;
+    void *p;
+    double d;
+} header;
+
+static allocator system_allocator = {malloc, calloc, realloc, free, "system"};
+static allocator pymem_allocator = {PyMem_RawMalloc, PyMem_RawCalloc,
+                                    PyMem_RawRealloc, PyMem_RawFree, "pymem"};
+static const allocator *backend = &system_allocator;
+
+static PyThread_type_lock stats_lock;
+static struct {
+    size_t current;         /* bytes in live blocks */
+    size_t peak;            /* high-water mark of current */
+    size_t blocks;          /* live blocks */
+    unsigned long long count;   /* blocks allocated since import */
+} stats;
+
+static void
+account(size_t added, size_t removed, int blocks)
+{
+    PyThread_acquire_lock(stats_lock, WAIT_LOCK);
+    stats.current = stats.current + added - removed;
+    if (stats.current > stats.peak) {
+        stats.peak = stats.current;
+    }
+    stats.blocks += blocks;
+    if (blocks > 0) {
+        stats.count++;
+    }
+    PyThread_release_lock(stats_lock);
+}
+
+static void *
+tracked_malloc(size_t size)
+{
+    const allocator *b = backend;
+    header *h;
+
+    if (size > SIZE_MAX - sizeof(header)) {
+        return NULL;
+    }
+    h = b->malloc_func(sizeof(header) + size);
+    if (h == NULL) {
+        return NULL;
+    }
+    h->h.size = size;
+    h->h.backend = b;
+    account(size, 0, 1);
+    return h + 1;
+}
+
+static void *
+tracked_calloc(size_t n, size_t size)
+{
+    const allocator *b = backend;
+    header *h;
+
+    if (size != 0 && n > (SIZE_MAX - sizeof(header)) / size) {
+        return NULL;
+    }
+    h = b->calloc_func(1, sizeof(header) + n * size);
+    if (h == NULL) {
+        return NULL;
+    }
+    h->h.size = n * size;
+    h->h.backend = b;
+    account(n * size, 0, 1);
+    return h + 1;
+}
+
+static void *
+tracked_realloc(void *p, size_t size)
+{
+    header *h;
+    size_t old;
+
+    if (p == NULL) {
+        return tracked_malloc(size);
+    }
+    if (size > SIZE_MAX - sizeof(header)) {
+        return NULL;
+    }
+    h = (header *)p - 1;
+    old = h->h.size;
+    h = h->h.backend->realloc_func(h, sizeof(header) + size);
+    if (h == NULL) {
+        return NULL;
+    }
+    h->h.size = size;
+    account(size, old, 0);
+    return h + 1;
+}
+
+static void
+tracked_free(void *p)
+{
+    header *h;
+    size_t size;
+
+    if (p == NULL) {
+        return;
+    }
+    h = (header *)p - 1;
+    size = h->h.size;
+    h->h.backend->free_func(h);
+    account(0, size, -1);
+}
+
+/* Function pointer from a Python int address. */
+static void *
+address(PyObject *obj, const char *name)
+{
+    void *p = PyLong_Check(obj) ? PyLong_AsVoidPtr(obj) : NULL;
+
+    if (p == NULL && !PyErr_Occurred()) {
+        PyErr_Format(PyExc_TypeError,
+                     "%s must be a non-zero function address", name);
+    }
+    return p;
+}
+
+PyDoc_STRVAR(set_allocator_doc,
+"set_allocator(allocator)\n"
+"--\n\n"
+"Select the allocator behind SuiteSparse_config's memory hooks.\n\n"
+"Every SuiteSparse allocation goes through the hooks of this module, which\n"
+"count the bytes in use and forward to the selected allocator.  Blocks\n"
+"are always freed by the allocator that made them, so switching is safe\n"
+"while factors are alive, but should not race with running\n"
+"factorizations.\n\n"
+"Parameters\n"
+"----------\n"
+"allocator : {'system', 'pymem'} or tuple of int\n"
+"    'system' is the C library malloc (the default), 'pymem' is\n"
+"    PyMem_RawMalloc and friends, which Python's tracemalloc can see.  A\n"
+"    tuple gives the addresses of C functions with the signatures of\n"
+"    (malloc, calloc, realloc, free), for instance an arena or huge-page\n"
+"    allocator loaded with ctypes; ``ctypes.cast(f, ctypes.c_void_p).value``\n"
+"    gives the address of a ctypes function f.  They must be thread-safe\n"
+"    and must not need the GIL.");
+
+static PyObject *
+set_allocator(PyObject *self, PyObject *arg)
+{
+    allocator custom, *b;
+
+    if (PyUnicode_Check(arg)) {
+        if (PyUnicode_CompareWithASCIIString(arg, "system") == 0) {
+            backend = &system_allocator;
+        }
+        else if (PyUnicode_CompareWithASCIIString(arg, "pymem") == 0) {
+            backend = &pymem_allocator;
+        }
+        else {
+            PyErr_Format(PyExc_ValueError, "unknown allocator %R", arg);
+            return NULL;
+        }
+        Py_RETURN_NONE;
+    }
+    if (!PyTuple_Check(arg) || PyTuple_GET_SIZE(arg) != 4) {
+        PyErr_SetString(PyExc_TypeError,
+                        "allocator must be 'system', 'pymem' or a tuple of "
+                        "(malloc, calloc, realloc, free) addresses");
+        return NULL;
+    }
+    custom.malloc_func = (void *(*)(size_t))address(
+        PyTuple_GET_ITEM(arg, 0), "malloc");
+    custom.calloc_func = (void *(*)(size_t, size_t))address(
+        PyTuple_GET_ITEM(arg, 1), "calloc");
+    custom.realloc_func = (void *(*)(void *, size_t))address(
+        PyTuple_GET_ITEM(arg, 2), "realloc");
+    custom.free_func = (void (*)(void *))address(
+        PyTuple_GET_ITEM(arg, 3), "free");
+    if (PyErr_Occurred()) {
+        return NULL;
+    }
+    custom.name = "custom";
+    b = PyMem_RawMalloc(sizeof(*b));
+    if (b == NULL) {
+        return PyErr_NoMemory();
+    }
+    *b = custom;
+    backend = b;
+    Py_RETURN_NONE;
+}
+
+PyDoc_STRVAR(get_allocator_doc,
+"get_allocator()\n"
+"--\n\n"
+"Name of the selected allocator: 'system', 'pymem' or 'custom'.");
+
+static PyObject *
+get_allocator(PyObject *self, PyObject *Py_UNUSED(ignored))
+{
+    return PyUnicode_FromString(backend->name);
+}
+
+PyDoc_STRVAR(stats_doc,
+"stats()\n"
+"--\n\n"
+"Memory held by SuiteSparse, across all modules and threads.\n\n"
+"Returns a dict with the bytes in use ('current'), their high-water mark\n"
+"since import or the last reset_peak() ('peak'), the number of live\n"
+"blocks ('blocks') and of blocks allocated since import ('count').\n"
+"Per-header overhead is not included.");
+
+static PyObject *
+get_stats(PyObject *self, PyObject *Py_UNUSED(ignored))
+{
+    size_t current, peak, blocks;
+    unsigned long long count;
+
+    PyThread_acquire_lock(stats_lock, WAIT_LOCK);
+    current = stats.current;
+    peak = stats.peak;
+    blocks = stats.blocks;
+    count = stats.count;
+    PyThread_release_lock(stats_lock);
+    return Py_BuildValue("{s:n,s:n,s:n,s:K}", "current", (Py_ssize_t)current,
+                         "peak", (Py_ssize_t)peak, "blocks",
+                         (Py_ssize_t)blocks, "count", count);
+}
+
+PyDoc_STRVAR(reset_peak_doc,
+"reset_peak()\n"
+"--\n\n"
+"Reset the peak to the bytes currently in use and return the old peak.\n\n"
+"Calling it before a factorization and reading stats()['peak'] after it\n"
+"gives the peak of that call, for instance to tell the memory of the\n"
+"ordering from that of the numeric factorization.");
+
+static PyObject *
+reset_peak(PyObject *self, PyObject *Py_UNUSED(ignored))
+{
+    size_t peak;
+
+    PyThread_acquire_lock(stats_lock, WAIT_LOCK);
+    peak = stats.peak;
+    stats.peak = stats.current;
+    PyThread_release_lock(stats_lock);
+    return PyLong_FromSize_t(peak);
+}
+
+static PyMethodDef memory_methods[] = {
+    {"set_allocator", (PyCFunction)set_allocator, METH_O, set_allocator_doc},
+    {"get_allocator", (PyCFunction)get_allocator, METH_NOARGS,
+     get_allocator_doc},
+    {"stats", (PyCFunction)get_stats, METH_NOARGS, stats_doc},
+    {"reset_peak", (PyCFunction)reset_peak, METH_NOARGS, reset_peak_doc},
+    {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef memory_module = {
+    PyModuleDef_HEAD_INIT,
+    "suitesparse.memory",
+    "SuiteSparse memory allocators and allocation statistics.",
+    -1,
+    memory_methods,
+};
+
+PyMODINIT_FUNC
+PyInit_memory(void)
+{
+    /* Installed before any other module can allocate: a block from the
+     * previous hooks has no header. */
+    if (stats_lock == NULL) {
+        stats_lock = PyThread_allocate_lock();
+        if (stats_lock == NULL) {
+            PyErr_SetString(PyExc_MemoryError, "unable to allocate lock");
+            return NULL;
+        }
+        SuiteSparse_config.malloc_func = tracked_malloc;
+        SuiteSparse_config.calloc_func = tracked_calloc;
+        SuiteSparse_config.realloc_func = tracked_realloc;
+        SuiteSparse_config.free_func = tracked_free;
+    }
+    return PyModule_Create(&memory_module);
+}
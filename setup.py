@@ -1,10 +1,19 @@
-'''Build SuiteSparse.'''
+'''Build SuiteSparse.
 
+The int/long variants of the SuiteSparse sources are generated under
+``.sstmp`` and only rewritten when their inputs change, so rebuilds are
+incremental.  Sources are compiled in parallel: pass ``-j N`` to
+``build_clib``/``build_ext`` or set ``NPY_NUM_BUILD_JOBS``.
+'''
+
+import hashlib
+import json
 import logging
+import os
 import pathlib
-import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Tuple
-import re
 logging.basicConfig()
 logger = logging.getLogger('suitesparse-setup')
 SS = pathlib.Path(__file__).parent / 'SuiteSparse'
@@ -12,30 +21,158 @@ tmp = pathlib.Path(__file__).parent / '.sstmp'
 DEBUG = True
 
 
-def _add_macros(f: pathlib.Path, macros: List[str]):
-    with open(f, 'r+') as fp:
-        contents = fp.read()
-        contents = '\n'.join(f'#define {macro}' for macro in macros if macro) + '\n' + contents
-        fp.seek(0)
-        fp.write(contents)
-        fp.truncate()    
-
+def _variant(jobs: list, src: pathlib.Path, dst: pathlib.Path,
+             macros: List[str] = (), headers: List[Tuple[str]] = ()) -> str:
+    '''Schedule ``dst`` to be generated from ``src`` with ``macros`` defined
+    at the top and ``#include`` directives redirected by ``headers``.
+    Returns the path of ``dst`` relative to the package, as used for sources.
+    The files are written by :func:`_generate`.'''
+    jobs.append((src, dst, tuple(m for m in macros if m), tuple(headers)))
+    return str(dst.relative_to(SS.parent))
+
+
+def _render(contents: bytes, macros: Tuple[str], headers: Tuple[Tuple[str]]) -> bytes:
+    for frum, to in headers:
+        contents = contents.replace(f'#include "{frum}"'.encode(), f'#include "{to}"'.encode())
+    return b''.join(f'#define {macro}\n'.encode() for macro in macros) + contents
+
+
+def _generate(jobs: list):
+    '''Write the scheduled variant sources whose inputs changed, and clear
+    ``jobs``.
+
+    Every output is keyed in ``tmp/manifest.json`` by a hash of its source
+    contents, macros and header redirections; outputs with an unchanged key
+    are left alone.  Changed outputs are rewritten only if their contents
+    differ, so file times stay stable and numpy.distutils recompiles only
+    the objects affected.  Jobs run on NPY_NUM_BUILD_JOBS threads.
+    '''
+    from numpy.distutils.misc_util import get_num_build_jobs
+    dsts = [dst for _, dst, _, _ in jobs]
+    if len(set(dsts)) != len(dsts):
+        raise RuntimeError('two variants are generated to the same file')
+    manifest_path = tmp / 'manifest.json'
+    try:
+        manifest = json.loads(manifest_path.read_text())
+    except (OSError, ValueError):
+        manifest = {}
+
+    def run(job):
+        src, dst, macros, headers = job
+        contents = src.read_bytes()
+        key = hashlib.sha256(contents + repr((macros, headers)).encode()).hexdigest()
+        name = dst.relative_to(tmp).as_posix()
+        if manifest.get(name) == key and dst.exists():
+            return name, key, False
+        contents = _render(contents, macros, headers)
+        if dst.exists() and dst.read_bytes() == contents:
+            return name, key, False
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        partial = dst.with_name(dst.name + '.part')
+        partial.write_bytes(contents)
+        os.replace(partial, dst)
+        return name, key, True
+
+    with ThreadPoolExecutor(get_num_build_jobs()) as pool:
+        results = list(pool.map(run, jobs))
+    manifest.update((name, key) for name, key, _ in results)
+    tmp.mkdir(parents=True, exist_ok=True)
+    manifest_path.write_text(json.dumps(manifest, indent=0, sort_keys=True))
+    logger.info(f'Generated {sum(written for _, _, written in results)} of '
+                f'{len(jobs)} variant sources in {tmp}')
+    jobs.clear()
+
+
+def _amd_variants(jobs: list, lib: str) -> List[str]:
+    '''Schedule the DINT and DLONG copies of AMD or CAMD (``lib`` is 'amd'
+    or 'camd') and return their sources.'''
+    pkg = lib.upper()
+    sources = []
+    for macro, type_ in (('DINT', 'i'), ('DLONG', 'l')):
+        header = f'{lib}_{type_}_internal.h'
+        _variant(jobs, SS / f'{pkg}/Include/{lib}_internal.h',
+                 tmp / f'{pkg}{type_.upper()}/Include/{header}', [macro])
+        sources += [_variant(jobs, f, tmp / f'{pkg}{type_.upper()}/Source' / f.name.replace(f'{lib}_', f'{lib}_{type_}_'),
+                             [macro], [(f'{lib}_internal.h', header)])
+                    for f in sorted((SS / f'{pkg}/Source').glob(f'{lib}_*.c'))]
+    return sources
+
+
+def _cholmod_l_variants(jobs: list, module: str, headers: List[Tuple[str]]) -> List[str]:
+    '''Schedule the DLONG copy of the CHOLMOD ``module`` directory, templates
+    included, and return the sources to compile: each cholmod_*.c file and
+    its cholmod_l_*.c copy.'''
+    srcdir = SS / 'CHOLMOD' / module
+    templates = [(f.name, f.name.replace('cholmod_', 'cholmod_l_'))
+                 for f in sorted(srcdir.glob('t_cholmod_*.c'))]
+    sources = []
+    for f in sorted(srcdir.glob('*.c')):
+        fnew = _variant(jobs, f, tmp / 'CHOLMODL' / module / f.name.replace('cholmod_', 'cholmod_l_'),
+                        ['DLONG'], headers + templates)
+        if f.name.startswith('cholmod_'):
+            sources += [str(f.relative_to(SS.parent)), fnew]
+    return sources
+
+
+def _get_blas_info() -> dict:
+    '''BLAS/LAPACK build info, chosen by the SUITESPARSE_BLAS environment
+    variable: one of openblas, mkl, blis, accelerate, reference or auto
+    (the default, numpy's lapack_opt search order, which may also find
+    flexiblas, atlas, or a library reported as unknown).'''
+    from numpy.distutils.system_info import get_info, dict_append
+    vendor = os.environ.get('SUITESPARSE_BLAS', 'auto').lower()
+    if vendor == 'auto':
+        info = get_info('lapack_opt', 0)
+        libs = [lib.lower() for lib in info.get('libraries', [])]
+        # ATLAS and FlexiBLAS are only named: there is no threading API to
+        # bind for them
+        found = [name for name in ('mkl', 'openblas', 'blis', 'flexiblas', 'atlas')
+                 if any(name in lib for lib in libs)]
+        if found:
+            vendor = found[0]
+        elif 'Accelerate' in ' '.join(info.get('extra_link_args', [])):
+            vendor = 'accelerate'
+        elif libs and set(libs) <= {'blas', 'cblas', 'lapack'}:
+            vendor = 'reference'
+        else:
+            vendor = 'unknown'
+    elif vendor == 'openblas':
+        info = get_info('openblas_lapack', 0)
+    elif vendor == 'mkl':
+        info = get_info('lapack_mkl', 0)
+    elif vendor == 'blis':
+        info = get_info('blis', 0)
+        if info:
+            dict_append(info, **get_info('lapack', 0))
+    elif vendor == 'accelerate':
+        info = get_info('accelerate', 0)
+    elif vendor == 'reference':
+        info = get_info('lapack', 0)
+        if info:
+            dict_append(info, **get_info('blas', 0))
+    else:
+        raise ValueError(f'Unknown SUITESPARSE_BLAS={vendor!r}')
+    if not info:
+        raise RuntimeError(f'No {vendor} BLAS/LAPACK found; set SUITESPARSE_BLAS '
+                           'or configure site.cfg')
+    if vendor == 'reference':
+        logger.warning('Linking reference BLAS: supernodal factorizations '
+                       'will be much slower than with an optimized BLAS')
+    logger.info(f'Using {vendor} BLAS/LAPACK')
+    info = dict(info)
+    dict_append(info, define_macros=[('SUITESPARSE_BLAS_VENDOR', f'"{vendor}"'),
+                                     (f'SUITESPARSE_BLAS_{vendor.upper()}', None)])
+    return info
 
-def _redirect_headers(f: pathlib.Path, headers: List[Tuple[str]]):
-    with open(f, 'r+') as fp:
-        contents = fp.read()
-        for frum, to in headers:
-            contents = contents.replace(f'#include "{frum}"', f'#include "{to}"')
-        fp.seek(0)
-        fp.write(contents)
-        fp.truncate()    
-            
 
 def configuration(parent_package='', top_path=None):
-    from numpy.distutils.misc_util import Configuration
-    from numpy.distutils.system_info import get_info
+    from numpy.distutils.misc_util import Configuration, get_numpy_include_dirs
     config = Configuration('suitesparse', parent_package, top_path)
 
+    # int/long variants of the SuiteSparse sources, scheduled by _variant()
+    # and written under tmp by _generate() before each library is added
+    jobs = []
+
     # SuiteSparse_config
     ss_config_opts = {
         'name': 'suitesparseconfig',
@@ -44,37 +181,13 @@ def configuration(parent_package='', top_path=None):
         'language': 'c',
     }
     config.add_library(**ss_config_opts)
-    config.add_extension(**ss_config_opts,
-                         extra_info={
-                             'sources': ['suitesparseconfig_impl.c'],
-                             'libraries': ['suitesparseconfig'],
-                         })
     
     # AMD
-    if not (tmp / 'AMDI/Include').exists():
-        (tmp / 'AMDI/Include').mkdir(exist_ok=True, parents=True)
-        (tmp / 'AMDL/Include').mkdir(exist_ok=True, parents=True)
-        shutil.copyfile(SS / 'AMD/Include/amd_internal.h', tmp / 'AMDI/Include/amd_i_internal.h')
-        shutil.copyfile(SS / 'AMD/Include/amd_internal.h', tmp / 'AMDL/Include/amd_l_internal.h')
-        _add_macros(f=(tmp / 'AMDI/Include/amd_i_internal.h'), macros=['DINT'])
-        _add_macros(f=(tmp / 'AMDL/Include/amd_l_internal.h'), macros=['DLONG'])
-    if not (tmp / 'AMDI/Source').exists():
-        shutil.copytree(SS / 'AMD/Source', tmp / 'AMDI/Source')
-        shutil.copytree(SS / 'AMD/Source', tmp / 'AMDL/Source')
-        for type_ in (('DINT', 'i', 'I'),
-                      ('DLONG', 'l', 'L')):
-            for f in (tmp / f'AMD{type_[2]}/Source').glob('amd_*.c'):
-                fnew = f.parent / f.name.replace('amd_', f'amd_{type_[1]}_')
-                shutil.move(f, fnew)
-                _add_macros(f=fnew, macros=[type_[0]])
-                _redirect_headers(f=fnew, headers=[('amd_internal.h', f'amd_{type_[1]}_internal.h')])
+    amd_sources = _amd_variants(jobs, 'amd')
 
     amd_opts = {
         'name': 'amd',
-        'sources': ([str(f.relative_to(SS.parent))
-                     for f in (tmp / 'AMDI/Source').glob('amd_*.c')] +
-                    [str(f.relative_to(SS.parent))
-                     for f in (tmp / 'AMDL/Source').glob('amd_*.c')]),
+        'sources': amd_sources,
         'include_dirs': [
             str((SS / 'SuiteSparse_config').relative_to(SS.parent)),
             str((SS / 'AMD/Include').relative_to(SS.parent)),
@@ -84,41 +197,15 @@ def configuration(parent_package='', top_path=None):
         'libraries': ['suitesparseconfig'],
         'language': 'c',
     }
+    _generate(jobs)
     config.add_library(**amd_opts)
-    config.add_extension(**amd_opts, extra_info={
-        'sources': ['amd_impl.c'],
-        'export_symbols':[
-            'amd_order', 'amd_l_order', 'amd_2', 'amd_l2', 'amd_valid',
-            'amd_l_valid', 'amd_defaults', 'amd_l_defaults', 'amd_control',
-            'amd_l_control', 'amd_info', 'amd_l_info',
-        ],
-        'libraries': ['amd'],
-    })
 
     # CAMD
-    if not (tmp / 'CAMDI/Include').exists():
-        (tmp / 'CAMDI/Include').mkdir(exist_ok=True, parents=True)
-        (tmp / 'CAMDL/Include').mkdir(exist_ok=True, parents=True)
-        shutil.copyfile(SS / 'CAMD/Include/camd_internal.h', tmp / 'CAMDI/Include/camd_i_internal.h')
-        shutil.copyfile(SS / 'CAMD/Include/camd_internal.h', tmp / 'CAMDL/Include/camd_l_internal.h')
-        _add_macros(f=(tmp / f'CAMDI/Include/camd_i_internal.h'), macros=['DINT'])
-        _add_macros(f=(tmp / f'CAMDL/Include/camd_l_internal.h'), macros=['DLONG'])
-    if not (tmp / 'CAMDI/Source').exists():
-        shutil.copytree(SS / 'CAMD/Source', tmp / 'CAMDI/Source')
-        shutil.copytree(SS / 'CAMD/Source', tmp / 'CAMDL/Source')
-        for type_ in (('DINT', 'i', 'I'), ('DLONG', 'l', 'L')):
-            for f in (tmp / f'CAMD{type_[2]}/Source').glob('camd_*.c'):
-                fnew = f.parent / f.name.replace('camd_', f'camd_{type_[1]}_')
-                shutil.move(f, fnew)
-                _add_macros(f=fnew, macros=[type_[0]])
-                _redirect_headers(f=fnew, headers=[('camd_internal.h', f'camd_{type_[1]}_internal.h')])
+    camd_sources = _amd_variants(jobs, 'camd')
 
     camd_opts = {
         'name': 'camd',
-        'sources': ([str(f.relative_to(SS.parent))
-                     for f in (tmp / 'CAMDI/Source').glob('camd_*.c')] +
-                    [str(f.relative_to(SS.parent))
-                     for f in (tmp / 'CAMDL/Source').glob('camd_*.c')]),
+        'sources': camd_sources,
         'include_dirs': [
             str((SS / 'SuiteSparse_config').relative_to(SS.parent)),
             str((SS / 'CAMD/Include').relative_to(SS.parent)),
@@ -129,33 +216,15 @@ def configuration(parent_package='', top_path=None):
         'language': 'c',
     }
                 
+    _generate(jobs)
     config.add_library(**camd_opts)
-    config.add_extension(**camd_opts, extra_info={
-        'sources': ['camd_impl.c'],
-        'export_symbols': [
-            'camd_order', 'camd_l_order', 'camd_2', 'camd_l2', 'camd_valid',
-            'camd_l_valid', 'camd_cvalid', 'camd_l_cvalid', 'camd_defaults',
-            'camd_l_defaults', 'camd_control', 'camd_l_control', 'camd_info',
-            'camd_l_info',
-        ],
-        'libraries': ['camd'],
-    })
 
     # COLAMD
-    if not (tmp / 'COLAMDI/Source').exists():
-        shutil.copytree(SS / 'COLAMD/Source', tmp / 'COLAMDI/Source')
-        shutil.copytree(SS / 'COLAMD/Source', tmp / 'COLAMDL/Source')
-        for type_ in (('', '', 'I'), ('DLONG', '_l', 'L')):
-            f = (tmp / f'COLAMD{type_[2]}/Source/colamd.c')
-            fnew = f.parent / f'colamd{type_[1]}.c'
-            shutil.move(f, fnew)
-            _add_macros(f=fnew, macros=[type_[0]])
-
     colamd_opts = {
         'name': 'colamd',
         'sources': [
-            str((tmp / 'COLAMDI/Source/colamd.c').relative_to(SS.parent)),
-            str((tmp / 'COLAMDL/Source/colamd_l.c').relative_to(SS.parent)),
+            str((SS / 'COLAMD/Source/colamd.c').relative_to(SS.parent)),
+            _variant(jobs, SS / 'COLAMD/Source/colamd.c', tmp / 'COLAMDL/Source/colamd_l.c', ['DLONG']),
         ],
         'include_dirs': [
             str((SS / 'SuiteSparse_config').relative_to(SS.parent)),
@@ -165,34 +234,15 @@ def configuration(parent_package='', top_path=None):
         'language': 'c',
     }
             
+    _generate(jobs)
     config.add_library(**colamd_opts)
-    config.add_extension(**colamd_opts, extra_info={
-        'sources': ['colamd_impl.c'],
-        'libraries': ['colamd'],
-        'export_symbols': [
-            'colamd_recommended', 'colamd_l_recommended',
-            'colamd_set_defaults', 'colamd_l_set_defaults',
-            'colamd', 'colamd_l', 'symamd', 'symamd_l',
-            'colamd_report', 'colamd_l_report',
-            'symamd_report', 'symamd_l_report',
-        ],
-    })
 
     # CCOLAMD
-    if not (tmp / 'CCOLAMDI/Source').exists():
-        shutil.copytree(SS / 'CCOLAMD/Source', tmp / 'CCOLAMDI/Source')
-        shutil.copytree(SS / 'CCOLAMD/Source', tmp / 'CCOLAMDL/Source')
-        for type_ in (('', '', 'I'), ('DLONG', '_l', 'L')):
-            f = (tmp / f'CCOLAMD{type_[2]}/Source/ccolamd.c')
-            fnew = f.parent / f'ccolamd{type_[1]}.c'
-            shutil.move(f, fnew)
-            _add_macros(f=fnew, macros=[type_[0]])
-
     ccolamd_opts = {
         'name': 'ccolamd',
         'sources': [
-            str((tmp / 'CCOLAMDI/Source/ccolamd.c').relative_to(SS.parent)),
-            str((tmp / 'CCOLAMDL/Source/ccolamd_l.c').relative_to(SS.parent)),
+            str((SS / 'CCOLAMD/Source/ccolamd.c').relative_to(SS.parent)),
+            _variant(jobs, SS / 'CCOLAMD/Source/ccolamd.c', tmp / 'CCOLAMDL/Source/ccolamd_l.c', ['DLONG']),
         ],
         'include_dirs': [
             str((SS / 'SuiteSparse_config').relative_to(SS.parent)),
@@ -202,207 +252,74 @@ def configuration(parent_package='', top_path=None):
         'language': 'c',
     }
             
+    _generate(jobs)
     config.add_library(**ccolamd_opts)
-    config.add_extension(**ccolamd_opts, extra_info={
-        'sources': ['ccolamd_impl.c'],
-        'libraries': ['ccolamd'],
-        'export_symbols': [
-            'ccolamd_recommended', 'ccolamd_l_recommended',
-            'ccolamd_set_defaults', 'ccolamd_l_set_defaults',
-            'ccolamd', 'ccolamd_l', 'csymamd', 'csymamd_l',
-            'ccolamd_report', 'ccolamd_l_report',
-            'csymamd_report', 'csymamd_l_report',
-            'ccolamd2', 'ccolamd2_l',
-            'ccolamd_apply_order', 'ccolamd_l_apply_order',
-            'ccolamd_fsize', 'ccolamd_l_fsize',
-            'ccolamd_postorder', 'ccolamd_l_postorder',
-            'ccolamd_post_tree', 'ccolamd_l_post_tree',
+
+    # METIS (used by the CHOLMOD/Partition module)
+    metis_macros = [('NDEBUG', None), ('NDEBUG2', None)]
+    if sys.platform == 'win32':
+        metis_macros += [('WIN32', None), ('MSC', None),
+                         ('_CRT_SECURE_NO_DEPRECATE', None),
+                         ('USE_GKREGEX', None)]
+    else:
+        metis_macros += [('_FILE_OFFSET_BITS', '64')]
+        if sys.platform.startswith('linux'):
+            metis_macros += [('LINUX', None)]
+    config.add_library(
+        'metis',
+        sources=([str(f.relative_to(SS.parent)) for f in (SS / 'metis-5.1.0/GKlib').glob('*.c')] +
+                 [str(f.relative_to(SS.parent)) for f in (SS / 'metis-5.1.0/libmetis').glob('*.c')]),
+        include_dirs=[
+            str((SS / 'metis-5.1.0/include').relative_to(SS.parent)),
+            str((SS / 'metis-5.1.0/GKlib').relative_to(SS.parent)),
+            str((SS / 'metis-5.1.0/libmetis').relative_to(SS.parent)),
         ],
-    })
-
-    # CHOLMOD/Check module
-    cholmod_sources = [str((SS / 'CHOLMOD/Check/cholmod_check.c').relative_to(SS.parent)),
-                       str((SS / 'CHOLMOD/Check/cholmod_read.c').relative_to(SS.parent)),
-                       str((SS / 'CHOLMOD/Check/cholmod_write.c').relative_to(SS.parent)),
-                       str((tmp / 'CHOLMODL/Check/cholmod_l_check.c').relative_to(SS.parent)),
-                       str((tmp / 'CHOLMODL/Check/cholmod_l_read.c').relative_to(SS.parent)),
-                       str((tmp / 'CHOLMODL/Check/cholmod_l_write.c').relative_to(SS.parent))]
+        macros=metis_macros,
+        language='c')
+
+    # CHOLMOD: the int sources are compiled from SuiteSparse as they are and
+    # the SuiteSparse_long ones from DLONG copies (cholmod_l_*), which
+    # include DLONG copies of the headers (cholmod_l_*.h) and templates.
     cholmod_includes = [str((SS / 'AMD/Include').relative_to(SS.parent)),
                         str((SS / 'AMD/Source').relative_to(SS.parent)),
                         str((SS / 'COLAMD/Include').relative_to(SS.parent)),
                         str((SS / 'CHOLMOD/Include').relative_to(SS.parent)),
-                        str((tmp / 'CHOLMODL/Include').relative_to(SS.parent))]
-
-    cholmod_l_hdrs = [(hdr.name, hdr.name.replace('cholmod', 'cholmod_l')) for hdr in (SS / 'CHOLMOD/Include').glob('*.h')]
-    if not (tmp / 'CHOLMODL/Include').exists():
-        shutil.copytree(SS / 'CHOLMOD/Include', tmp / 'CHOLMODL/Include')
-        for f in (tmp / 'CHOLMODL/Include').glob('*.h'):
-            fnew = f.parent / f.name.replace('cholmod', 'cholmod_l')
-            shutil.move(f, fnew)
-            _add_macros(f=fnew, macros=['DLONG'])
-            _redirect_headers(f=fnew, headers=cholmod_l_hdrs)
-
-    if not (tmp / 'CHOLMODL/Check').exists():
-        shutil.copytree(SS / 'CHOLMOD/Check', tmp / 'CHOLMODL/Check')
-        for f in (tmp / 'CHOLMODL/Check').glob('cholmod_*.c'):
-            fnew = f.parent / f.name.replace('cholmod_', 'cholmod_l_')
-            shutil.move(f, fnew)
-            _add_macros(f=fnew, macros=['DLONG'])
-            _redirect_headers(f=fnew, headers=[('cholmod_internal.h', 'cholmod_l_internal.h'),
-                                               ('cholmod_check.h', 'cholmod_l_check.h'),
-                                               ('cholmod_config.h', 'cholmod_l_config.h'),
-                                               ('cholmod_matrixops.h', 'cholmod_l_matrixops.h')])
-
-    # CHOLMOD/Core module
-    cholmod_sources += [str(f.relative_to(SS.parent)) for f in (SS / 'CHOLMOD/Core').glob('cholmod_*.c')]
-    cholmod_sources += [str(f.relative_to(SS.parent)) for f in (tmp / 'CHOLMODL/Core').glob('cholmod_*.c')]
-    if not (tmp / 'CHOLMODL/Core').exists():
-        shutil.copytree(SS / 'CHOLMOD/Core', tmp / 'CHOLMODL/Core')
-        for f in (tmp / 'CHOLMODL/Core').glob('*.c'):
-            fnew = f.parent / f.name.replace('cholmod_', 'cholmod_l_')
-            shutil.move(f, fnew)
-            _add_macros(f=fnew, macros=['DLONG'])
-            _redirect_headers(f=fnew, headers=cholmod_l_hdrs + [('t_cholmod_change_factor.c', 't_cholmod_l_change_factor.c'),
-                                                                ('t_cholmod_dense.c', 't_cholmod_l_dense.c'),
-                                                                ('t_cholmod_transpose.c', 't_cholmod_l_transpose.c'),
-                                                                ('t_cholmod_triplet.c', 't_cholmod_l_triplet.c')])
-
-    # CHOLMOD/Cholesky module
-    cholmod_sources += [str(f.relative_to(SS.parent)) for f in (SS / 'CHOLMOD/Cholesky').glob('cholmod_*.c')]
-    cholmod_sources += [str(f.relative_to(SS.parent)) for f in (tmp / 'CHOLMODL/Cholesky').glob('cholmod_*.c')]
-    if not (tmp / 'CHOLMODL/Cholesky').exists():
-        shutil.copytree(SS / 'CHOLMOD/Cholesky', tmp / 'CHOLMODL/Cholesky')
-        for f in (tmp / 'CHOLMODL/Cholesky').glob('*.c'):
-            fnew = f.parent / f.name.replace('cholmod_', 'cholmod_l_')
-            shutil.move(f, fnew)
-            _add_macros(f=fnew, macros=['DLONG'])
-            _redirect_headers(f=fnew, headers=cholmod_l_hdrs + [('t_cholmod_lsolve.c', 't_cholmod_l_lsolve.c'),
-                                                                ('t_cholmod_ltsolve.c', 't_cholmod_l_ltsolve.c'),
-                                                                ('t_cholmod_rowfac.c', 't_cholmod_l_rowfac.c'),
-                                                                ('t_cholmod_solve.c', 't_cholmod_l_solve.c'),
-                                                                ('t_cholmod_dense.c', 't_cholmod_l_dense.c')])
-    
-    # CHOLMOD/Partition module
-    cholmod_includes += [
-        str((SS / 'metis-5.1.0/include').relative_to(SS.parent)),
-        str((SS / 'CAMD/Include').relative_to(SS.parent)),
-        str((SS / 'CCOLAMD/Include').relative_to(SS.parent)),
-    ]
-    cholmod_sources += [str(f.relative_to(SS.parent)) for f in (SS / 'CHOLMOD/Partition').glob('cholmod_*.c')]
-    cholmod_sources += [str(f.relative_to(SS.parent)) for f in (tmp / 'CHOLMODL/Partition').glob('cholmod_l_*.c')]
-    if not (tmp / 'CHOLMODL/Parititon').exists():
-        shutil.copytree(SS / 'CHOLMOD/Partition', tmp / 'CHOLMODL/Parititon')
-        for f in (tmp / 'CHOLMODL/Parititon').glob('*.c'):
-            fnew = f.parent / f.name.replace('cholmod_', 'cholmod_l_')
-            shutil.move(f, fnew)
-            _add_macros(f=fnew, macros=['DLONG'])
-            _redirect_headers(f=fnew, headers=cholmod_l_hdrs)
-
-    # CHOLMOD/MatrixOps module
-    cholmod_sources += [str(f.relative_to(SS.parent)) for f in (SS / 'CHOLMOD/MatrixOps').glob('cholmod_*.c')]
-    cholmod_sources += [str(f.relative_to(SS.parent)) for f in (tmp / 'CHOLMODL/MatrixOps').glob('cholmod_l_*.c')]
-    if not (tmp / 'CHOLMODL/MatrixOps').exists():
-        shutil.copytree(SS / 'CHOLMOD/MatrixOps', tmp / 'CHOLMODL/MatrixOps')
-        for f in (tmp / 'CHOLMODL/MatrixOps').glob('*.c'):
-            fnew = f.parent / f.name.replace('cholmod_', 'cholmod_l_')
-            shutil.move(f, fnew)
-            _add_macros(f=fnew, macros=['DLONG'])
-            _redirect_headers(f=fnew, headers=cholmod_l_hdrs + [('t_cholmod_sdmult.c', 't_cholmod_l_sdmult.c')])
-
-    # CHOLMOD/Modify module
-    cholmod_sources += [str(f.relative_to(SS.parent)) for f in (SS / 'CHOLMOD/Modify').glob('cholmod_*.c')]
-    cholmod_sources += [str(f.relative_to(SS.parent)) for f in (tmp / 'CHOLMODL/Modify').glob('cholmod_l_*.c')]
-    if not (tmp / 'CHOLMODL/Modify').exists():
-        shutil.copytree(SS / 'CHOLMOD/Modify', tmp / 'CHOLMODL/Modify')
-        for f in (tmp / 'CHOLMODL/Modify').glob('*.c'):
-            fnew = f.parent / f.name.replace('cholmod_', 'cholmod_l_')
-            shutil.move(f, fnew)
-            _add_macros(f=fnew, macros=['DLONG'])
-            _redirect_headers(f=fnew, headers=cholmod_l_hdrs + [('t_cholmod_updown.c', 't_cholmod_l_updown.c'),
-                                                                ('t_cholmod_updown_numkr.c', 't_cholmod_l_updown_numkr.c')])
-
-    # CHOLMOD/Supernodal module
-    cholmod_sources += [str(f.relative_to(SS.parent)) for f in (SS / 'CHOLMOD/Supernodal').glob('cholmod_*.c')]
-    cholmod_sources += [str(f.relative_to(SS.parent)) for f in (tmp / 'CHOLMODL/Supernodal').glob('cholmod_l_*.c')]
-    if not (tmp / 'CHOLMODL/Supernodal').exists():
-        shutil.copytree(SS / 'CHOLMOD/Supernodal', tmp / 'CHOLMODL/Supernodal')
-        for f in (tmp / 'CHOLMODL/Supernodal').glob('*.c'):
-            fnew = f.parent / f.name.replace('cholmod_', 'cholmod_l_')
-            shutil.move(f, fnew)
-            _add_macros(f=fnew, macros=['DLONG'])
-            _redirect_headers(f=fnew, headers=cholmod_l_hdrs + [('t_cholmod_super_numeric.c', 't_cholmod_l_super_numeric.c'),
-                                                                ('t_cholmod_super_solve.c', 't_cholmod_l_super_solve.c')])
+                        str((tmp / 'CHOLMODL/Include').relative_to(SS.parent)),
+                        str((SS / 'metis-5.1.0/include').relative_to(SS.parent)),
+                        str((SS / 'CAMD/Include').relative_to(SS.parent)),
+                        str((SS / 'CCOLAMD/Include').relative_to(SS.parent))]
+    cholmod_l_hdrs = [(hdr.name, hdr.name.replace('cholmod', 'cholmod_l'))
+                      for hdr in sorted((SS / 'CHOLMOD/Include').glob('*.h'))]
+    for hdr in sorted((SS / 'CHOLMOD/Include').glob('*.h')):
+        _variant(jobs, hdr, tmp / 'CHOLMODL/Include' / hdr.name.replace('cholmod', 'cholmod_l'),
+                 ['DLONG'], cholmod_l_hdrs)
+    cholmod_sources = []
+    for module in ('Check', 'Core', 'Cholesky', 'Partition', 'MatrixOps', 'Modify', 'Supernodal'):
+        cholmod_sources += _cholmod_l_variants(jobs, module, cholmod_l_hdrs)
 
     # CHOLMOD
-    #lapack_info = get_info('lapack')
+    blas_info = _get_blas_info()
     cholmod_opts = {
         'name': 'cholmod',
         'sources': cholmod_sources,
         'include_dirs': [str((SS / 'SuiteSparse_config').relative_to(SS.parent))] + cholmod_includes,
-        'libraries': ['amd', 'colamd', 'suitesparseconfig'],
+        'libraries': ['amd', 'camd', 'colamd', 'ccolamd', 'metis', 'suitesparseconfig'],
         'language': 'c',
     }
-    config.add_library(**cholmod_opts, macros=[('NPARTITION', None)])
-    config.add_extension(**cholmod_opts, extra_info={
-        'sources': ['cholmod_impl.c'],
-        'libraries': ['cholmod', 'openblas'],
-        'define_macros': [('NPARTITION', None)],
-        'export_symbols': [],
-    })
-
-    return config
-    
-    # SPQR
-    config.add_library(
-        'spqr',
-        sources=[str(f.relative_to(SS.parent)) for f in (SS / 'SPQR/Source').glob('*.cpp')],
-        include_dirs=[
-            str((SS / 'SPQR/Include').relative_to(SS.parent)),
-            str((SS / 'CHOLMOD/Include').relative_to(SS.parent)),
-            str((SS / 'SuiteSparse_config').relative_to(SS.parent)),
-        ],
-        libraries=['amd', 'colamd', 'cholmod', 'suitesparseconfig'],
-        language='c')
+    _generate(jobs)
+    config.add_library(**cholmod_opts)
 
-    shutil.copytree(SS / 'UMFPACK/Source', tmp / 'UMFPACKI/Source')
-    shutil.copytree(SS / 'UMFPACK/Source', tmp / 'UMFPACKL/Source')
-    shutil.copytree(SS / 'UMFPACK/Source', tmp / 'UMFPACKDI/Source')
-    shutil.copytree(SS / 'UMFPACK/Source', tmp / 'UMFPACKDL/Source')
-    shutil.copytree(SS / 'UMFPACK/Source', tmp / 'UMFPACKZI/Source')
-    shutil.copytree(SS / 'UMFPACK/Source', tmp / 'UMFPACKZL/Source')
-    umf_hdrs = {}
-    for type_, macros in [('i', ['DINT']),
-                          ('l', ['DLONG']),
-                          ('di', ['DINT']),
-                          ('dl', ['DLONG']),
-                          ('zi', ['ZINT']),
-                          ('zl', ['ZLONG'])]:
-        umf_hdrs[type_] = ([(f.name, f.name.replace('umf_', f'umf_{type_}_'))
-                            for f in (SS / 'UMFPACK/Source').glob('umf_*.h')] +
-                           [(f.name, f.name.replace('umfpack_', f'umfpack_{type_}_'))
-                            for f in (SS / 'UMFPACK/Source').glob('umfpack_*.h')] +
-                           [('amd_internal.h', f'amd_{type_[-1] if type_ != "zl" else type_}_internal.h')])
-        for f in (tmp / f'UMFPACK{type_.upper()}/Source/').glob('umf_*.h'):
-            fnew = f.parent / f.name.replace('umf_', f'umf_{type_}_')
-            shutil.move(f, fnew.relative_to(SS.parent))
-            _add_macros(f=fnew, macros=macros)
-            _redirect_headers(f=fnew, headers=umf_hdrs[type_])
+    # UMFPACK
+    # Every variant is compiled from the same source file with different
+    # macros, following UMFPACK/Lib/Makefile.  The unmodified headers are
+    # found through the UMFPACK/Source include directory.
 
     # non-user-callable umf_*.[ch] files, int/SuiteSparse_long versions only
     # (no real/complex):
     UMFINT = ['umf_analyze', 'umf_apply_order', 'umf_colamd', 'umf_free',
               'umf_fsize', 'umf_is_permutation', 'umf_malloc', 'umf_realloc',
               'umf_report_perm', 'umf_singletons', 'umf_cholmod']
-    umfpack_sources = []
-    for type_, macro in [('i', 'DINT'), ('l', 'DLONG')]:
-        for f0 in UMFINT:
-            f = tmp / f'UMFPACK{type_.upper()}/Source/{f0}.c'
-            fnew = f.parent / f.name.replace('umf_', f'umf_{type_}_')
-            umfpack_sources.append(str(fnew.relative_to(SS.parent)))
-            shutil.move(f, fnew)
-            _add_macros(f=fnew, macros=[macro])
-            _redirect_headers(f=fnew, headers=umf_hdrs[type_])
-        
+
     # non-user-callable, created from umf_ltsolve.c, umf_utsolve.c,
     # umf_triplet.c, and umf_assemble.c , with int/SuiteSparse_long
     # and real/complex versions:
@@ -424,8 +341,8 @@ def configuration(parent_package='', top_path=None):
              'umf_symbolic_usage', 'umf_transpose', 'umf_tuple_lengths',
              'umf_usolve', 'umf_utsolve', 'umf_valid_numeric',
              'umf_valid_symbolic', 'umf_grow_front', 'umf_start_front',
-	     'umf_store_lu', 'umf_scale']
-    
+             'umf_store_lu', 'umf_scale']
+
     # non-user-callable, int/SuiteSparse_long and real/complex versions:
     UMF = UMF_CREATED + UMFCH
 
@@ -444,111 +361,127 @@ def configuration(parent_package='', top_path=None):
                'umfpack_triplet_to_col', 'umfpack_scale',
                'umfpack_load_numeric', 'umfpack_save_numeric',
                'umfpack_load_symbolic', 'umfpack_save_symbolic']
-    
+
     # user-callable, created from umfpack_solve.c (umfpack_wsolve.h exists, though):
     # with int/SuiteSparse_long and real/complex versions:
     UMFPACKW = ['umfpack_wsolve']
 
     UMFUSER = UMFPACKW + UMFPACK
 
-    _special_macros = {
-        r'umf_[dz][il]_\whsolve': ['CONJUGATE_SOLVE'],
-        r'umf_[dz][il]_triplet_map_x': ['DO_MAP', 'DO_VALUES'],
-        r'umf_[dz][il]_triplet_map_nox': ['DO_MAP'],
-        r'umf_[dz][il]_triplet_nomap_x': ['DO_VALUES'],
-        r'umf_[dz][il]_assemble_fixq': ['FIXQ'],
-        r'umf_[dz][il]_store_lu_drop': ['DROP'],
-        r'umfpack_[dz][il]_wsolve': ['WSOLVE'],
-    }
-
-    do_copy = False
-    for type_, macro in [('di', ['DINT']),
-                         ('dl', ['DLONG']),
-                         ('zi', ['ZINT']),
-                         ('zl', ['ZLONG'])]:
-        for f0 in UMF + UMFUSER:  # TODO: UMFUSER targets not building!
-            f = tmp / f'UMFPACK{type_.upper()}/Source/{f0}.c'
-            if f0.startswith('umf_'):
-                fnew = f.parent / f.name.replace('umf_', f'umf_{type_}_')
-            else:
-                fnew = f.parent / f.name.replace('umfpack_', f'umfpack_{type_}_')
-            # convert targets to correct source files names:
-            if 'hsolve' in fnew.name:
-                f = f.parent / f.name.replace('hsolve', 'tsolve')
-            elif 'umf_triplet' in f0:
-                f = f.parent / 'umf_triplet.c'
-                do_copy = True
-            elif 'assemble' in fnew.name:
-                f = f.parent / 'umf_assemble.c'
-                do_copy = True
-            elif 'store_lu' in fnew.name:
-                f = f.parent / 'umf_store_lu.c'
-                do_copy = True
-            elif 'wsolve':
-                f = f.parent / 'umfpack_solve.c'
-                do_copy = True
-            umfpack_sources.append(str(fnew.relative_to(SS.parent)))
-            if not do_copy:
-                shutil.move(f, fnew)
-            else:
-                shutil.copyfile(f, fnew)
-                do_copy = False
-            # Do any extra macros apply to this file?
-            extra_macros = []
-            for regex in _special_macros:
-                match = re.search(regex, fnew.name)
-                if match:
-                    extra_macros += _special_macros[regex]
-                break
-            _add_macros(f=fnew, macros=macro + extra_macros)
-            _redirect_headers(f=fnew, headers=umf_hdrs[type_])
-
     # user-callable, only one version for int/SuiteSparse_long,
     # real/complex, *.[ch] files:
     GENERIC = ['umfpack_timer', 'umfpack_tictoc']
-    for f0 in GENERIC:
-        f = SS / f'UMFPACK/Source/{f0}.c'
-        umfpack_sources.append(str(f.relative_to(SS.parent)))
-            
-    # UMFPACK
-    config.add_library(
-        'umfpack',
-        sources=umfpack_sources,
-        include_dirs=[
-            str((tmp / 'UMFPACKI/Source').relative_to(SS.parent)),
-            str((tmp / 'UMFPACKL/Source').relative_to(SS.parent)),
-            str((tmp / 'UMFPACKDI/Source').relative_to(SS.parent)),
-            str((tmp / 'UMFPACKDL/Source').relative_to(SS.parent)),
-            str((tmp / 'UMFPACKZI/Source').relative_to(SS.parent)),
-            str((tmp / 'UMFPACKZL/Source').relative_to(SS.parent)),
-            str((tmp / 'AMDI/Include').relative_to(SS.parent)),
-            str((tmp / 'AMDL/Include').relative_to(SS.parent)),
-            str((tmp / 'AMDZL/Include').relative_to(SS.parent)),            
-            
+
+    # generated file -> (source file, extra macros)
+    _special_sources = {
+        'umf_lhsolve': ('umf_ltsolve', ['CONJUGATE_SOLVE']),
+        'umf_uhsolve': ('umf_utsolve', ['CONJUGATE_SOLVE']),
+        'umf_triplet_map_x': ('umf_triplet', ['DO_MAP', 'DO_VALUES']),
+        'umf_triplet_map_nox': ('umf_triplet', ['DO_MAP']),
+        'umf_triplet_nomap_x': ('umf_triplet', ['DO_VALUES']),
+        'umf_triplet_nomap_nox': ('umf_triplet', []),
+        'umf_assemble_fixq': ('umf_assemble', ['FIXQ']),
+        'umf_store_lu_drop': ('umf_store_lu', ['DROP']),
+        'umfpack_wsolve': ('umfpack_solve', ['WSOLVE']),
+    }
+
+    umf_variants = [(f0, type_, macro)
+                    for type_, macro in [('i', 'DINT'), ('l', 'DLONG')]
+                    for f0 in UMFINT]
+    umf_variants += [(f0, type_, macro)
+                     for type_, macro in [('di', 'DINT'), ('dl', 'DLONG'),
+                                          ('zi', 'ZINT'), ('zl', 'ZLONG')]
+                     for f0 in UMF + UMFUSER]
+
+    umfpack_sources = []
+    for f0, type_, macro in umf_variants:
+        src, extra_macros = _special_sources.get(f0, (f0, []))
+        prefix = 'umfpack_' if f0.startswith('umfpack_') else 'umf_'
+        fnew = f0.replace(prefix, f'{prefix}{type_}_', 1) + '.c'
+        umfpack_sources.append(_variant(jobs, SS / f'UMFPACK/Source/{src}.c',
+                                        tmp / 'UMFPACK/Source' / fnew,
+                                        [macro] + extra_macros))
+    umfpack_sources += [str((SS / f'UMFPACK/Source/{f0}.c').relative_to(SS.parent))
+                        for f0 in GENERIC]
+
+    umfpack_opts = {
+        'name': 'umfpack',
+        'sources': umfpack_sources,
+        'include_dirs': [
             str((SS / 'UMFPACK/Include').relative_to(SS.parent)),
             str((SS / 'UMFPACK/Source').relative_to(SS.parent)),
             str((SS / 'AMD/Include').relative_to(SS.parent)),
             str((SS / 'SuiteSparse_config').relative_to(SS.parent)),
             str((SS / 'CHOLMOD/Include').relative_to(SS.parent)),
         ],
-        libraries=['amd', 'cholmod', 'suitesparseconfig'],
-        language='c')
-
-    # UMFPACK test
-    lapack_opt = get_info('lapack')
+        'libraries': ['amd', 'cholmod', 'suitesparseconfig'],
+        'language': 'c',
+    }
+    _generate(jobs)
+    config.add_library(**umfpack_opts)
+    # SPQR
+    config.add_library(
+        'spqr',
+        sources=[str(f.relative_to(SS.parent)) for f in (SS / 'SPQR/Source').glob('*.cpp')],
+        include_dirs=[
+            str((SS / 'SPQR/Include').relative_to(SS.parent)),
+            str((SS / 'CHOLMOD/Include').relative_to(SS.parent)),
+            str((SS / 'SuiteSparse_config').relative_to(SS.parent)),
+        ],
+        libraries=['cholmod', 'amd', 'colamd', 'suitesparseconfig'],
+        language='c++')
+
+    # The SuiteSparse runtime: every binding module is compiled into one
+    # extension linked once against the libraries above, so the modules share
+    # a single copy of the SuiteSparse code and of its global state (the
+    # SuiteSparse_config allocator and timer).  core_impl.c creates the
+    # modules and suitesparse/__init__.py makes them importable by name.
     config.add_extension(
-        'umfpack_demo',
-        sources=['umfpack_demo.c'],
+        '_core',
+        sources=['core_impl.c', 'memory_impl.c', 'amd_impl.c', 'camd_impl.c',
+                 'colamd_impl.c', 'ccolamd_impl.c', 'cholmod_impl.c',
+                 'umfpack_impl.c', 'spqr_impl.c'],
         include_dirs=[
             str((SS / 'SuiteSparse_config').relative_to(SS.parent)),
             str((SS / 'AMD/Include').relative_to(SS.parent)),
+            str((SS / 'CAMD/Include').relative_to(SS.parent)),
+            str((SS / 'COLAMD/Include').relative_to(SS.parent)),
+            str((SS / 'CCOLAMD/Include').relative_to(SS.parent)),
+            str((SS / 'CHOLMOD/Include').relative_to(SS.parent)),
             str((SS / 'UMFPACK/Include').relative_to(SS.parent)),
+            str((SS / 'SPQR/Include').relative_to(SS.parent)),
+        ] + get_numpy_include_dirs(),
+        depends=['ss_common.h'],
+        libraries=['spqr', 'umfpack', 'cholmod', 'metis', 'ccolamd', 'colamd',
+                   'camd', 'amd', 'suitesparseconfig'],
+        # the C API stays available to other extensions through this module
+        export_symbols=[
+            'amd_order', 'amd_l_order', 'amd_2', 'amd_l2', 'amd_valid',
+            'amd_l_valid', 'amd_defaults', 'amd_l_defaults', 'amd_control',
+            'amd_l_control', 'amd_info', 'amd_l_info',
+            'camd_order', 'camd_l_order', 'camd_2', 'camd_l2', 'camd_valid',
+            'camd_l_valid', 'camd_cvalid', 'camd_l_cvalid', 'camd_defaults',
+            'camd_l_defaults', 'camd_control', 'camd_l_control', 'camd_info',
+            'camd_l_info',
+            'colamd_recommended', 'colamd_l_recommended',
+            'colamd_set_defaults', 'colamd_l_set_defaults',
+            'colamd', 'colamd_l', 'symamd', 'symamd_l',
+            'colamd_report', 'colamd_l_report',
+            'symamd_report', 'symamd_l_report',
+            'ccolamd_recommended', 'ccolamd_l_recommended',
+            'ccolamd_set_defaults', 'ccolamd_l_set_defaults',
+            'ccolamd', 'ccolamd_l', 'csymamd', 'csymamd_l',
+            'ccolamd_report', 'ccolamd_l_report',
+            'csymamd_report', 'csymamd_l_report',
+            'ccolamd2', 'ccolamd2_l',
+            'ccolamd_apply_order', 'ccolamd_l_apply_order',
+            'ccolamd_fsize', 'ccolamd_l_fsize',
+            'ccolamd_postorder', 'ccolamd_l_postorder',
+            'ccolamd_post_tree', 'ccolamd_l_post_tree',
         ],
-        libraries=['umfpack'],
-        language='c',
-        extra_info=lapack_opt,
-    )
-    
+        language='c++',
+        extra_info=blas_info)
+
     return config
 
 
@@ -559,16 +492,5 @@ if __name__ == '__main__':
     if DEBUG:
         logger.setLevel(logging.INFO)
 
-    # try...finally statement ensures tmp dir is removed at end
-    # of setup
-    try:
-        #if tmp.exists():
-        #    logger.info(f'Removing tmp dir {tmp} to start')
-        #    shutil.rmtree(tmp)
-        #tmp.mkdir()
-        setup(**configuration().todict())
-    finally:
-        if DEBUG:
-            logger.info(f'Not removing tmp dir {tmp}')
-        else:
-            shutil.rmtree(tmp)
+    # tmp is kept between builds: it caches the generated variant sources
+    setup(**configuration().todict())
@@ -0,0 +1,813 @@
+/* Python bindings for SuiteSparseQR: sparse multifrontal QR factorization. */
+
+#include <string.h>
+
+#include "ss_common.h"
+#include "pythread.h"
+#include "cholmod.h"
+#include "SuiteSparseQR_C.h"
+
+static PyObject *SpqrError;
+
+typedef struct {
+    PyObject_HEAD
+    cholmod_common common;
+    SuiteSparseQR_C_factorization *QR;
+    PyThread_type_lock lock;
+    double tol;
+    double tol_used;
+    double analyze_time;    /* seconds of SuiteSparseQR_C_symbolic */
+    double factorize_time;  /* and of the last SuiteSparseQR_C_numeric */
+    SuiteSparse_long rank;
+    int is_complex;
+    int is_csr;         /* input is CSR and is transposed before use */
+    npy_intp nrow;
+    npy_intp ncol;
+} QRObject;
+
+#define ACQUIRE_LOCK(obj) do {                                              \
+    if (!PyThread_acquire_lock((obj)->lock, 0)) {                           \
+        Py_BEGIN_ALLOW_THREADS                                              \
+        PyThread_acquire_lock((obj)->lock, 1);                              \
+        Py_END_ALLOW_THREADS                                                \
+    } } while (0)
+#define RELEASE_LOCK(obj) PyThread_release_lock((obj)->lock)
+
+/* Raise the Python exception matching Common->status.  Returns -1 if an
+ * exception was set, 0 if the status is OK or only a warning. */
+static int
+check_common(cholmod_common *common, const char *name)
+{
+    switch (common->status) {
+    case CHOLMOD_OK:
+    case CHOLMOD_DSMALL:
+        return 0;
+    case CHOLMOD_OUT_OF_MEMORY:
+        PyErr_NoMemory();
+        return -1;
+    case CHOLMOD_INVALID:
+        PyErr_Format(PyExc_ValueError, "invalid input to %s", name);
+        return -1;
+    case CHOLMOD_TOO_LARGE:
+        PyErr_SetString(PyExc_OverflowError,
+                        "problem too large for SuiteSparseQR");
+        return -1;
+    default:
+        PyErr_Format(SpqrError, "%s failed with status %d", name,
+                     common->status);
+        return -1;
+    }
+}
+
+static const struct {
+    const char *name;
+    int value;
+} orderings[] = {
+    {"default", SPQR_ORDERING_DEFAULT},
+    {"fixed", SPQR_ORDERING_FIXED},
+    {"natural", SPQR_ORDERING_NATURAL},
+    {"colamd", SPQR_ORDERING_COLAMD},
+    {"amd", SPQR_ORDERING_AMD},
+    {"metis", SPQR_ORDERING_METIS},
+    {"cholmod", SPQR_ORDERING_CHOLMOD},
+    {"best", SPQR_ORDERING_BEST},
+    {"bestamd", SPQR_ORDERING_BESTAMD},
+};
+
+static int
+parse_ordering(const char *ordering, int *out)
+{
+    size_t k;
+
+    for (k = 0; k < sizeof(orderings) / sizeof(orderings[0]); k++) {
+        if (strcmp(ordering, orderings[k].name) == 0) {
+            *out = orderings[k].value;
+            return 0;
+        }
+    }
+    PyErr_Format(PyExc_ValueError, "unknown ordering '%s'", ordering);
+    return -1;
+}
+
+static const char *
+ordering_name(SuiteSparse_long ordering)
+{
+    size_t k;
+
+    for (k = 0; k < sizeof(orderings) / sizeof(orderings[0]); k++) {
+        if (orderings[k].value == ordering) {
+            return orderings[k].name;
+        }
+    }
+    return "unknown";
+}
+
+/* Statistics of a factorization of an nrow-by-ncol matrix, from the
+ * cholmod_common it ran with and the timings taken around the calls. */
+static PyObject *
+common_stats(const cholmod_common *common, npy_intp nrow, npy_intp ncol,
+             double analyze_time, double factorize_time)
+{
+    return Py_BuildValue(
+        "{s:n,s:n,s:s,s:L,s:d,s:L,s:L,s:L,s:L,s:L,s:d,s:d,s:n,s:n,s:d,s:d}",
+        "nrow", (Py_ssize_t)nrow,
+        "ncol", (Py_ssize_t)ncol,
+        "ordering", ordering_name(common->SPQR_istat[6]),
+        "rank", (long long)common->SPQR_istat[4],
+        "tol", common->SPQR_tol_used,
+        "rnz_bound", (long long)common->SPQR_istat[0],
+        "hnz_bound", (long long)common->SPQR_istat[1],
+        "nfronts", (long long)common->SPQR_istat[2],
+        "ntasks", (long long)common->SPQR_istat[3],
+        "singletons", (long long)common->SPQR_istat[5],
+        "flops", common->SPQR_flopcount,
+        "flops_bound", common->SPQR_flopcount_bound,
+        "memory_usage", (Py_ssize_t)common->memory_usage,
+        "memory_inuse", (Py_ssize_t)common->memory_inuse,
+        "analyze_time", analyze_time,
+        "factorize_time", factorize_time);
+}
+
+static PyObject *
+qr_stats(QRObject *self)
+{
+    return common_stats(&self->common, self->nrow, self->ncol,
+                        self->analyze_time, self->factorize_time);
+}
+
+/* Report the statistics of the call ``name`` on a QR object to the hook. */
+static int
+report_stats(QRObject *self, const char *name)
+{
+    PyObject *stats;
+
+    if (!ss_want_stats(0)) {
+        return 0;
+    }
+    stats = qr_stats(self);
+    if (stats == NULL) {
+        return -1;
+    }
+    ss_report_stats(name, stats);
+    Py_DECREF(stats);
+    return 0;
+}
+
+/* Tolerance argument: None is SPQR's default, a negative value turns rank
+ * detection off. */
+static int
+parse_tol(PyObject *obj, double *tol)
+{
+    if (obj == Py_None) {
+        *tol = SPQR_DEFAULT_TOL;
+        return 0;
+    }
+    *tol = PyFloat_AsDouble(obj);
+    if (*tol == -1.0 && PyErr_Occurred()) {
+        return -1;
+    }
+    if (*tol < 0) {
+        *tol = SPQR_NO_TOL;
+    }
+    return 0;
+}
+
+/* Whether the data of a scipy.sparse matrix are complex. */
+static int
+has_complex_values(PyObject *obj)
+{
+    PyObject *data = PyObject_GetAttrString(obj, "data");
+    int is_complex;
+
+    if (data == NULL) {
+        return -1;
+    }
+    is_complex = PyArray_Check(data)
+        && PyArray_ISCOMPLEX((PyArrayObject *)data);
+    Py_DECREF(data);
+    return is_complex;
+}
+
+/* Parse a CSC/CSR matrix with SuiteSparse_long indices and values of the
+ * given kind, and point ``A`` at its compressed-column arrays: those of A
+ * itself for CSC input, of A' for CSR input.  Nothing is copied for int64
+ * indices and float64/complex128 data.  On success ``c`` and ``*x`` hold
+ * references the caller must release. */
+static int
+parse_matrix(PyObject *obj, int is_complex, ss_compressed *c,
+             PyArrayObject **x, cholmod_sparse *A)
+{
+    if (ss_parse_compressed_as(obj, NULL, SS_NPY_LONG, c) < 0) {
+        return -1;
+    }
+    if (ss_check_indices(c) < 0) {
+        ss_compressed_clear(c);
+        return -1;
+    }
+    *x = ss_values_array_as(obj, c->nnz, is_complex ? NPY_CDOUBLE
+                                                    : NPY_DOUBLE);
+    if (*x == NULL) {
+        ss_compressed_clear(c);
+        return -1;
+    }
+    memset(A, 0, sizeof(*A));
+    A->nrow = (size_t)c->nrow;
+    A->ncol = (size_t)c->ncol;
+    A->nzmax = (size_t)(c->nnz > 0 ? c->nnz : 1);
+    A->p = PyArray_DATA(c->indptr);
+    A->i = PyArray_DATA(c->indices);
+    A->x = PyArray_DATA(*x);
+    A->stype = 0;
+    A->itype = CHOLMOD_LONG;
+    A->xtype = is_complex ? CHOLMOD_COMPLEX : CHOLMOD_REAL;
+    A->dtype = CHOLMOD_DOUBLE;
+    A->packed = 1;
+    return 0;
+}
+
+/* The matrix to factorize: ``A`` itself, or a CSC copy of the transpose
+ * of a CSR input.  Called with the GIL released. */
+static cholmod_sparse *
+csc_matrix(cholmod_sparse *A, int is_csr, cholmod_common *common)
+{
+    return is_csr ? cholmod_l_transpose(A, 1, common) : A;
+}
+
+/* Wrap an F-contiguous 1-D or 2-D array as a cholmod_dense.  A 1-D array
+ * is a column if ``row`` is false, else a row. */
+static void
+wrap_dense(PyArrayObject *arr, int is_complex, int row, cholmod_dense *X)
+{
+    memset(X, 0, sizeof(*X));
+    if (PyArray_NDIM(arr) == 2) {
+        X->nrow = (size_t)PyArray_DIM(arr, 0);
+        X->ncol = (size_t)PyArray_DIM(arr, 1);
+    }
+    else if (row) {
+        X->nrow = 1;
+        X->ncol = (size_t)PyArray_DIM(arr, 0);
+    }
+    else {
+        X->nrow = (size_t)PyArray_DIM(arr, 0);
+        X->ncol = 1;
+    }
+    X->d = X->nrow;
+    X->nzmax = X->nrow * X->ncol;
+    X->x = PyArray_DATA(arr);
+    X->xtype = is_complex ? CHOLMOD_COMPLEX : CHOLMOD_REAL;
+    X->dtype = CHOLMOD_DOUBLE;
+}
+
+/* Copy a cholmod_dense result into a new array with ``nd`` dimensions. */
+static PyObject *
+dense_to_array(cholmod_dense *X, int nd, int is_complex)
+{
+    npy_intp dims[2];
+    PyArrayObject *arr;
+
+    if (nd == 1) {
+        dims[0] = (npy_intp)(X->nrow * X->ncol);
+    }
+    else {
+        dims[0] = (npy_intp)X->nrow;
+        dims[1] = (npy_intp)X->ncol;
+    }
+    arr = (PyArrayObject *)PyArray_EMPTY(
+        nd, dims, is_complex ? NPY_CDOUBLE : NPY_DOUBLE, 1);
+    if (arr != NULL) {
+        memcpy(PyArray_DATA(arr), X->x, (size_t)PyArray_NBYTES(arr));
+    }
+    return (PyObject *)arr;
+}
+
+/* Right-hand side as an F-contiguous array of the factor's type, with
+ * ``nrow`` rows unless ``nrow`` is negative. */
+static PyArrayObject *
+rhs_array(PyObject *obj, int is_complex, npy_intp nrow, const char *name)
+{
+    PyArrayObject *b = (PyArrayObject *)PyArray_FROM_OTF(
+        obj, is_complex ? NPY_CDOUBLE : NPY_DOUBLE,
+        NPY_ARRAY_F_CONTIGUOUS | NPY_ARRAY_ALIGNED);
+
+    if (b == NULL) {
+        return NULL;
+    }
+    if (PyArray_NDIM(b) < 1 || PyArray_NDIM(b) > 2) {
+        PyErr_Format(PyExc_ValueError, "%s must be a 1-D or 2-D array",
+                     name);
+        Py_DECREF(b);
+        return NULL;
+    }
+    if (nrow >= 0 && PyArray_DIM(b, 0) != nrow) {
+        PyErr_Format(PyExc_ValueError, "%s must have %zd rows", name,
+                     (Py_ssize_t)nrow);
+        Py_DECREF(b);
+        return NULL;
+    }
+    return b;
+}
+
+/* ------------------------------------------------------------------------ */
+/* QR type */
+/* ------------------------------------------------------------------------ */
+
+PyDoc_STRVAR(qr_doc,
+"QR(A, *, ordering='default', tol=None)\n"
+"--\n\n"
+"Rank-revealing sparse QR factorization A*E = Q*R by SuiteSparseQR.\n\n"
+"The ordering and symbolic analysis are computed once; factorize() then\n"
+"computes a new numeric factorization for a matrix with the same pattern.\n"
+"Q is kept in Householder form.  The object owns the cholmod_common used\n"
+"by every call, so its workspace is reused across factorizations and\n"
+"solves.\n\n"
+"Parameters\n"
+"----------\n"
+"A : scipy.sparse CSC or CSR matrix\n"
+"    Matrix of any shape, float64 or complex128.  int64 CSC arrays are\n"
+"    used in place; int32 indices are converted and a CSR matrix is\n"
+"    transposed into a CSC copy.\n"
+"ordering : {'default', 'fixed', 'natural', 'colamd', 'amd', 'metis', "
+"'cholmod', 'best', 'bestamd'}, optional\n"
+"    Fill-reducing column ordering of A'A.\n"
+"tol : float, optional\n"
+"    Columns whose norm is at most tol are treated as dependent, which\n"
+"    determines the rank.  None uses SuiteSparseQR's default,\n"
+"    20*(m+n)*eps*max column norm; a negative value turns rank detection\n"
+"    off.");
+
+static PyObject *
+qr_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"A", "ordering", "tol", NULL};
+    PyObject *obj, *tol_obj = Py_None;
+    PyArrayObject *x = NULL;
+    const char *ordering = "default";
+    QRObject *self;
+    ss_compressed c;
+    cholmod_sparse Araw, *A;
+    int order, is_complex, ok = 0;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|$sO:QR", kwlist,
+                                     &obj, &ordering, &tol_obj)) {
+        return NULL;
+    }
+    if (parse_ordering(ordering, &order) < 0
+        || (is_complex = has_complex_values(obj)) < 0) {
+        return NULL;
+    }
+    self = (QRObject *)type->tp_alloc(type, 0);
+    if (self == NULL) {
+        return NULL;
+    }
+    if (parse_tol(tol_obj, &self->tol) < 0) {
+        Py_DECREF(self);
+        return NULL;
+    }
+    self->lock = PyThread_allocate_lock();
+    if (self->lock == NULL) {
+        Py_DECREF(self);
+        PyErr_SetString(PyExc_MemoryError, "unable to allocate lock");
+        return NULL;
+    }
+    cholmod_l_start(&self->common);
+    self->common.print = 0;
+    self->is_complex = is_complex;
+    if (parse_matrix(obj, is_complex, &c, &x, &Araw) < 0) {
+        Py_DECREF(self);
+        return NULL;
+    }
+    self->is_csr = c.is_csr;
+    self->nrow = c.is_csr ? c.ncol : c.nrow;
+    self->ncol = c.is_csr ? c.nrow : c.ncol;
+
+    Py_BEGIN_ALLOW_THREADS
+    A = csc_matrix(&Araw, self->is_csr, &self->common);
+    if (A != NULL) {
+        self->analyze_time = SuiteSparse_time();
+        self->QR = SuiteSparseQR_C_symbolic(
+            order, self->tol != SPQR_NO_TOL, A, &self->common);
+        self->analyze_time = SuiteSparse_time() - self->analyze_time;
+        if (self->QR != NULL) {
+            self->factorize_time = SuiteSparse_time();
+            ok = SuiteSparseQR_C_numeric(self->tol, A, self->QR,
+                                         &self->common);
+            self->factorize_time = SuiteSparse_time()
+                                   - self->factorize_time;
+        }
+        if (A != &Araw) {
+            cholmod_l_free_sparse(&A, &self->common);
+        }
+    }
+    Py_END_ALLOW_THREADS
+    Py_DECREF(x);
+    ss_compressed_clear(&c);
+    if (!ok || check_common(&self->common, "SuiteSparseQR") < 0) {
+        if (!PyErr_Occurred()) {
+            PyErr_SetString(SpqrError, "SuiteSparseQR factorization failed");
+        }
+        Py_DECREF(self);
+        return NULL;
+    }
+    self->rank = self->common.SPQR_istat[4];
+    self->tol_used = self->common.SPQR_tol_used;
+    if (report_stats(self, "spqr.QR") < 0) {
+        Py_DECREF(self);
+        return NULL;
+    }
+    return (PyObject *)self;
+}
+
+static void
+qr_dealloc(QRObject *self)
+{
+    if (self->lock != NULL) {
+        if (self->QR != NULL) {
+            SuiteSparseQR_C_free(&self->QR, &self->common);
+        }
+        cholmod_l_finish(&self->common);
+        PyThread_free_lock(self->lock);
+    }
+    Py_TYPE(self)->tp_free((PyObject *)self);
+}
+
+PyDoc_STRVAR(factorize_doc,
+"factorize(A)\n"
+"--\n\n"
+"Numeric factorization of A, reusing the ordering and symbolic analysis.\n\n"
+"A must have the format, shape and sparsity pattern of the matrix the\n"
+"object was created with; only its values may differ.  The rank is\n"
+"re-estimated with the tolerance given at construction.");
+
+static PyObject *
+qr_factorize(QRObject *self, PyObject *obj)
+{
+    PyArrayObject *x;
+    ss_compressed c;
+    cholmod_sparse Araw, *A;
+    double time;
+    int ok = 0;
+
+    if (parse_matrix(obj, self->is_complex, &c, &x, &Araw) < 0) {
+        return NULL;
+    }
+    if (c.is_csr != self->is_csr
+        || (c.is_csr ? c.ncol : c.nrow) != self->nrow
+        || (c.is_csr ? c.nrow : c.ncol) != self->ncol) {
+        PyErr_Format(PyExc_ValueError, "expected a %s matrix of shape "
+                     "(%zd, %zd)", self->is_csr ? "CSR" : "CSC",
+                     (Py_ssize_t)self->nrow, (Py_ssize_t)self->ncol);
+        Py_DECREF(x);
+        ss_compressed_clear(&c);
+        return NULL;
+    }
+    ACQUIRE_LOCK(self);
+    Py_BEGIN_ALLOW_THREADS
+    A = csc_matrix(&Araw, self->is_csr, &self->common);
+    if (A != NULL) {
+        time = SuiteSparse_time();
+        ok = SuiteSparseQR_C_numeric(self->tol, A, self->QR, &self->common);
+        time = SuiteSparse_time() - time;
+        if (A != &Araw) {
+            cholmod_l_free_sparse(&A, &self->common);
+        }
+    }
+    Py_END_ALLOW_THREADS
+    if (ok) {
+        self->rank = self->common.SPQR_istat[4];
+        self->tol_used = self->common.SPQR_tol_used;
+        self->factorize_time = time;
+    }
+    RELEASE_LOCK(self);
+    Py_DECREF(x);
+    ss_compressed_clear(&c);
+    if (!ok || check_common(&self->common, "SuiteSparseQR_numeric") < 0) {
+        if (!PyErr_Occurred()) {
+            PyErr_SetString(SpqrError, "SuiteSparseQR_numeric failed");
+        }
+        return NULL;
+    }
+    if (report_stats(self, "spqr.QR.factorize") < 0) {
+        return NULL;
+    }
+    Py_RETURN_NONE;
+}
+
+PyDoc_STRVAR(solve_doc,
+"solve(b)\n"
+"--\n\n"
+"Least-squares solution of A x = b, as x = E*(R \\ (Q'*b)).\n\n"
+"b is a 1-D array of length m or a 2-D array with m rows.  Returns x with\n"
+"n rows.  For a rank-deficient A this is a basic solution: the components\n"
+"of x past the rank, in the column ordering E, are zero.  It is not the\n"
+"minimum-norm solution.");
+
+static PyObject *
+qr_solve(QRObject *self, PyObject *obj)
+{
+    PyArrayObject *b;
+    cholmod_dense B, *Y, *X = NULL;
+    PyObject *result;
+
+    b = rhs_array(obj, self->is_complex, self->nrow, "b");
+    if (b == NULL) {
+        return NULL;
+    }
+    wrap_dense(b, self->is_complex, 0, &B);
+    ACQUIRE_LOCK(self);
+    Py_BEGIN_ALLOW_THREADS
+    Y = SuiteSparseQR_C_qmult(SPQR_QTX, self->QR, &B, &self->common);
+    if (Y != NULL) {
+        X = SuiteSparseQR_C_solve(SPQR_RETX_EQUALS_B, self->QR, Y,
+                                  &self->common);
+        cholmod_l_free_dense(&Y, &self->common);
+    }
+    Py_END_ALLOW_THREADS
+    RELEASE_LOCK(self);
+    if (X == NULL) {
+        Py_DECREF(b);
+        if (check_common(&self->common, "SuiteSparseQR_solve") == 0) {
+            PyErr_SetString(SpqrError, "SuiteSparseQR_solve failed");
+        }
+        return NULL;
+    }
+    result = dense_to_array(X, PyArray_NDIM(b), self->is_complex);
+    Py_DECREF(b);
+    cholmod_l_free_dense(&X, &self->common);
+    return result;
+}
+
+PyDoc_STRVAR(qmult_doc,
+"qmult(x, method='QTX')\n"
+"--\n\n"
+"Multiply by the orthogonal factor Q, held in Householder form.\n\n"
+"method is 'QTX' (Q'*x), 'QX' (Q*x), 'XQT' (x*Q') or 'XQ' (x*Q).  x has\n"
+"m rows for 'QTX' and 'QX' and m columns for 'XQT' and 'XQ'; a 1-D x is a\n"
+"column or a row accordingly.  Returns an array with the shape of x.");
+
+static PyObject *
+qr_qmult(QRObject *self, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"x", "method", NULL};
+    PyObject *obj, *result;
+    PyArrayObject *x;
+    const char *method = "QTX";
+    cholmod_dense X, *Y;
+    int m, right;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|s:qmult", kwlist,
+                                     &obj, &method)) {
+        return NULL;
+    }
+    if (strcmp(method, "QTX") == 0) {
+        m = SPQR_QTX;
+    }
+    else if (strcmp(method, "QX") == 0) {
+        m = SPQR_QX;
+    }
+    else if (strcmp(method, "XQT") == 0) {
+        m = SPQR_XQT;
+    }
+    else if (strcmp(method, "XQ") == 0) {
+        m = SPQR_XQ;
+    }
+    else {
+        PyErr_Format(PyExc_ValueError, "unknown method '%s'", method);
+        return NULL;
+    }
+    right = (m == SPQR_XQT || m == SPQR_XQ);
+    x = rhs_array(obj, self->is_complex, right ? -1 : self->nrow, "x");
+    if (x == NULL) {
+        return NULL;
+    }
+    wrap_dense(x, self->is_complex, right, &X);
+    if (right && X.ncol != (size_t)self->nrow) {
+        PyErr_Format(PyExc_ValueError, "x must have %zd columns",
+                     (Py_ssize_t)self->nrow);
+        Py_DECREF(x);
+        return NULL;
+    }
+    ACQUIRE_LOCK(self);
+    Py_BEGIN_ALLOW_THREADS
+    Y = SuiteSparseQR_C_qmult(m, self->QR, &X, &self->common);
+    Py_END_ALLOW_THREADS
+    RELEASE_LOCK(self);
+    if (Y == NULL) {
+        Py_DECREF(x);
+        if (check_common(&self->common, "SuiteSparseQR_qmult") == 0) {
+            PyErr_SetString(SpqrError, "SuiteSparseQR_qmult failed");
+        }
+        return NULL;
+    }
+    result = dense_to_array(Y, PyArray_NDIM(x), self->is_complex);
+    Py_DECREF(x);
+    cholmod_l_free_dense(&Y, &self->common);
+    return result;
+}
+
+static PyObject *
+qr_get_shape(QRObject *self, void *closure)
+{
+    return Py_BuildValue("(nn)", (Py_ssize_t)self->nrow,
+                         (Py_ssize_t)self->ncol);
+}
+
+static PyObject *
+qr_get_rank(QRObject *self, void *closure)
+{
+    return PyLong_FromLongLong((long long)self->rank);
+}
+
+static PyObject *
+qr_get_tol(QRObject *self, void *closure)
+{
+    return PyFloat_FromDouble(self->tol_used);
+}
+
+static PyObject *
+qr_get_stats(QRObject *self, void *closure)
+{
+    return qr_stats(self);
+}
+
+static PyObject *
+qr_get_dtype(QRObject *self, void *closure)
+{
+    return (PyObject *)PyArray_DescrFromType(
+        self->is_complex ? NPY_CDOUBLE : NPY_DOUBLE);
+}
+
+static PyMethodDef qr_methods[] = {
+    {"factorize", (PyCFunction)qr_factorize, METH_O, factorize_doc},
+    {"solve", (PyCFunction)qr_solve, METH_O, solve_doc},
+    {"qmult", (PyCFunction)(void (*)(void))qr_qmult,
+     METH_VARARGS | METH_KEYWORDS, qmult_doc},
+    {NULL, NULL, 0, NULL}
+};
+
+static PyGetSetDef qr_getset[] = {
+    {"shape", (getter)qr_get_shape, NULL, "Shape of the matrix.", NULL},
+    {"dtype", (getter)qr_get_dtype, NULL,
+     "Value type of the factors, float64 or complex128.", NULL},
+    {"rank", (getter)qr_get_rank, NULL,
+     "Rank estimate of the last numeric factorization.", NULL},
+    {"tol", (getter)qr_get_tol, NULL,
+     "Column-norm tolerance used by the last numeric factorization.", NULL},
+    {"stats", (getter)qr_get_stats, NULL,
+     "Statistics of the analysis and the last numeric factorization, from\n"
+     "the cholmod_common of SuiteSparseQR: shape ('nrow', 'ncol'), column\n"
+     "ordering used, rank and tolerance, upper bounds on the entries in R\n"
+     "and in the Householder vectors ('rnz_bound', 'hnz_bound'), frontal\n"
+     "matrices and parallel tasks ('nfronts', 'ntasks'), column\n"
+     "singletons, flops and their upper bound ('flops', 'flops_bound'),\n"
+     "peak and current bytes ('memory_usage', 'memory_inuse') and\n"
+     "wall-clock seconds of the analysis and the factorization\n"
+     "('analyze_time', 'factorize_time').  The same dict is passed to the\n"
+     "hook set by suitesparse.set_stats_hook after each factorization.",
+     NULL},
+    {NULL, NULL, NULL, NULL, NULL}
+};
+
+static PyTypeObject QRType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    .tp_name = "suitesparse.spqr.QR",
+    .tp_basicsize = sizeof(QRObject),
+    .tp_dealloc = (destructor)qr_dealloc,
+    .tp_flags = Py_TPFLAGS_DEFAULT,
+    .tp_doc = qr_doc,
+    .tp_methods = qr_methods,
+    .tp_getset = qr_getset,
+    .tp_new = qr_new,
+};
+
+/* ------------------------------------------------------------------------ */
+/* module functions */
+/* ------------------------------------------------------------------------ */
+
+PyDoc_STRVAR(lstsq_doc,
+"lstsq(A, b, *, ordering='default', tol=None, info=False)\n"
+"--\n\n"
+"Least-squares solution of A x = b by a one-off sparse QR factorization.\n\n"
+"Q is applied to b while the factorization runs and is never stored, so\n"
+"this needs less memory than QR(A).solve(b).  A, ordering and tol are as\n"
+"for QR; b is a 1-D array of length m or a 2-D array with m rows.  For an\n"
+"underdetermined or rank-deficient A a basic solution is returned.\n\n"
+"With info=True, returns (x, info) where info is a dict with the keys of\n"
+"QR.stats; analyze_time is -1 and factorize_time covers the whole\n"
+"solve.");
+
+static PyObject *
+lstsq(PyObject *module, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"A", "b", "ordering", "tol", "info", NULL};
+    PyObject *obj, *bobj, *tol_obj = Py_None, *result, *stats = NULL;
+    PyArrayObject *x, *b = NULL;
+    const char *ordering = "default";
+    cholmod_common common;
+    cholmod_sparse Araw, *A;
+    cholmod_dense B, *X = NULL;
+    ss_compressed c;
+    double tol, time;
+    npy_intp nrow, ncol;
+    int order, is_complex, info = 0;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "OO|$sOp:lstsq", kwlist,
+                                     &obj, &bobj, &ordering, &tol_obj,
+                                     &info)) {
+        return NULL;
+    }
+    if (parse_ordering(ordering, &order) < 0 || parse_tol(tol_obj, &tol) < 0
+        || (is_complex = has_complex_values(obj)) < 0
+        || parse_matrix(obj, is_complex, &c, &x, &Araw) < 0) {
+        return NULL;
+    }
+    nrow = c.is_csr ? c.ncol : c.nrow;
+    ncol = c.is_csr ? c.nrow : c.ncol;
+    b = rhs_array(bobj, is_complex, nrow, "b");
+    if (b == NULL) {
+        Py_DECREF(x);
+        ss_compressed_clear(&c);
+        return NULL;
+    }
+    wrap_dense(b, is_complex, 0, &B);
+
+    cholmod_l_start(&common);
+    common.print = 0;
+    Py_BEGIN_ALLOW_THREADS
+    time = SuiteSparse_time();
+    A = csc_matrix(&Araw, c.is_csr, &common);
+    if (A != NULL) {
+        X = SuiteSparseQR_C_backslash(order, tol, A, &B, &common);
+        if (A != &Araw) {
+            cholmod_l_free_sparse(&A, &common);
+        }
+    }
+    time = SuiteSparse_time() - time;
+    Py_END_ALLOW_THREADS
+    Py_DECREF(x);
+    ss_compressed_clear(&c);
+    if (X == NULL) {
+        if (check_common(&common, "SuiteSparseQR_backslash") == 0) {
+            PyErr_SetString(SpqrError, "SuiteSparseQR_backslash failed");
+        }
+        result = NULL;
+    }
+    else {
+        result = dense_to_array(X, PyArray_NDIM(b), is_complex);
+        cholmod_l_free_dense(&X, &common);
+        if (result != NULL && ss_want_stats(info)) {
+            stats = common_stats(&common, nrow, ncol, -1, time);
+            if (stats == NULL) {
+                Py_CLEAR(result);
+            }
+        }
+    }
+    cholmod_l_finish(&common);
+    Py_DECREF(b);
+    if (result == NULL) {
+        return NULL;
+    }
+    return ss_return_stats("spqr.lstsq", result, stats, info);
+}
+
+/* ------------------------------------------------------------------------ */
+/* module */
+/* ------------------------------------------------------------------------ */
+
+static PyMethodDef spqr_methods[] = {
+    {"lstsq", (PyCFunction)(void (*)(void))lstsq,
+     METH_VARARGS | METH_KEYWORDS, lstsq_doc},
+    {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef spqr_module = {
+    PyModuleDef_HEAD_INIT,
+    "suitesparse.spqr",
+    "SuiteSparseQR: sparse QR factorization and least-squares solves.",
+    -1,
+    spqr_methods,
+};
+
+PyMODINIT_FUNC
+PyInit_spqr(void)
+{
+    PyObject *m;
+
+    import_array();
+    if (PyType_Ready(&QRType) < 0) {
+        return NULL;
+    }
+    m = PyModule_Create(&spqr_module);
+    if (m == NULL) {
+        return NULL;
+    }
+    SpqrError = PyErr_NewExceptionWithDoc(
+        "suitesparse.spqr.SpqrError",
+        "Error reported by SuiteSparseQR.", PyExc_RuntimeError, NULL);
+    if (SpqrError == NULL
+        || PyModule_AddObjectRef(m, "SpqrError", SpqrError) < 0
+        || PyModule_AddObjectRef(m, "QR", (PyObject *)&QRType) < 0) {
+        Py_DECREF(m);
+        return NULL;
+    }
+    return m;
+}
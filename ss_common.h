@@ -0,0 +1,447 @@
+/* Helpers shared by the *_impl.c extension modules.
+ *
+ * Sparse inputs are accepted either as a scipy.sparse CSC/CSR matrix or as a
+ * pair of raw ``indptr``/``indices`` buffers.  The index arrays are used in
+ * place whenever they are already contiguous int32 or int64, and the integer
+ * width of the arrays decides whether the ``int`` or the ``SuiteSparse_long``
+ * flavour of a routine is called.
+ */
+#ifndef SS_COMMON_H
+#define SS_COMMON_H
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#define NPY_NO_DEPRECATED_API NPY_1_7_API_VERSION
+#include <numpy/arrayobject.h>
+
+#include "SuiteSparse_config.h"
+
+/* numpy type number matching SuiteSparse_long */
+#if defined(_WIN64) || defined(_WIN32)
+#define SS_NPY_LONG NPY_INT64
+#else
+#define SS_NPY_LONG NPY_LONG
+#endif
+
+typedef struct {
+    PyArrayObject *indptr;
+    PyArrayObject *indices;
+    npy_intp nrow;      /* rows of the compressed-column view */
+    npy_intp ncol;      /* columns of the compressed-column view */
+    npy_intp nnz;
+    int is_long;        /* SuiteSparse_long indices instead of int */
+    int is_csr;         /* input was CSR: the view is of the transpose */
+} ss_compressed;
+
+static inline void
+ss_compressed_clear(ss_compressed *c)
+{
+    Py_CLEAR(c->indptr);
+    Py_CLEAR(c->indices);
+}
+
+/* The release function of symamd and csymamd, which take their allocator
+ * as arguments: SuiteSparse_free, which returns a pointer, so that they
+ * allocate through SuiteSparse_config like the rest of SuiteSparse. */
+static inline void
+ss_free(void *p)
+{
+    SuiteSparse_free(p);
+}
+
+static inline npy_intp
+ss_index_at(PyArrayObject *arr, npy_intp k, int is_long)
+{
+    if (is_long) {
+        return (npy_intp)((SuiteSparse_long *)PyArray_DATA(arr))[k];
+    }
+    return (npy_intp)((int *)PyArray_DATA(arr))[k];
+}
+
+/* Pick the index width from the dtype of ``obj`` without converting it. */
+static inline int
+ss_index_typenum(PyObject *obj)
+{
+    if (PyArray_Check(obj)
+        && PyArray_ITEMSIZE((PyArrayObject *)obj) == sizeof(int)
+        && PyArray_ISSIGNED((PyArrayObject *)obj)) {
+        return NPY_INT;
+    }
+    return SS_NPY_LONG;
+}
+
+/* Convert ``obj`` to a contiguous index array of the given type.  No copy is
+ * made when ``obj`` already has the right dtype and layout. */
+static inline PyArrayObject *
+ss_index_array(PyObject *obj, int typenum, const char *name)
+{
+    PyArrayObject *arr = (PyArrayObject *)PyArray_FROM_OTF(
+        obj, typenum, NPY_ARRAY_IN_ARRAY);
+    if (arr == NULL) {
+        return NULL;
+    }
+    if (PyArray_NDIM(arr) != 1) {
+        PyErr_Format(PyExc_ValueError, "%s must be one-dimensional", name);
+        Py_DECREF(arr);
+        return NULL;
+    }
+    return arr;
+}
+
+/* As ss_index_array, but cast from any integer dtype.  For small auxiliary
+ * arrays (permutations, constraint sets) whose values are range-checked
+ * afterwards. */
+static inline PyArrayObject *
+ss_index_array_cast(PyObject *obj, int typenum, const char *name)
+{
+    PyArrayObject *arr = (PyArrayObject *)PyArray_FROM_OTF(
+        obj, typenum, NPY_ARRAY_IN_ARRAY | NPY_ARRAY_FORCECAST);
+    if (arr == NULL) {
+        return NULL;
+    }
+    if (PyArray_NDIM(arr) != 1) {
+        PyErr_Format(PyExc_ValueError, "%s must be one-dimensional", name);
+        Py_DECREF(arr);
+        return NULL;
+    }
+    return arr;
+}
+
+/* Fill ``out`` from either a scipy.sparse CSC/CSR matrix (``indices`` is
+ * NULL or None) or from raw ``indptr``/``indices`` buffers, in which case the
+ * matrix is taken to be square.  ``typenum`` forces the index type (NPY_INT
+ * or SS_NPY_LONG, copying if needed); -1 takes it from the input.  Returns 0
+ * on success, -1 with an exception set on failure. */
+static inline int
+ss_parse_compressed_as(PyObject *A, PyObject *indices, int typenum,
+                       ss_compressed *out)
+{
+    PyObject *indptr = NULL, *shape = NULL, *format = NULL;
+    npy_intp nrow = -1, ncol = -1, n;
+
+    memset(out, 0, sizeof(*out));
+    if (indices == NULL || indices == Py_None) {
+        format = PyObject_GetAttrString(A, "format");
+        if (format == NULL) {
+            PyErr_Clear();
+            PyErr_SetString(PyExc_TypeError,
+                            "expected a scipy.sparse CSC/CSR matrix or "
+                            "indptr and indices arrays");
+            return -1;
+        }
+        if (PyUnicode_Check(format)
+            && PyUnicode_CompareWithASCIIString(format, "csr") == 0) {
+            out->is_csr = 1;
+        }
+        else if (!PyUnicode_Check(format)
+                 || PyUnicode_CompareWithASCIIString(format, "csc") != 0) {
+            PyErr_Format(PyExc_TypeError,
+                         "expected a CSC or CSR matrix, got format %R",
+                         format);
+            Py_DECREF(format);
+            return -1;
+        }
+        Py_DECREF(format);
+
+        shape = PyObject_GetAttrString(A, "shape");
+        if (shape == NULL) {
+            return -1;
+        }
+        if (!PyArg_ParseTuple(shape, "nn", &nrow, &ncol)) {
+            Py_DECREF(shape);
+            return -1;
+        }
+        Py_DECREF(shape);
+        if (out->is_csr) {
+            npy_intp tmp = nrow;
+            nrow = ncol;
+            ncol = tmp;
+        }
+        indptr = PyObject_GetAttrString(A, "indptr");
+        indices = PyObject_GetAttrString(A, "indices");
+        if (indptr == NULL || indices == NULL) {
+            Py_XDECREF(indptr);
+            Py_XDECREF(indices);
+            return -1;
+        }
+    }
+    else {
+        indptr = A;
+        Py_INCREF(indptr);
+        Py_INCREF(indices);
+    }
+
+    if (typenum < 0) {
+        typenum = ss_index_typenum(indptr);
+    }
+    out->is_long = (typenum != NPY_INT);
+    out->indptr = ss_index_array(indptr, typenum, "indptr");
+    if (out->indptr != NULL) {
+        out->indices = ss_index_array(indices, typenum, "indices");
+    }
+    Py_DECREF(indptr);
+    Py_DECREF(indices);
+    if (out->indices == NULL) {
+        ss_compressed_clear(out);
+        return -1;
+    }
+
+    n = PyArray_DIM(out->indptr, 0) - 1;
+    if (n < 0) {
+        PyErr_SetString(PyExc_ValueError, "indptr must not be empty");
+        ss_compressed_clear(out);
+        return -1;
+    }
+    if (nrow < 0) {
+        nrow = ncol = n;
+    }
+    else if (ncol != n) {
+        PyErr_SetString(PyExc_ValueError,
+                        "indptr does not match the matrix shape");
+        ss_compressed_clear(out);
+        return -1;
+    }
+    out->nrow = nrow;
+    out->ncol = n;
+    out->nnz = ss_index_at(out->indptr, n, out->is_long);
+    if (ss_index_at(out->indptr, 0, out->is_long) != 0
+        || out->nnz < 0 || out->nnz > PyArray_DIM(out->indices, 0)) {
+        PyErr_SetString(PyExc_ValueError,
+                        "indptr is inconsistent with indices");
+        ss_compressed_clear(out);
+        return -1;
+    }
+    return 0;
+}
+
+static inline int
+ss_parse_compressed(PyObject *A, PyObject *indices, ss_compressed *out)
+{
+    return ss_parse_compressed_as(A, indices, -1, out);
+}
+
+/* As ss_parse_compressed_as, but require a square matrix. */
+static inline int
+ss_parse_square_as(PyObject *A, PyObject *indices, int typenum,
+                   ss_compressed *out)
+{
+    if (ss_parse_compressed_as(A, indices, typenum, out) < 0) {
+        return -1;
+    }
+    if (out->nrow != out->ncol) {
+        PyErr_Format(PyExc_ValueError,
+                     "matrix must be square, got shape (%zd, %zd)",
+                     (Py_ssize_t)out->nrow, (Py_ssize_t)out->ncol);
+        ss_compressed_clear(out);
+        return -1;
+    }
+    return 0;
+}
+
+static inline int
+ss_parse_square(PyObject *A, PyObject *indices, ss_compressed *out)
+{
+    return ss_parse_square_as(A, indices, -1, out);
+}
+
+/* Contiguous array of the ``data`` attribute of a scipy.sparse matrix, of
+ * type ``typenum`` and holding at least ``nnz`` values.  No copy is made when
+ * the data already have that type. */
+static inline PyArrayObject *
+ss_values_array_as(PyObject *A, npy_intp nnz, int typenum)
+{
+    PyObject *data = PyObject_GetAttrString(A, "data");
+    PyArrayObject *arr;
+
+    if (data == NULL) {
+        return NULL;
+    }
+    arr = (PyArrayObject *)PyArray_FROM_OTF(data, typenum,
+                                            NPY_ARRAY_IN_ARRAY);
+    Py_DECREF(data);
+    if (arr == NULL) {
+        return NULL;
+    }
+    if (PyArray_NDIM(arr) != 1 || PyArray_DIM(arr, 0) < nnz) {
+        PyErr_SetString(PyExc_ValueError,
+                        "data is inconsistent with indices");
+        Py_DECREF(arr);
+        return NULL;
+    }
+    return arr;
+}
+
+/* ss_values_array_as for float64 values. */
+static inline PyArrayObject *
+ss_values_array(PyObject *A, npy_intp nnz)
+{
+    return ss_values_array_as(A, nnz, NPY_DOUBLE);
+}
+
+/* Statuses of the index checks below. */
+#define SS_BAD_INDPTR (-2)
+#define SS_BAD_INDEX (-3)
+
+#define SS_DEFINE_FIND_BAD_INDEX(NAME, Int)                                  \
+static inline int                                                           \
+NAME(const ss_compressed *c)                                                 \
+{                                                                            \
+    const Int *Ap = PyArray_DATA(c->indptr);                                 \
+    const Int *Ai = PyArray_DATA(c->indices);                                \
+    Int nrow = (Int)c->nrow, ncol = (Int)c->ncol, j, k;                      \
+                                                                             \
+    for (j = 0; j < ncol; j++) {                                             \
+        if (Ap[j] > Ap[j + 1]) {                                             \
+            return SS_BAD_INDPTR;                                            \
+        }                                                                    \
+    }                                                                        \
+    for (k = 0; k < Ap[ncol]; k++) {                                         \
+        if (Ai[k] < 0 || Ai[k] >= nrow) {                                    \
+            return SS_BAD_INDEX;                                             \
+        }                                                                    \
+    }                                                                        \
+    return 0;                                                                \
+}
+
+SS_DEFINE_FIND_BAD_INDEX(ss_find_bad_index_int, int)
+SS_DEFINE_FIND_BAD_INDEX(ss_find_bad_index_long, SuiteSparse_long)
+
+/* 0 if indptr of the compressed-column view is nondecreasing and all its
+ * indices lie in [0, nrow), else SS_BAD_INDPTR or SS_BAD_INDEX.  The parsers
+ * above only check the ends of indptr.  No Python calls. */
+static inline int
+ss_find_bad_index(const ss_compressed *c)
+{
+    return c->is_long ? ss_find_bad_index_long(c) : ss_find_bad_index_int(c);
+}
+
+/* As ss_find_bad_index, raising ValueError on bad indices.  Called before
+ * handing the arrays to CHOLMOD or SPQR, which trust them and would index
+ * out of bounds otherwise.  Returns 0 or -1. */
+static inline int
+ss_check_indices(const ss_compressed *c)
+{
+    int status;
+
+    Py_BEGIN_ALLOW_THREADS
+    status = ss_find_bad_index(c);
+    Py_END_ALLOW_THREADS
+    if (status == SS_BAD_INDPTR) {
+        PyErr_SetString(PyExc_ValueError, "indptr is not nondecreasing");
+        return -1;
+    }
+    if (status == SS_BAD_INDEX) {
+        PyErr_SetString(PyExc_ValueError,
+                        c->is_csr ? "column index out of range"
+                                  : "row index out of range");
+        return -1;
+    }
+    return 0;
+}
+
+/* Define NAME, copying the row indices of the compressed-column view into
+ * the workspace of COLAMD or CCOLAMD.  For CSR input the view is of A', so
+ * the indices are transposed on the way in and p receives the column
+ * pointers of A.  The library checks CSC input itself, but only sees CSR
+ * input after the transpose, so NAME checks it first: returns 0, or the
+ * status of ss_find_bad_index with nothing written.  No Python calls. */
+#define SS_DEFINE_FILL_WORKSPACE(NAME, Int)                                  \
+static int                                                                  \
+NAME(const ss_compressed *c, Int *work, Int *p)                              \
+{                                                                            \
+    const Int *Ap = PyArray_DATA(c->indptr);                                 \
+    const Int *Ai = PyArray_DATA(c->indices);                                \
+    Int n_col = (Int)c->nrow, n_major = (Int)c->ncol, j, k;                  \
+    int status;                                                              \
+                                                                             \
+    if (!c->is_csr) {                                                        \
+        memcpy(p, Ap, (size_t)(n_major + 1) * sizeof(Int));                  \
+        memcpy(work, Ai, (size_t)Ap[n_major] * sizeof(Int));                 \
+        return 0;                                                            \
+    }                                                                        \
+    status = ss_find_bad_index(c);                                           \
+    if (status != 0) {                                                       \
+        return status;                                                       \
+    }                                                                        \
+    memset(p, 0, (size_t)(n_col + 1) * sizeof(Int));                         \
+    for (k = 0; k < Ap[n_major]; k++) {                                      \
+        p[Ai[k] + 1]++;                                                      \
+    }                                                                        \
+    for (j = 0; j < n_col; j++) {                                            \
+        p[j + 1] += p[j];                                                    \
+    }                                                                        \
+    for (j = 0; j < n_major; j++) {                                          \
+        for (k = Ap[j]; k < Ap[j + 1]; k++) {                                \
+            work[p[Ai[k]]++] = j;                                            \
+        }                                                                    \
+    }                                                                        \
+    for (j = n_col; j > 0; j--) {                                            \
+        p[j] = p[j - 1];                                                     \
+    }                                                                        \
+    p[0] = 0;                                                                \
+    return 0;                                                                \
+}
+
+/* Raise the ValueError of a fill_workspace status other than 0. */
+static inline void
+ss_bad_csr(int status)
+{
+    PyErr_SetString(PyExc_ValueError,
+                    status == SS_BAD_INDPTR
+                        ? "indptr of the CSR matrix is not nondecreasing"
+                        : "column index out of range in the CSR matrix");
+}
+
+/* The callable set by suitesparse.set_stats_hook, or NULL.  Defined in
+ * core_impl.c and shared by all modules of _core; only read or written with
+ * the GIL held. */
+extern PyObject *ss_stats_hook;
+
+/* Whether a call has to build its statistics: they were asked for, or a
+ * hook wants them. */
+static inline int
+ss_want_stats(int info)
+{
+    return info || ss_stats_hook != NULL;
+}
+
+/* Pass the statistics of the call ``name`` to the hook, if one is set.  An
+ * exception raised by the hook is reported as unraisable and does not fail
+ * the call. */
+static inline void
+ss_report_stats(const char *name, PyObject *stats)
+{
+    PyObject *hook = ss_stats_hook, *r;
+
+    if (hook == NULL) {
+        return;
+    }
+    Py_INCREF(hook);
+    r = PyObject_CallFunction(hook, "sO", name, stats);
+    if (r == NULL) {
+        PyErr_WriteUnraisable(hook);
+    }
+    Py_XDECREF(r);
+    Py_DECREF(hook);
+}
+
+/* Return value of a function with an ``info`` flag, stealing both
+ * references: ``result``, or ``(result, stats)`` when info is true.
+ * ``stats`` is NULL when ss_want_stats() was false; otherwise it is first
+ * reported to the hook. */
+static inline PyObject *
+ss_return_stats(const char *name, PyObject *result, PyObject *stats,
+                int info)
+{
+    if (stats == NULL) {
+        return result;
+    }
+    ss_report_stats(name, stats);
+    if (info) {
+        return Py_BuildValue("(NN)", result, stats);
+    }
+    Py_DECREF(stats);
+    return result;
+}
+
+#endif /* SS_COMMON_H */
@@ -1 +0,0 @@
-void PyInit_suitesparseconfig(void) {}
@@ -0,0 +1,243 @@
+'''Checks of the factorizations against scipy and of the Python helpers.
+
+Run with ``python -m pytest tests`` against an installed or in-place built
+``suitesparse``.
+'''
+
+import numpy as np
+import pytest
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+
+from suitesparse import (OrderingSelector, SymbolicCache, cholmod, load_csc,
+                         save_csc, umfpack)
+
+INDEX = [np.int32, np.int64]
+MODE = ['simplicial', 'supernodal']
+
+
+def _spd(n, density=0.05, seed=0, index=np.int32):
+    '''Random sparse SPD matrix, made diagonally dominant.'''
+    R = sp.random(n, n, density, random_state=seed)
+    A = (R + R.T + n * sp.eye(n)).tocsc()
+    A.sort_indices()
+    A.indptr = A.indptr.astype(index)
+    A.indices = A.indices.astype(index)
+    return A
+
+
+def _unsymmetric(n, density=0.05, seed=0):
+    R = sp.random(n, n, density, random_state=seed)
+    return (R + n * sp.eye(n)).tocsc()
+
+
+@pytest.mark.parametrize('index', INDEX)
+@pytest.mark.parametrize('mode', MODE)
+def test_factor_solve(index, mode):
+    A = _spd(200, index=index)
+    b = np.random.default_rng(0).standard_normal((200, 3))
+    F = cholmod.Factor(A, supernodal=mode)
+    F.factorize(A)
+    expected = spla.spsolve(A, b)
+    np.testing.assert_allclose(F.solve(b), expected, rtol=1e-10)
+    np.testing.assert_allclose(F.solve(b[:, 0]), expected[:, 0], rtol=1e-10)
+
+
+@pytest.mark.parametrize('mode', MODE)
+def test_factor_update_downdate(mode):
+    A = _spd(100, seed=1)
+    C = sp.random(100, 2, 0.1, random_state=2, format='csc')
+    b = np.random.default_rng(1).standard_normal(100)
+    F = cholmod.Factor(A, supernodal=mode)
+    F.factorize(A)
+
+    F.update(C)
+    AC = (A + C @ C.T).tocsc()
+    np.testing.assert_allclose(F.solve(b), spla.spsolve(AC, b), rtol=1e-10)
+
+    F.update(C, downdate=True)
+    np.testing.assert_allclose(F.solve(b), spla.spsolve(A, b), rtol=1e-10)
+
+
+def test_factor_rejects_bad_indices():
+    A = _spd(20)
+    A.indices[0] = 20
+    with pytest.raises(ValueError):
+        cholmod.Factor(A)
+
+
+def _dense_schur(A, interface):
+    D = A.toarray()
+    interior = np.setdiff1d(np.arange(D.shape[0]), interface)
+    A_II = D[np.ix_(interior, interior)]
+    A_IB = D[np.ix_(interior, interface)]
+    return (D[np.ix_(interface, interface)]
+            - A_IB.T @ np.linalg.solve(A_II, A_IB))
+
+
+@pytest.mark.parametrize('index', INDEX)
+@pytest.mark.parametrize('mode', MODE)
+@pytest.mark.parametrize('lower', [False, True])
+def test_schur(index, mode, lower):
+    A = _spd(120, seed=13, index=index)
+    interface = np.random.default_rng(4).choice(120, 15, replace=False)
+    expected = _dense_schur(A, interface)
+    S = cholmod.schur(A, interface, lower=lower, supernodal=mode)
+    np.testing.assert_allclose(S, expected, rtol=1e-10, atol=1e-10)
+    S = cholmod.schur(A, interface, lower=lower, supernodal=mode,
+                      sparse=True)
+    np.testing.assert_allclose(S.toarray(), expected, rtol=1e-10,
+                               atol=1e-10)
+
+
+def test_schur_singular():
+    # the Laplacian of a path is singular, its interior blocks are not
+    n = 50
+    A = sp.diags([-np.ones(n - 1), 2 * np.ones(n), -np.ones(n - 1)],
+                 [-1, 0, 1], format='csc')
+    A[0, 0] = A[n - 1, n - 1] = 1
+    interface = np.array([n - 1, 0, n // 2])
+    S = cholmod.schur(A.tocsc(), interface)
+    np.testing.assert_allclose(S, _dense_schur(A, interface), atol=1e-10)
+    np.testing.assert_allclose(S.sum(axis=1), 0, atol=1e-10)
+
+
+def test_schur_rejects_bad_indices():
+    A = _spd(20)
+    A.indptr[1], A.indptr[2] = A.indptr[2], A.indptr[1]
+    with pytest.raises(ValueError):
+        cholmod.schur(A, [0, 1])
+
+
+@pytest.mark.parametrize('index', INDEX)
+def test_matrix_ops(index):
+    A = sp.random(30, 20, 0.2, random_state=14, format='csc')
+    B = sp.random(20, 25, 0.2, random_state=15, format='csc')
+    for M in (A, B):
+        M.indptr = M.indptr.astype(index)
+        M.indices = M.indices.astype(index)
+    X = np.random.default_rng(5).standard_normal((20, 2))
+    np.testing.assert_allclose(cholmod.sdmult(A, X), A @ X, rtol=1e-12)
+    np.testing.assert_allclose(cholmod.ssmult(A, B).toarray(),
+                               (A @ B).toarray(), rtol=1e-12)
+    np.testing.assert_allclose(cholmod.aat(A).toarray(),
+                               (A @ A.T).toarray(), rtol=1e-12)
+    np.testing.assert_allclose(cholmod.norm(A, 1),
+                               abs(A).sum(axis=0).max(), rtol=1e-12)
+
+
+@pytest.mark.parametrize('operation', [
+    lambda A: cholmod.sdmult(A, np.ones(A.shape[1])),
+    lambda A: cholmod.ssmult(A, A),
+    lambda A: cholmod.aat(A),
+    lambda A: cholmod.submatrix(A, [0, 1]),
+    lambda A: cholmod.horzcat(A, A),
+    lambda A: cholmod.vertcat(A, A),
+    lambda A: cholmod.scale(A, np.ones(A.shape[0])),
+    lambda A: cholmod.norm(A),
+])
+@pytest.mark.parametrize('fmt', ['csc', 'csr'])
+def test_matrix_ops_reject_bad_indices(operation, fmt):
+    A = sp.random(10, 10, 0.3, random_state=16, format=fmt)
+    A.indices[0] = 10
+    with pytest.raises(ValueError):
+        operation(A)
+
+
+@pytest.mark.parametrize('mmap', [False, True])
+def test_factor_save_load(tmp_path, mmap):
+    A = _spd(150, seed=3)
+    b = np.random.default_rng(2).standard_normal(150)
+    F = cholmod.Factor(A)
+    F.factorize(A)
+    F.save(tmp_path / 'factor')
+    G = cholmod.Factor.load(tmp_path / 'factor', mmap=mmap)
+    np.testing.assert_array_equal(G.perm, F.perm)
+    np.testing.assert_allclose(G.solve(b), F.solve(b), rtol=1e-14)
+
+
+def test_lu_save_load(tmp_path):
+    A = _unsymmetric(150, seed=4)
+    b = np.random.default_rng(3).standard_normal(150)
+    lu = umfpack.LU(A)
+    lu.save(tmp_path / 'lu')
+    loaded = umfpack.LU.load(tmp_path / 'lu')
+    np.testing.assert_allclose(loaded.solve(b), spla.spsolve(A, b),
+                               rtol=1e-10)
+    loaded.factorize(2 * A)
+    np.testing.assert_allclose(loaded.solve(b), spla.spsolve(2 * A, b),
+                               rtol=1e-10)
+
+
+@pytest.mark.parametrize('mmap', [False, True, 'c'])
+@pytest.mark.parametrize('index', INDEX)
+@pytest.mark.parametrize('dtype', [np.float64, np.complex128])
+def test_save_load_csc(tmp_path, mmap, index, dtype):
+    A = sp.random(40, 30, 0.1, random_state=5, format='csc', dtype=dtype)
+    A.indptr = A.indptr.astype(index)
+    A.indices = A.indices.astype(index)
+    save_csc(tmp_path / 'A.csc', A)
+    B = load_csc(tmp_path / 'A.csc', mmap=mmap)
+    assert B.shape == A.shape
+    assert B.indices.dtype == index and B.data.dtype == dtype
+    np.testing.assert_array_equal(B.indptr, A.indptr)
+    np.testing.assert_array_equal(B.indices, A.indices)
+    np.testing.assert_array_equal(B.data, A.data)
+
+
+def test_save_load_empty_csc(tmp_path):
+    A = sp.csc_matrix((5, 0))
+    save_csc(tmp_path / 'A.csc', A)
+    assert load_csc(tmp_path / 'A.csc').shape == (5, 0)
+
+
+def test_symbolic_cache_eviction():
+    A, B = _spd(100, seed=6), _spd(100, seed=7)
+    nbytes = cholmod.Factor(A).nbytes
+    cache = SymbolicCache(max_bytes=nbytes + nbytes // 2)
+
+    cache.analyze(A)
+    cache.analyze(A)
+    assert (cache.hits, cache.misses, len(cache)) == (1, 1, 1)
+
+    # the second pattern pushes the least recently used one out
+    cache.analyze(B)
+    assert cache.evictions == 1 and len(cache) == 1
+    assert cache.nbytes <= cache.max_bytes
+    cache.analyze(A)
+    assert cache.misses == 3 and cache.evictions == 2
+
+
+def test_symbolic_cache_hit_is_a_copy():
+    A = _spd(60, seed=8)
+    cache = SymbolicCache()
+    F = cache.analyze(A)
+    G = cache.analyze(A)
+    assert F is not G
+    np.testing.assert_array_equal(F.perm, G.perm)
+    G.factorize(A)
+    assert cache.analyze(A) is not G
+
+
+def test_ordering_selector_eviction():
+    A, B, C = (_spd(80, seed=s) for s in (9, 10, 11))
+    selector = OrderingSelector(max_entries=2)
+    for M in (A, B, C):
+        selector.select(M)
+    assert len(selector) == 2 and selector.misses == 3
+
+    # C and B are remembered, A was evicted
+    selector.select(C)
+    assert selector.hits == 1
+    selector.select(A)
+    assert selector.misses == 4 and len(selector) == 2
+
+
+def test_ordering_selector_remembers_the_winner():
+    A = _spd(80, seed=12)
+    selector = OrderingSelector()
+    first = selector.select(A)
+    again = selector.select(A)
+    assert again.method == first.method
+    np.testing.assert_array_equal(again.perm, first.perm)
+    assert np.array_equal(np.sort(first.perm), np.arange(80))
@@ -0,0 +1,1164 @@
+/* Python bindings for UMFPACK: sparse unsymmetric LU factorization. */
+
+#include <errno.h>
+#include <stdint.h>
+#include <stdio.h>
+#include <string.h>
+
+#include "ss_common.h"
+#include "pythread.h"
+#include "umfpack.h"
+
+static PyObject *UmfpackError;
+static PyObject *SingularMatrixError;
+
+typedef struct {
+    PyObject_HEAD
+    void *Symbolic;
+    void *Numeric;
+    PyThread_type_lock lock;
+    double Control[UMFPACK_CONTROL];
+    double Info[UMFPACK_INFO];
+    void *Wi;           /* umfpack_*_wsolve workspace, n Ints */
+    double *W;          /* umfpack_*_wsolve workspace, n or 4n doubles */
+    int is_long;
+    int is_complex;     /* zi/zl with packed complex values */
+    int is_csr;         /* the factors are of A' */
+    npy_intp n;
+} LUObject;
+
+#define ACQUIRE_LOCK(obj) do {                                              \
+    if (!PyThread_acquire_lock((obj)->lock, 0)) {                           \
+        Py_BEGIN_ALLOW_THREADS                                              \
+        PyThread_acquire_lock((obj)->lock, 1);                              \
+        Py_END_ALLOW_THREADS                                                \
+    } } while (0)
+#define RELEASE_LOCK(obj) PyThread_release_lock((obj)->lock)
+
+/* Raise the Python exception matching an UMFPACK status.  Returns -1 if an
+ * exception was set, 0 if the status is OK or only a warning. */
+static int
+check_status(const char *name, long status)
+{
+    switch (status) {
+    case UMFPACK_OK:
+    case UMFPACK_WARNING_determinant_underflow:
+    case UMFPACK_WARNING_determinant_overflow:
+        return 0;
+    case UMFPACK_WARNING_singular_matrix:
+        PyErr_SetString(SingularMatrixError, "matrix is singular");
+        return -1;
+    case UMFPACK_ERROR_out_of_memory:
+        PyErr_NoMemory();
+        return -1;
+    case UMFPACK_ERROR_n_nonpositive:
+    case UMFPACK_ERROR_invalid_matrix:
+    case UMFPACK_ERROR_invalid_permutation:
+    case UMFPACK_ERROR_invalid_system:
+        PyErr_Format(PyExc_ValueError, "invalid input to %s", name);
+        return -1;
+    case UMFPACK_ERROR_different_pattern:
+        PyErr_SetString(PyExc_ValueError,
+                        "matrix pattern differs from the analyzed one");
+        return -1;
+    case UMFPACK_ERROR_file_IO:
+        PyErr_Format(PyExc_OSError, "%s: file I/O error", name);
+        return -1;
+    case UMFPACK_ERROR_invalid_Symbolic_object:
+    case UMFPACK_ERROR_invalid_Numeric_object:
+        PyErr_Format(PyExc_ValueError, "%s: invalid or corrupt file", name);
+        return -1;
+    default:
+        PyErr_Format(UmfpackError, "%s failed with status %ld", name, status);
+        return -1;
+    }
+}
+
+/* Typed views of the arrays passed to UMFPACK.  Complex values are packed
+ * (interleaved), so the imaginary-part arguments of the zi/zl routines are
+ * always NULL. */
+#define IDX(arr) ((arr) == NULL ? NULL : PyArray_DATA(arr))
+#define VAL(arr) ((arr) == NULL ? NULL : (double *)PyArray_DATA(arr))
+
+static long
+lu_qsymbolic(LUObject *self, const ss_compressed *c, PyArrayObject *x,
+             PyArrayObject *qinit)
+{
+    switch (self->is_complex * 2 + self->is_long) {
+    case 0:
+        return umfpack_di_qsymbolic(
+            (int)c->nrow, (int)c->ncol, PyArray_DATA(c->indptr),
+            PyArray_DATA(c->indices), VAL(x), IDX(qinit),
+            &self->Symbolic, self->Control, self->Info);
+    case 1:
+        return (long)umfpack_dl_qsymbolic(
+            (SuiteSparse_long)c->nrow, (SuiteSparse_long)c->ncol,
+            PyArray_DATA(c->indptr), PyArray_DATA(c->indices), VAL(x),
+            IDX(qinit), &self->Symbolic, self->Control, self->Info);
+    case 2:
+        return umfpack_zi_qsymbolic(
+            (int)c->nrow, (int)c->ncol, PyArray_DATA(c->indptr),
+            PyArray_DATA(c->indices), VAL(x), NULL, IDX(qinit),
+            &self->Symbolic, self->Control, self->Info);
+    default:
+        return (long)umfpack_zl_qsymbolic(
+            (SuiteSparse_long)c->nrow, (SuiteSparse_long)c->ncol,
+            PyArray_DATA(c->indptr), PyArray_DATA(c->indices), VAL(x), NULL,
+            IDX(qinit), &self->Symbolic, self->Control, self->Info);
+    }
+}
+
+static long
+lu_numeric(LUObject *self, const ss_compressed *c, PyArrayObject *x)
+{
+    switch (self->is_complex * 2 + self->is_long) {
+    case 0:
+        return umfpack_di_numeric(
+            PyArray_DATA(c->indptr), PyArray_DATA(c->indices), VAL(x),
+            self->Symbolic, &self->Numeric, self->Control, self->Info);
+    case 1:
+        return (long)umfpack_dl_numeric(
+            PyArray_DATA(c->indptr), PyArray_DATA(c->indices), VAL(x),
+            self->Symbolic, &self->Numeric, self->Control, self->Info);
+    case 2:
+        return umfpack_zi_numeric(
+            PyArray_DATA(c->indptr), PyArray_DATA(c->indices), VAL(x), NULL,
+            self->Symbolic, &self->Numeric, self->Control, self->Info);
+    default:
+        return (long)umfpack_zl_numeric(
+            PyArray_DATA(c->indptr), PyArray_DATA(c->indices), VAL(x), NULL,
+            self->Symbolic, &self->Numeric, self->Control, self->Info);
+    }
+}
+
+/* Solve one system with the preallocated workspace.  No iterative refinement
+ * is done since the matrix is not kept. */
+static long
+lu_wsolve(LUObject *self, int sys, double *X, const double *B)
+{
+    switch (self->is_complex * 2 + self->is_long) {
+    case 0:
+        return umfpack_di_wsolve(sys, NULL, NULL, NULL, X, B, self->Numeric,
+                                 self->Control, self->Info, self->Wi,
+                                 self->W);
+    case 1:
+        return (long)umfpack_dl_wsolve(sys, NULL, NULL, NULL, X, B,
+                                       self->Numeric, self->Control,
+                                       self->Info, self->Wi, self->W);
+    case 2:
+        return umfpack_zi_wsolve(sys, NULL, NULL, NULL, NULL, X, NULL, B,
+                                 NULL, self->Numeric, self->Control,
+                                 self->Info, self->Wi, self->W);
+    default:
+        return (long)umfpack_zl_wsolve(sys, NULL, NULL, NULL, NULL, X, NULL,
+                                       B, NULL, self->Numeric, self->Control,
+                                       self->Info, self->Wi, self->W);
+    }
+}
+
+static void
+lu_free_numeric(LUObject *self)
+{
+    if (self->Numeric == NULL) {
+        return;
+    }
+    switch (self->is_complex * 2 + self->is_long) {
+    case 0: umfpack_di_free_numeric(&self->Numeric); break;
+    case 1: umfpack_dl_free_numeric(&self->Numeric); break;
+    case 2: umfpack_zi_free_numeric(&self->Numeric); break;
+    default: umfpack_zl_free_numeric(&self->Numeric); break;
+    }
+}
+
+static void
+lu_free_symbolic(LUObject *self)
+{
+    if (self->Symbolic == NULL) {
+        return;
+    }
+    switch (self->is_complex * 2 + self->is_long) {
+    case 0: umfpack_di_free_symbolic(&self->Symbolic); break;
+    case 1: umfpack_dl_free_symbolic(&self->Symbolic); break;
+    case 2: umfpack_zi_free_symbolic(&self->Symbolic); break;
+    default: umfpack_zl_free_symbolic(&self->Symbolic); break;
+    }
+}
+
+/* Save or load the Symbolic and Numeric objects with UMFPACK's own file
+ * format.  Returns the status of the first call that fails. */
+static long
+lu_save_files(LUObject *self, char *symbolic, char *numeric)
+{
+    long status;
+
+    switch (self->is_complex * 2 + self->is_long) {
+    case 0:
+        status = umfpack_di_save_symbolic(self->Symbolic, symbolic);
+        return status != UMFPACK_OK ? status
+            : umfpack_di_save_numeric(self->Numeric, numeric);
+    case 1:
+        status = (long)umfpack_dl_save_symbolic(self->Symbolic, symbolic);
+        return status != UMFPACK_OK ? status
+            : (long)umfpack_dl_save_numeric(self->Numeric, numeric);
+    case 2:
+        status = umfpack_zi_save_symbolic(self->Symbolic, symbolic);
+        return status != UMFPACK_OK ? status
+            : umfpack_zi_save_numeric(self->Numeric, numeric);
+    default:
+        status = (long)umfpack_zl_save_symbolic(self->Symbolic, symbolic);
+        return status != UMFPACK_OK ? status
+            : (long)umfpack_zl_save_numeric(self->Numeric, numeric);
+    }
+}
+
+static long
+lu_load_files(LUObject *self, char *symbolic, char *numeric)
+{
+    long status;
+
+    switch (self->is_complex * 2 + self->is_long) {
+    case 0:
+        status = umfpack_di_load_symbolic(&self->Symbolic, symbolic);
+        return status != UMFPACK_OK ? status
+            : umfpack_di_load_numeric(&self->Numeric, numeric);
+    case 1:
+        status = (long)umfpack_dl_load_symbolic(&self->Symbolic, symbolic);
+        return status != UMFPACK_OK ? status
+            : (long)umfpack_dl_load_numeric(&self->Numeric, numeric);
+    case 2:
+        status = umfpack_zi_load_symbolic(&self->Symbolic, symbolic);
+        return status != UMFPACK_OK ? status
+            : umfpack_zi_load_numeric(&self->Numeric, numeric);
+    default:
+        status = (long)umfpack_zl_load_symbolic(&self->Symbolic, symbolic);
+        return status != UMFPACK_OK ? status
+            : (long)umfpack_zl_load_numeric(&self->Numeric, numeric);
+    }
+}
+
+/* Order of the square Numeric object, or -1 if it is not square. */
+static npy_intp
+lu_numeric_order(LUObject *self)
+{
+    switch (self->is_complex * 2 + self->is_long) {
+    case 0:
+    case 2: {
+        int lnz, unz, n_row, n_col, nz_udiag;
+        long status = self->is_complex
+            ? umfpack_zi_get_lunz(&lnz, &unz, &n_row, &n_col, &nz_udiag,
+                                  self->Numeric)
+            : umfpack_di_get_lunz(&lnz, &unz, &n_row, &n_col, &nz_udiag,
+                                  self->Numeric);
+        return status == UMFPACK_OK && n_row == n_col ? n_row : -1;
+    }
+    default: {
+        SuiteSparse_long lnz, unz, n_row, n_col, nz_udiag;
+        long status = self->is_complex
+            ? (long)umfpack_zl_get_lunz(&lnz, &unz, &n_row, &n_col,
+                                        &nz_udiag, self->Numeric)
+            : (long)umfpack_dl_get_lunz(&lnz, &unz, &n_row, &n_col,
+                                        &nz_udiag, self->Numeric);
+        return status == UMFPACK_OK && n_row == n_col ? (npy_intp)n_row : -1;
+    }
+    }
+}
+
+/* Parse a square matrix with the index and value types of the LU object.
+ * On success ``c`` and ``*x`` hold references the caller must release. */
+static int
+parse_matrix(LUObject *self, PyObject *obj, ss_compressed *c,
+             PyArrayObject **x)
+{
+    if (ss_parse_square_as(obj, NULL, self->is_long ? SS_NPY_LONG : NPY_INT,
+                           c) < 0) {
+        return -1;
+    }
+    if (c->ncol != self->n || c->is_csr != self->is_csr) {
+        PyErr_Format(PyExc_ValueError,
+                     "expected a %s matrix of order %zd",
+                     self->is_csr ? "CSR" : "CSC", (Py_ssize_t)self->n);
+        ss_compressed_clear(c);
+        return -1;
+    }
+    *x = ss_values_array_as(obj, c->nnz,
+                            self->is_complex ? NPY_CDOUBLE : NPY_DOUBLE);
+    if (*x == NULL) {
+        ss_compressed_clear(c);
+        return -1;
+    }
+    return 0;
+}
+
+/* UMFPACK needs sorted row indices without duplicates.  Return a new
+ * reference to ``obj`` if scipy reports it in canonical format, else to a
+ * canonical copy. */
+static PyObject *
+canonical_matrix(PyObject *obj)
+{
+    PyObject *flag, *copy, *result;
+    int canonical;
+
+    flag = PyObject_GetAttrString(obj, "has_canonical_format");
+    if (flag == NULL) {
+        /* not a scipy.sparse matrix: let the parser report it */
+        PyErr_Clear();
+        Py_INCREF(obj);
+        return obj;
+    }
+    canonical = PyObject_IsTrue(flag);
+    Py_DECREF(flag);
+    if (canonical < 0) {
+        return NULL;
+    }
+    if (canonical) {
+        Py_INCREF(obj);
+        return obj;
+    }
+    copy = PyObject_CallMethod(obj, "copy", NULL);
+    if (copy == NULL) {
+        return NULL;
+    }
+    result = PyObject_CallMethod(copy, "sum_duplicates", NULL);
+    if (result == NULL) {
+        Py_DECREF(copy);
+        return NULL;
+    }
+    Py_DECREF(result);
+    return copy;
+}
+
+/* Whether the data of a scipy.sparse matrix are complex. */
+static int
+has_complex_values(PyObject *obj)
+{
+    PyObject *data = PyObject_GetAttrString(obj, "data");
+    int is_complex;
+
+    if (data == NULL) {
+        return -1;
+    }
+    is_complex = PyArray_Check(data)
+        && PyArray_ISCOMPLEX((PyArrayObject *)data);
+    Py_DECREF(data);
+    return is_complex;
+}
+
+static int
+set_ordering(double *Control, const char *ordering, int have_perm)
+{
+    if (have_perm) {
+        if (strcmp(ordering, "default") != 0
+            && strcmp(ordering, "given") != 0) {
+            PyErr_SetString(PyExc_ValueError,
+                            "perm can only be used with ordering='given'");
+            return -1;
+        }
+        Control[UMFPACK_ORDERING] = UMFPACK_ORDERING_GIVEN;
+        return 0;
+    }
+    if (strcmp(ordering, "default") == 0) {
+        return 0;
+    }
+    else if (strcmp(ordering, "amd") == 0) {
+        Control[UMFPACK_ORDERING] = UMFPACK_ORDERING_AMD;
+    }
+    else if (strcmp(ordering, "cholmod") == 0) {
+        Control[UMFPACK_ORDERING] = UMFPACK_ORDERING_CHOLMOD;
+    }
+    else if (strcmp(ordering, "metis") == 0) {
+        Control[UMFPACK_ORDERING] = UMFPACK_ORDERING_METIS;
+    }
+    else if (strcmp(ordering, "best") == 0) {
+        Control[UMFPACK_ORDERING] = UMFPACK_ORDERING_BEST;
+    }
+    else if (strcmp(ordering, "natural") == 0) {
+        Control[UMFPACK_ORDERING] = UMFPACK_ORDERING_NONE;
+    }
+    else {
+        PyErr_Format(PyExc_ValueError, "unknown ordering '%s'", ordering);
+        return -1;
+    }
+    return 0;
+}
+
+static int
+set_strategy(double *Control, const char *strategy)
+{
+    if (strcmp(strategy, "auto") == 0) {
+        Control[UMFPACK_STRATEGY] = UMFPACK_STRATEGY_AUTO;
+    }
+    else if (strcmp(strategy, "unsymmetric") == 0) {
+        Control[UMFPACK_STRATEGY] = UMFPACK_STRATEGY_UNSYMMETRIC;
+    }
+    else if (strcmp(strategy, "symmetric") == 0) {
+        Control[UMFPACK_STRATEGY] = UMFPACK_STRATEGY_SYMMETRIC;
+    }
+    else {
+        PyErr_Format(PyExc_ValueError, "unknown strategy '%s'", strategy);
+        return -1;
+    }
+    return 0;
+}
+
+static int
+set_scale(double *Control, const char *scale)
+{
+    if (strcmp(scale, "sum") == 0) {
+        Control[UMFPACK_SCALE] = UMFPACK_SCALE_SUM;
+    }
+    else if (strcmp(scale, "max") == 0) {
+        Control[UMFPACK_SCALE] = UMFPACK_SCALE_MAX;
+    }
+    else if (strcmp(scale, "none") == 0) {
+        Control[UMFPACK_SCALE] = UMFPACK_SCALE_NONE;
+    }
+    else {
+        PyErr_Format(PyExc_ValueError, "unknown scaling '%s'", scale);
+        return -1;
+    }
+    return 0;
+}
+
+/* ------------------------------------------------------------------------ */
+/* Statistics */
+/* ------------------------------------------------------------------------ */
+
+/* Name of the ordering UMFPACK used, from Info.  AMD stands for AMD under
+ * the symmetric strategy and for COLAMD under the unsymmetric one. */
+static const char *
+ordering_used(const double *Info)
+{
+    switch ((int)Info[UMFPACK_ORDERING_USED]) {
+    case UMFPACK_ORDERING_AMD:
+        return Info[UMFPACK_STRATEGY_USED] == UMFPACK_STRATEGY_SYMMETRIC
+            ? "amd" : "colamd";
+    case UMFPACK_ORDERING_GIVEN:
+        return "given";
+    case UMFPACK_ORDERING_METIS:
+        return "metis";
+    case UMFPACK_ORDERING_NONE:
+        return "natural";
+    default:
+        return "unknown";
+    }
+}
+
+/* Info entry k, a size in Units, in bytes; -1 if not computed. */
+static Py_ssize_t
+info_bytes(const double *Info, int k)
+{
+    if (Info[k] < 0) {
+        return -1;
+    }
+    return (Py_ssize_t)(Info[k] * Info[UMFPACK_SIZE_OF_UNIT]);
+}
+
+/* Statistics of the symbolic analysis and the last numeric factorization,
+ * from the Info array. */
+static PyObject *
+lu_stats(LUObject *self)
+{
+    const double *Info = self->Info;
+
+    return Py_BuildValue(
+        "{s:n,s:n,s:s,s:s,s:n,s:n,s:n,s:d,s:d,s:d,s:d,s:d,s:d,s:n,s:n,s:n,"
+        "s:n,s:d,s:d}",
+        "n", (Py_ssize_t)self->n,
+        "nz", (Py_ssize_t)Info[UMFPACK_NZ],
+        "strategy",
+        Info[UMFPACK_STRATEGY_USED] == UMFPACK_STRATEGY_SYMMETRIC
+            ? "symmetric" : "unsymmetric",
+        "ordering", ordering_used(Info),
+        "ndense_row", (Py_ssize_t)Info[UMFPACK_NDENSE_ROW],
+        "ndense_col", (Py_ssize_t)Info[UMFPACK_NDENSE_COL],
+        "singletons", (Py_ssize_t)(Info[UMFPACK_COL_SINGLETONS]
+                                   + Info[UMFPACK_ROW_SINGLETONS]),
+        "lnz_estimate", Info[UMFPACK_LNZ_ESTIMATE],
+        "unz_estimate", Info[UMFPACK_UNZ_ESTIMATE],
+        "flops_estimate", Info[UMFPACK_FLOPS_ESTIMATE],
+        "lnz", Info[UMFPACK_LNZ],
+        "unz", Info[UMFPACK_UNZ],
+        "flops", Info[UMFPACK_FLOPS],
+        "symbolic_memory", info_bytes(Info, UMFPACK_SYMBOLIC_PEAK_MEMORY),
+        "numeric_memory", info_bytes(Info, UMFPACK_NUMERIC_SIZE),
+        "peak_memory", info_bytes(Info, UMFPACK_PEAK_MEMORY),
+        "numeric_defrag", (Py_ssize_t)Info[UMFPACK_NUMERIC_DEFRAG],
+        "symbolic_time", Info[UMFPACK_SYMBOLIC_WALLTIME],
+        "numeric_time", Info[UMFPACK_NUMERIC_WALLTIME]);
+}
+
+/* Report the statistics of the call ``name`` on an LU object to the
+ * hook. */
+static int
+report_stats(LUObject *self, const char *name)
+{
+    PyObject *stats;
+
+    if (!ss_want_stats(0)) {
+        return 0;
+    }
+    stats = lu_stats(self);
+    if (stats == NULL) {
+        return -1;
+    }
+    ss_report_stats(name, stats);
+    Py_DECREF(stats);
+    return 0;
+}
+
+/* ------------------------------------------------------------------------ */
+/* LU type */
+/* ------------------------------------------------------------------------ */
+
+/* Numeric factorization of A with the object's Symbolic, replacing any
+ * previous Numeric.  Called with the lock held and the GIL released. */
+static long
+lu_refactor(LUObject *self, const ss_compressed *c, PyArrayObject *x)
+{
+    lu_free_numeric(self);
+    return lu_numeric(self, c, x);
+}
+
+/* Set up the lock and the solve workspaces of a new LU object. */
+static int
+lu_init(LUObject *self, int is_long, int is_complex, int is_csr, npy_intp n)
+{
+    self->lock = PyThread_allocate_lock();
+    if (self->lock == NULL) {
+        PyErr_SetString(PyExc_MemoryError, "unable to allocate lock");
+        return -1;
+    }
+    self->is_long = is_long;
+    self->is_complex = is_complex;
+    self->is_csr = is_csr;
+    self->n = n;
+    self->Wi = PyMem_Malloc((size_t)(n > 0 ? n : 1)
+                            * (is_long ? sizeof(SuiteSparse_long)
+                                       : sizeof(int)));
+    self->W = PyMem_Malloc((size_t)(n > 0 ? n : 1) * (is_complex ? 4 : 1)
+                           * sizeof(double));
+    if (self->Wi == NULL || self->W == NULL) {
+        PyErr_NoMemory();
+        return -1;
+    }
+    return 0;
+}
+
+PyDoc_STRVAR(lu_doc,
+"LU(A, *, ordering='default', strategy='auto', scale='sum', perm=None)\n"
+"--\n\n"
+"Sparse LU factorization of a square matrix by UMFPACK.\n\n"
+"The symbolic analysis (umfpack_*_symbolic) and the numeric factorization\n"
+"(umfpack_*_numeric) of A are computed and both handles are kept.\n"
+"factorize() computes a new numeric factorization for a matrix with the\n"
+"same pattern, reusing the symbolic analysis, and solve() can be called\n"
+"any number of times in between.\n\n"
+"Parameters\n"
+"----------\n"
+"A : scipy.sparse CSC or CSR matrix\n"
+"    Square matrix to factorize, float64 or complex128.  int32 indices\n"
+"    use umfpack_di_*/umfpack_zi_* and int64 indices umfpack_dl_*/\n"
+"    umfpack_zl_*; the arrays are used in place, unless the indices are\n"
+"    unsorted or duplicated, which is fixed on a copy.  A CSR matrix is\n"
+"    factorized as the CSC matrix of its transpose and the transposed\n"
+"    system is solved.\n"
+"ordering : {'default', 'amd', 'cholmod', 'metis', 'best', 'natural', "
+"'given'}, optional\n"
+"    Fill-reducing column ordering.  'default' is UMFPACK's default,\n"
+"    AMD or COLAMD depending on the strategy.  'cholmod' tries AMD/COLAMD\n"
+"    and then METIS, and 'best' tries several and keeps the best one.\n"
+"strategy : {'auto', 'unsymmetric', 'symmetric'}, optional\n"
+"    UMFPACK ordering strategy.\n"
+"scale : {'sum', 'max', 'none'}, optional\n"
+"    Row scaling applied before factorizing.\n"
+"perm : array_like, optional\n"
+"    Initial column ordering, used with ordering='given'.\n\n"
+"Raises SingularMatrixError if A is singular.");
+
+static PyObject *
+lu_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"A", "ordering", "strategy", "scale", "perm",
+                             NULL};
+    PyObject *obj, *perm_obj = Py_None;
+    PyArrayObject *perm = NULL, *x = NULL;
+    const char *ordering = "default", *strategy = "auto", *scale = "sum";
+    const char *name = "umfpack_symbolic";
+    LUObject *self;
+    ss_compressed c;
+    long status;
+    int is_complex;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|$sssO:LU", kwlist,
+                                     &obj, &ordering, &strategy, &scale,
+                                     &perm_obj)) {
+        return NULL;
+    }
+    if ((is_complex = has_complex_values(obj)) < 0
+        || (obj = canonical_matrix(obj)) == NULL) {
+        return NULL;
+    }
+    if (ss_parse_square(obj, NULL, &c) < 0) {
+        Py_DECREF(obj);
+        return NULL;
+    }
+
+    self = (LUObject *)type->tp_alloc(type, 0);
+    if (self == NULL) {
+        ss_compressed_clear(&c);
+        Py_DECREF(obj);
+        return NULL;
+    }
+    if (lu_init(self, c.is_long, is_complex, c.is_csr, c.ncol) < 0) {
+        goto fail;
+    }
+    umfpack_di_defaults(self->Control);
+    self->Control[UMFPACK_PRL] = 0;
+    self->Control[UMFPACK_IRSTEP] = 0;
+    if (set_ordering(self->Control, ordering, perm_obj != Py_None) < 0
+        || set_strategy(self->Control, strategy) < 0
+        || set_scale(self->Control, scale) < 0) {
+        goto fail;
+    }
+    if (perm_obj != Py_None) {
+        perm = ss_index_array_cast(
+            perm_obj, c.is_long ? SS_NPY_LONG : NPY_INT, "perm");
+        if (perm == NULL) {
+            goto fail;
+        }
+        if (PyArray_DIM(perm, 0) != self->n) {
+            PyErr_Format(PyExc_ValueError, "perm must have length %zd",
+                         (Py_ssize_t)self->n);
+            goto fail;
+        }
+    }
+    x = ss_values_array_as(obj, c.nnz, is_complex ? NPY_CDOUBLE : NPY_DOUBLE);
+    if (x == NULL) {
+        goto fail;
+    }
+
+    Py_BEGIN_ALLOW_THREADS
+    status = lu_qsymbolic(self, &c, x, perm);
+    if (status == UMFPACK_OK) {
+        name = "umfpack_numeric";
+        status = lu_numeric(self, &c, x);
+    }
+    Py_END_ALLOW_THREADS
+    if (check_status(name, status) < 0
+        || report_stats(self, "umfpack.LU") < 0) {
+        goto fail;
+    }
+    Py_XDECREF(perm);
+    Py_DECREF(x);
+    ss_compressed_clear(&c);
+    Py_DECREF(obj);
+    return (PyObject *)self;
+
+fail:
+    Py_XDECREF(perm);
+    Py_XDECREF(x);
+    ss_compressed_clear(&c);
+    Py_DECREF(obj);
+    Py_DECREF(self);
+    return NULL;
+}
+
+static void
+lu_dealloc(LUObject *self)
+{
+    lu_free_numeric(self);
+    lu_free_symbolic(self);
+    PyMem_Free(self->Wi);
+    PyMem_Free(self->W);
+    if (self->lock != NULL) {
+        PyThread_free_lock(self->lock);
+    }
+    Py_TYPE(self)->tp_free((PyObject *)self);
+}
+
+PyDoc_STRVAR(factorize_doc,
+"factorize(A)\n"
+"--\n\n"
+"Numeric factorization of A, reusing the symbolic analysis.\n\n"
+"A must have the format, index dtype and sparsity pattern of the matrix\n"
+"the object was created with; only its values may differ.  The arrays are\n"
+"used in place, as for the constructor.  Raises SingularMatrixError if A\n"
+"is singular; the factors are kept, but solves will divide by zero.");
+
+static PyObject *
+lu_factorize(LUObject *self, PyObject *obj)
+{
+    PyArrayObject *x;
+    ss_compressed c;
+    long status;
+
+    if ((obj = canonical_matrix(obj)) == NULL) {
+        return NULL;
+    }
+    if (parse_matrix(self, obj, &c, &x) < 0) {
+        Py_DECREF(obj);
+        return NULL;
+    }
+    ACQUIRE_LOCK(self);
+    Py_BEGIN_ALLOW_THREADS
+    status = lu_refactor(self, &c, x);
+    Py_END_ALLOW_THREADS
+    RELEASE_LOCK(self);
+    Py_DECREF(x);
+    ss_compressed_clear(&c);
+    Py_DECREF(obj);
+    if (check_status("umfpack_numeric", status) < 0
+        || report_stats(self, "umfpack.LU.factorize") < 0) {
+        return NULL;
+    }
+    Py_RETURN_NONE;
+}
+
+static void
+conjugate(double *x, npy_intp n)
+{
+    npy_intp k;
+
+    for (k = 1; k < 2 * n; k += 2) {
+        x[k] = -x[k];
+    }
+}
+
+PyDoc_STRVAR(solve_doc,
+"solve(b, trans='N')\n"
+"--\n\n"
+"Solve A x = b (trans='N'), A.T x = b ('T') or A.H x = b ('H').\n\n"
+"b is a 1-D array of length n or a 2-D array with n rows; each column is\n"
+"solved with umfpack_*_wsolve and workspace kept by the object.  Returns\n"
+"x with the shape of b.  No iterative refinement is done.");
+
+static PyObject *
+lu_solve(LUObject *self, PyObject *args, PyObject *kwds)
+{
+    static char *kwlist[] = {"b", "trans", NULL};
+    PyObject *obj;
+    PyArrayObject *b, *x;
+    const char *trans = "N";
+    npy_intp nrhs, k, stride;
+    int sys, conj = 0;
+    long status = UMFPACK_OK;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "O|s:solve", kwlist,
+                                     &obj, &trans)) {
+        return NULL;
+    }
+    /* A CSR input was factorized as its transpose M = A.T, so A x = b is
+     * M.T x = b and A.H x = b is conj(M) x = b. */
+    if (strcmp(trans, "N") == 0) {
+        sys = self->is_csr ? UMFPACK_Aat : UMFPACK_A;
+    }
+    else if (strcmp(trans, "T") == 0) {
+        sys = self->is_csr ? UMFPACK_A : UMFPACK_Aat;
+    }
+    else if (strcmp(trans, "H") == 0) {
+        sys = self->is_csr ? UMFPACK_A : UMFPACK_At;
+        conj = self->is_csr && self->is_complex;
+    }
+    else {
+        PyErr_Format(PyExc_ValueError, "trans must be 'N', 'T' or 'H', "
+                     "not '%s'", trans);
+        return NULL;
+    }
+    if (self->Numeric == NULL) {
+        PyErr_SetString(PyExc_ValueError,
+                        "no numeric factorization; call factorize()");
+        return NULL;
+    }
+    b = (PyArrayObject *)PyArray_FROM_OTF(
+        obj, self->is_complex ? NPY_CDOUBLE : NPY_DOUBLE,
+        NPY_ARRAY_F_CONTIGUOUS | NPY_ARRAY_ALIGNED
+        | (conj ? NPY_ARRAY_ENSURECOPY : 0));
+    if (b == NULL) {
+        return NULL;
+    }
+    if (PyArray_NDIM(b) < 1 || PyArray_NDIM(b) > 2
+        || PyArray_DIM(b, 0) != self->n) {
+        PyErr_Format(PyExc_ValueError,
+                     "b must be a 1-D or 2-D array with %zd rows",
+                     (Py_ssize_t)self->n);
+        Py_DECREF(b);
+        return NULL;
+    }
+    x = (PyArrayObject *)PyArray_NewLikeArray(b, NPY_FORTRANORDER, NULL, 0);
+    if (x == NULL) {
+        Py_DECREF(b);
+        return NULL;
+    }
+    nrhs = PyArray_NDIM(b) == 2 ? PyArray_DIM(b, 1) : 1;
+    stride = self->n * (self->is_complex ? 2 : 1);
+
+    ACQUIRE_LOCK(self);
+    Py_BEGIN_ALLOW_THREADS
+    if (conj) {
+        conjugate(PyArray_DATA(b), self->n * nrhs);
+    }
+    for (k = 0; k < nrhs && status >= UMFPACK_OK; k++) {
+        status = lu_wsolve(self, sys,
+                           (double *)PyArray_DATA(x) + k * stride,
+                           (double *)PyArray_DATA(b) + k * stride);
+    }
+    if (conj) {
+        conjugate(PyArray_DATA(x), self->n * nrhs);
+    }
+    Py_END_ALLOW_THREADS
+    RELEASE_LOCK(self);
+    Py_DECREF(b);
+    if (status != UMFPACK_WARNING_singular_matrix
+        && check_status("umfpack_wsolve", status) < 0) {
+        Py_DECREF(x);
+        return NULL;
+    }
+    return (PyObject *)x;
+}
+
+/* ------------------------------------------------------------------------ */
+/* LU files */
+/* ------------------------------------------------------------------------ */
+
+/* A saved LU object is a directory holding UMFPACK's own symbolic.umf and
+ * numeric.umf and a header with what they do not record. */
+#define LU_MAGIC "SSUMFPK"
+#define LU_VERSION 1
+#define LU_BYTE_ORDER 0x01020304u
+
+typedef struct {
+    char magic[8];
+    uint32_t version;
+    uint32_t byte_order;
+    int64_t n;
+    int32_t is_long, is_complex, is_csr, reserved;
+    double Control[UMFPACK_CONTROL];
+    double Info[UMFPACK_INFO];
+} lu_header;
+
+enum { LU_HEADER, LU_SYMBOLIC, LU_NUMERIC, LU_NFILES };
+
+/* Paths of the files of an LU directory, as bytes. */
+static int
+lu_paths(PyObject *dir, PyObject *paths[LU_NFILES])
+{
+    static const char *names[LU_NFILES] = {"header", "symbolic.umf",
+                                           "numeric.umf"};
+    PyObject *base;
+    int k;
+
+    if (!PyUnicode_FSConverter(dir, &base)) {
+        return -1;
+    }
+    for (k = 0; k < LU_NFILES; k++) {
+        paths[k] = PyBytes_FromFormat("%s/%s", PyBytes_AS_STRING(base),
+                                      names[k]);
+        if (paths[k] == NULL) {
+            while (--k >= 0) {
+                Py_DECREF(paths[k]);
+            }
+            Py_DECREF(base);
+            return -1;
+        }
+    }
+    Py_DECREF(base);
+    return 0;
+}
+
+static void
+lu_paths_clear(PyObject *paths[LU_NFILES])
+{
+    int k;
+
+    for (k = 0; k < LU_NFILES; k++) {
+        Py_DECREF(paths[k]);
+    }
+}
+
+static int
+make_directory(PyObject *dir)
+{
+    PyObject *os, *makedirs = NULL, *args = NULL, *kwargs = NULL;
+    PyObject *result = NULL;
+
+    os = PyImport_ImportModule("os");
+    if (os != NULL) {
+        makedirs = PyObject_GetAttrString(os, "makedirs");
+        args = PyTuple_Pack(1, dir);
+        kwargs = Py_BuildValue("{s:O}", "exist_ok", Py_True);
+        if (makedirs != NULL && args != NULL && kwargs != NULL) {
+            result = PyObject_Call(makedirs, args, kwargs);
+        }
+    }
+    Py_XDECREF(os);
+    Py_XDECREF(makedirs);
+    Py_XDECREF(args);
+    Py_XDECREF(kwargs);
+    if (result == NULL) {
+        return -1;
+    }
+    Py_DECREF(result);
+    return 0;
+}
+
+PyDoc_STRVAR(save_doc,
+"save(path)\n"
+"--\n\n"
+"Write the factorization to the directory path, created if needed.\n\n"
+"The Symbolic and Numeric objects are written by\n"
+"umfpack_*_save_symbolic and umfpack_*_save_numeric as symbolic.umf and\n"
+"numeric.umf, next to a header with the index and value types, the\n"
+"options and the statistics.  LU.load() reads them back.");
+
+static PyObject *
+lu_save(LUObject *self, PyObject *arg)
+{
+    PyObject *paths[LU_NFILES];
+    lu_header h;
+    FILE *f;
+    long status = UMFPACK_OK;
+    int saved_errno = 0;
+
+    if (self->Numeric == NULL) {
+        PyErr_SetString(PyExc_ValueError,
+                        "no numeric factorization; call factorize()");
+        return NULL;
+    }
+    if (make_directory(arg) < 0 || lu_paths(arg, paths) < 0) {
+        return NULL;
+    }
+    memset(&h, 0, sizeof(h));
+    memcpy(h.magic, LU_MAGIC, sizeof(LU_MAGIC));
+    h.version = LU_VERSION;
+    h.byte_order = LU_BYTE_ORDER;
+    h.n = (int64_t)self->n;
+    h.is_long = self->is_long;
+    h.is_complex = self->is_complex;
+    h.is_csr = self->is_csr;
+
+    ACQUIRE_LOCK(self);
+    memcpy(h.Control, self->Control, sizeof(h.Control));
+    memcpy(h.Info, self->Info, sizeof(h.Info));
+    Py_BEGIN_ALLOW_THREADS
+    f = fopen(PyBytes_AS_STRING(paths[LU_HEADER]), "wb");
+    if (f == NULL || fwrite(&h, sizeof(h), 1, f) != 1) {
+        saved_errno = errno;
+    }
+    if (f != NULL && fclose(f) != 0 && saved_errno == 0) {
+        saved_errno = errno;
+    }
+    if (f != NULL && saved_errno == 0) {
+        status = lu_save_files(self, PyBytes_AS_STRING(paths[LU_SYMBOLIC]),
+                               PyBytes_AS_STRING(paths[LU_NUMERIC]));
+    }
+    Py_END_ALLOW_THREADS
+    RELEASE_LOCK(self);
+    if (f == NULL || saved_errno != 0) {
+        errno = saved_errno != 0 ? saved_errno : EIO;
+        PyErr_SetFromErrnoWithFilename(PyExc_OSError,
+                                       PyBytes_AS_STRING(paths[LU_HEADER]));
+    }
+    else {
+        check_status("umfpack_save", status);
+    }
+    lu_paths_clear(paths);
+    if (PyErr_Occurred()) {
+        return NULL;
+    }
+    Py_RETURN_NONE;
+}
+
+PyDoc_STRVAR(load_doc,
+"load(path)\n"
+"--\n\n"
+"Read a factorization written by save().\n\n"
+"The result solves and refactorizes as the saved object did.  UMFPACK\n"
+"reads its objects into memory: umfpack_*_load_symbolic and\n"
+"umfpack_*_load_numeric allocate them part by part, so, unlike\n"
+"cholmod.Factor.load(), they cannot be memory-mapped.  Only load files\n"
+"from trusted sources.");
+
+static PyObject *
+lu_load(PyTypeObject *type, PyObject *arg)
+{
+    PyObject *paths[LU_NFILES];
+    LUObject *self = NULL;
+    lu_header h;
+    FILE *f;
+    long status = UMFPACK_OK;
+    int ok = 0, saved_errno = 0;
+
+    if (lu_paths(arg, paths) < 0) {
+        return NULL;
+    }
+    Py_BEGIN_ALLOW_THREADS
+    f = fopen(PyBytes_AS_STRING(paths[LU_HEADER]), "rb");
+    if (f == NULL) {
+        saved_errno = errno;
+    }
+    else {
+        ok = fread(&h, sizeof(h), 1, f) == 1;
+        saved_errno = ferror(f) ? errno : 0;
+        fclose(f);
+    }
+    Py_END_ALLOW_THREADS
+    if (f == NULL || saved_errno != 0) {
+        errno = saved_errno != 0 ? saved_errno : EIO;
+        PyErr_SetFromErrnoWithFilename(PyExc_OSError,
+                                       PyBytes_AS_STRING(paths[LU_HEADER]));
+        goto fail;
+    }
+    if (!ok || memcmp(h.magic, LU_MAGIC, sizeof(LU_MAGIC)) != 0
+        || h.version != LU_VERSION || h.byte_order != LU_BYTE_ORDER
+        || (h.is_long & ~1) || (h.is_complex & ~1) || (h.is_csr & ~1)
+        || h.n <= 0 || (!h.is_long && h.n > INT32_MAX)) {
+        PyErr_Format(PyExc_ValueError, "%R is not a saved LU factorization",
+                     arg);
+        goto fail;
+    }
+
+    self = (LUObject *)type->tp_alloc(type, 0);
+    if (self == NULL
+        || lu_init(self, h.is_long, h.is_complex, h.is_csr,
+                   (npy_intp)h.n) < 0) {
+        goto fail;
+    }
+    memcpy(self->Control, h.Control, sizeof(h.Control));
+    memcpy(self->Info, h.Info, sizeof(h.Info));
+    Py_BEGIN_ALLOW_THREADS
+    status = lu_load_files(self, PyBytes_AS_STRING(paths[LU_SYMBOLIC]),
+                           PyBytes_AS_STRING(paths[LU_NUMERIC]));
+    if (status == UMFPACK_OK && lu_numeric_order(self) != self->n) {
+        status = UMFPACK_ERROR_invalid_Numeric_object;
+    }
+    Py_END_ALLOW_THREADS
+    if (check_status("umfpack_load", status) < 0) {
+        goto fail;
+    }
+    lu_paths_clear(paths);
+    return (PyObject *)self;
+
+fail:
+    Py_XDECREF(self);
+    lu_paths_clear(paths);
+    return NULL;
+}
+
+static PyObject *
+lu_get_shape(LUObject *self, void *closure)
+{
+    return Py_BuildValue("(nn)", (Py_ssize_t)self->n, (Py_ssize_t)self->n);
+}
+
+static PyObject *
+lu_get_dtype(LUObject *self, void *closure)
+{
+    return (PyObject *)PyArray_DescrFromType(
+        self->is_complex ? NPY_CDOUBLE : NPY_DOUBLE);
+}
+
+static PyObject *
+lu_get_nnz(LUObject *self, void *closure)
+{
+    return Py_BuildValue("(dd)", self->Info[UMFPACK_LNZ],
+                         self->Info[UMFPACK_UNZ]);
+}
+
+static PyObject *
+lu_get_rcond(LUObject *self, void *closure)
+{
+    return PyFloat_FromDouble(self->Info[UMFPACK_RCOND]);
+}
+
+static PyObject *
+lu_get_stats(LUObject *self, void *closure)
+{
+    return lu_stats(self);
+}
+
+static PyMethodDef lu_methods[] = {
+    {"factorize", (PyCFunction)lu_factorize, METH_O, factorize_doc},
+    {"solve", (PyCFunction)(void (*)(void))lu_solve,
+     METH_VARARGS | METH_KEYWORDS, solve_doc},
+    {"save", (PyCFunction)lu_save, METH_O, save_doc},
+    {"load", (PyCFunction)lu_load, METH_CLASS | METH_O, load_doc},
+    {NULL, NULL, 0, NULL}
+};
+
+static PyGetSetDef lu_getset[] = {
+    {"shape", (getter)lu_get_shape, NULL, "Shape of the matrix.", NULL},
+    {"dtype", (getter)lu_get_dtype, NULL,
+     "Value type of the factors, float64 or complex128.", NULL},
+    {"nnz", (getter)lu_get_nnz, NULL,
+     "Entries in L and in U, diagonals included.", NULL},
+    {"rcond", (getter)lu_get_rcond, NULL,
+     "Rough estimate of the reciprocal condition number, min|Uii| / "
+     "max|Uii|.", NULL},
+    {"stats", (getter)lu_get_stats, NULL,
+     "Statistics of the symbolic analysis and the last numeric\n"
+     "factorization, from UMFPACK's Info array: order and entries of A\n"
+     "('n', 'nz'), strategy and ordering used, dense rows and columns\n"
+     "('ndense_row', 'ndense_col'), singletons, entries in L and U and\n"
+     "flops, estimated by the analysis ('lnz_estimate', 'unz_estimate',\n"
+     "'flops_estimate') and actual ('lnz', 'unz', 'flops'), bytes of the\n"
+     "analysis ('symbolic_memory'), of the factors ('numeric_memory') and\n"
+     "their peak ('peak_memory'), garbage collections ('numeric_defrag')\n"
+     "and wall-clock seconds ('symbolic_time', 'numeric_time').  -1 where\n"
+     "not computed.  The same dict is passed to the hook set by\n"
+     "suitesparse.set_stats_hook after each factorization.", NULL},
+    {NULL, NULL, NULL, NULL, NULL}
+};
+
+static PyTypeObject LUType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    .tp_name = "suitesparse.umfpack.LU",
+    .tp_basicsize = sizeof(LUObject),
+    .tp_dealloc = (destructor)lu_dealloc,
+    .tp_flags = Py_TPFLAGS_DEFAULT,
+    .tp_doc = lu_doc,
+    .tp_methods = lu_methods,
+    .tp_getset = lu_getset,
+    .tp_new = lu_new,
+};
+
+/* ------------------------------------------------------------------------ */
+/* module */
+/* ------------------------------------------------------------------------ */
+
+static struct PyModuleDef umfpack_module = {
+    PyModuleDef_HEAD_INIT,
+    "suitesparse.umfpack",
+    "UMFPACK: sparse unsymmetric LU factorization.",
+    -1,
+    NULL,
+};
+
+PyMODINIT_FUNC
+PyInit_umfpack(void)
+{
+    PyObject *m;
+
+    import_array();
+    if (PyType_Ready(&LUType) < 0) {
+        return NULL;
+    }
+    m = PyModule_Create(&umfpack_module);
+    if (m == NULL) {
+        return NULL;
+    }
+    UmfpackError = PyErr_NewExceptionWithDoc(
+        "suitesparse.umfpack.UmfpackError",
+        "Error reported by UMFPACK.", PyExc_RuntimeError, NULL);
+    SingularMatrixError = PyErr_NewExceptionWithDoc(
+        "suitesparse.umfpack.SingularMatrixError",
+        "The matrix to factorize is singular.", UmfpackError, NULL);
+    if (UmfpackError == NULL || SingularMatrixError == NULL
+        || PyModule_AddObjectRef(m, "UmfpackError", UmfpackError) < 0
+        || PyModule_AddObjectRef(m, "SingularMatrixError",
+                                 SingularMatrixError) < 0
+        || PyModule_AddObjectRef(m, "LU", (PyObject *)&LUType) < 0) {
+        Py_DECREF(m);
+        return NULL;
+    }
+    return m;
+}